@@ -0,0 +1,359 @@
+"""
+A compact binary archive format for storing large numbers of articles.
+
+An archive consists of a header, a record for every article, an index with the
+offset of every record, and a footer with the offset of the index:
+
+    header   MAGIC, FORMAT_VERSION
+    record   b"R", RECORD_HEADER, title, author, content   (repeated)
+    index    b"I", an array of little-endian uint64 record offsets
+    footer   FOOTER: index offset, number of records, END_MAGIC
+
+The fixed-size `RECORD_HEADER` contains the id, the dates, the number of
+characters in the content, and the lengths of the UTF-8 encoded strings that
+follow it. The records can be read one after another from a stream without
+the index, while the footer allows `ArticleArchive` to find any record with a
+single seek.
+"""
+from __future__ import annotations
+
+import array
+import datetime
+import io
+import os
+import struct
+import sys
+import typing
+
+import solution
+
+MAGIC = b"ARTCLARC"
+END_MAGIC = b"ARCEND\x00\x00"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sH")
+FOOTER = struct.Struct("<QQ8s")
+RECORD_TAG = b"R"
+INDEX_TAG = b"I"
+
+# id, publication date (microseconds, UTC offset in seconds), last edit
+# (microseconds, UTC offset in seconds), number of characters in the content,
+# and the encoded lengths of the title, author, and content.
+RECORD_HEADER = struct.Struct("<qqiqiQIIQ")
+
+# The UTC offset stored for naive datetimes.
+NAIVE = -2 ** 31
+
+ArticleType = typing.TypeVar("ArticleType", bound=solution.BaseArticle)
+
+
+class ArchiveError(Exception):
+    """Indicates that a file is not a valid article archive."""
+
+
+def _pack_datetime(value: typing.Optional[datetime.datetime]) -> typing.Tuple[int, int]:
+    """
+    Pack a datetime into its wall-clock timestamp and UTC offset in seconds.
+
+    Aware datetimes are restored with a fixed-offset `datetime.timezone`, so
+    the name of a time zone like `zoneinfo.ZoneInfo("Europe/Amsterdam")` is
+    not preserved, but the moment in time is.
+    """
+    if value is None or value.tzinfo is None:
+        return solution.to_timestamp(value), NAIVE
+
+    offset = value.utcoffset()
+    timestamp = solution.to_timestamp(value.replace(tzinfo=None))
+    if offset is None:
+        return timestamp, NAIVE
+
+    return timestamp, offset // datetime.timedelta(seconds=1)
+
+
+def _unpack_datetime(timestamp: int, offset: int) -> typing.Optional[datetime.datetime]:
+    """Unpack a datetime packed by `_pack_datetime`."""
+    value = solution.from_timestamp(timestamp)
+    if value is None or offset == NAIVE:
+        return value
+
+    return value.replace(tzinfo=datetime.timezone(datetime.timedelta(seconds=offset)))
+
+
+class ArchiveWriter:
+    """
+    Write articles to an archive one at a time.
+
+    The writer can be used as a context manager, which writes the index and
+    the footer when the block is exited. If the block raises an exception,
+    the archive is left unfinished instead, so it can't be mistaken for a
+    complete archive. The target has to be a path or a binary file object; a
+    file object is not closed by the writer.
+    """
+
+    def __init__(self, target: typing.Union[str, os.PathLike, typing.BinaryIO]):
+        if isinstance(target, (str, os.PathLike)):
+            self.file = open(target, "wb")
+            self._owns_file = True
+        else:
+            self.file = target
+            self._owns_file = False
+
+        self.offsets = array.array("Q")
+        self._position = self.file.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+        self.closed = False
+
+    def __enter__(self) -> ArchiveWriter:
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, article: solution.BaseArticle) -> None:
+        """Append an article to the archive."""
+        title = article.title.encode("utf-8")
+        author = article.author.encode("utf-8")
+        content = article.content
+        encoded_content = content.encode("utf-8")
+
+        record_header = RECORD_HEADER.pack(
+            article.id,
+            *_pack_datetime(article.publication_date),
+            *_pack_datetime(article.last_edited),
+            len(content),
+            len(title),
+            len(author),
+            len(encoded_content),
+        )
+
+        self.offsets.append(self._position)
+        self._position += self.file.write(b"".join((RECORD_TAG, record_header, title, author, encoded_content)))
+
+    def close(self) -> None:
+        """Write the index and the footer, finishing the archive."""
+        if self.closed:
+            return
+
+        index_offset = self._position
+        offsets = self.offsets
+        if sys.byteorder != "little":  # pragma: no cover - big-endian platforms
+            offsets = array.array("Q", offsets)
+            offsets.byteswap()
+
+        self.file.write(INDEX_TAG)
+        self.file.write(offsets.tobytes())
+        self.file.write(FOOTER.pack(index_offset, len(self.offsets), END_MAGIC))
+        self.file.flush()
+        self.closed = True
+
+        if self._owns_file:
+            self.file.close()
+
+    def abort(self) -> None:
+        """Stop writing without finishing the archive, so readers reject it as truncated."""
+        if self.closed:
+            return
+
+        self.closed = True
+        if self._owns_file:
+            self.file.close()
+
+
+def dump_articles(
+    articles: typing.Iterable[solution.BaseArticle],
+    target: typing.Union[str, os.PathLike, typing.BinaryIO],
+) -> int:
+    """Write `articles` to an archive at `target` and return the number of articles written."""
+    with ArchiveWriter(target) as writer:
+        for article in articles:
+            writer.write(article)
+
+    return len(writer.offsets)
+
+
+def _read_exactly(file: typing.BinaryIO, size: int) -> bytes:
+    """Read exactly `size` bytes from `file`, raising an `ArchiveError` if it ends early."""
+    data = file.read(size)
+    if len(data) != size:
+        raise ArchiveError("unexpected end of archive")
+    return data
+
+
+def _read_header(file: typing.BinaryIO) -> None:
+    """Read and validate the header of an archive."""
+    magic, version = HEADER.unpack(_read_exactly(file, HEADER.size))
+    if magic != MAGIC:
+        raise ArchiveError("not an article archive")
+    if version != FORMAT_VERSION:
+        raise ArchiveError(f"unsupported archive format version {version}")
+
+
+def _read_record(
+    file: typing.BinaryIO,
+    cls: typing.Type[ArticleType],
+    path: typing.Optional[typing.Union[str, os.PathLike]] = None,
+    offset: int = 0,
+) -> ArticleType:
+    """
+    Read the record after the record tag and create an article of type `cls` from it.
+
+    If a `path` is given, the content is not read; instead, the article gets a
+    `ContentReference` to the content in the file at `path`, which requires
+    the `offset` of the record in that file.
+    """
+    (
+        article_id,
+        publication_timestamp,
+        publication_offset,
+        edit_timestamp,
+        edit_offset,
+        characters,
+        title_length,
+        author_length,
+        content_length,
+    ) = RECORD_HEADER.unpack(_read_exactly(file, RECORD_HEADER.size))
+
+    strings_length = title_length + author_length
+    if path is None:
+        strings = _read_exactly(file, strings_length + content_length)
+        content = strings[strings_length:].decode("utf-8")
+    else:
+        strings = _read_exactly(file, strings_length)
+        content_offset = offset + len(RECORD_TAG) + RECORD_HEADER.size + strings_length
+        content = solution.ContentReference(path, content_offset, content_length, characters=characters)
+
+    title = strings[:title_length].decode("utf-8")
+    author = strings[title_length:strings_length].decode("utf-8")
+
+    article = cls(
+        title=title,
+        author=author,
+        publication_date=_unpack_datetime(publication_timestamp, publication_offset),
+        content=content,
+        id=article_id,
+    )
+    article.last_edited = _unpack_datetime(edit_timestamp, edit_offset)
+    return article
+
+
+def iter_articles(
+    source: typing.Union[str, os.PathLike, typing.BinaryIO],
+    cls: typing.Type[ArticleType] = solution.Article,
+) -> typing.Iterator[ArticleType]:
+    """
+    Read the articles in an archive one at a time, without using the index.
+
+    Only one record is held in memory at a time, and the source doesn't have
+    to be seekable, so this also works for archives read from a pipe or socket.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from iter_articles(file, cls)
+        return
+
+    if isinstance(source, io.RawIOBase):
+        # Unbuffered raw streams, like pipes, may return fewer bytes than
+        # requested. The buffer is detached afterwards, or it would close the
+        # stream of the caller when it's garbage collected.
+        file = io.BufferedReader(source)
+        try:
+            yield from _iter_records(file, cls)
+        finally:
+            file.detach()
+    else:
+        yield from _iter_records(source, cls)
+
+
+def _iter_records(file: typing.BinaryIO, cls: typing.Type[ArticleType]) -> typing.Iterator[ArticleType]:
+    """Read the articles in an archive from a buffered binary file, checking the footer at the end."""
+    _read_header(file)
+    count = 0
+    while True:
+        tag = _read_exactly(file, 1)
+        if tag == INDEX_TAG:
+            break
+        if tag != RECORD_TAG:
+            raise ArchiveError(f"unexpected record tag {tag!r}")
+        yield _read_record(file, cls)
+        count += 1
+
+    # The index isn't needed here, but checking the footer that follows it
+    # makes sure that the archive wasn't truncated.
+    _read_exactly(file, count * 8)
+    _, footer_count, end_magic = FOOTER.unpack(_read_exactly(file, FOOTER.size))
+    if end_magic != END_MAGIC or footer_count != count:
+        raise ArchiveError("the footer of the archive is corrupt")
+
+
+class ArticleArchive:
+    """
+    Random access to the articles in an archive file through its index.
+
+    With `lazy=True`, the articles get a `ContentReference` to their content
+    in the archive instead of the content itself. Their titles, authors, and
+    dates are read right away, while the content is only loaded when it's
+    needed; `len()` works without loading it.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike],
+        cls: typing.Type[ArticleType] = solution.Article,
+        lazy: bool = False,
+    ):
+        self.path = path
+        self.cls = cls
+        self.lazy = lazy
+        self.file = open(path, "rb")
+
+        try:
+            _read_header(self.file)
+            self.file.seek(-FOOTER.size, io.SEEK_END)
+            index_offset, count, end_magic = FOOTER.unpack(_read_exactly(self.file, FOOTER.size))
+            if end_magic != END_MAGIC:
+                raise ArchiveError("the archive has no index; was it closed properly?")
+
+            self.file.seek(index_offset)
+            if _read_exactly(self.file, 1) != INDEX_TAG:
+                raise ArchiveError("the index of the archive is corrupt")
+
+            self.offsets = array.array("Q")
+            self.offsets.frombytes(_read_exactly(self.file, count * self.offsets.itemsize))
+            if sys.byteorder != "little":  # pragma: no cover - big-endian platforms
+                self.offsets.byteswap()
+        except BaseException:
+            self.file.close()
+            raise
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the archive."""
+        return f"<{self.__class__.__name__} path={self.path!r} articles={len(self)}>"
+
+    def __enter__(self) -> ArticleArchive:
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Return the number of articles in the archive."""
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> solution.BaseArticle:
+        """Read the article at position `index` in the archive."""
+        offset = self.offsets[index]
+        self.file.seek(offset)
+        if _read_exactly(self.file, 1) != RECORD_TAG:
+            raise ArchiveError(f"no record at offset {offset}")
+
+        return _read_record(self.file, self.cls, self.path if self.lazy else None, offset)
+
+    def __iter__(self) -> typing.Iterator[solution.BaseArticle]:
+        """Read the articles in the order in which they were written."""
+        return (self[index] for index in range(len(self)))
+
+    def close(self) -> None:
+        """Close the archive file."""
+        self.file.close()
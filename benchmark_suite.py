@@ -0,0 +1,275 @@
+"""
+Scaling benchmarks for the `Article` methods, written as a unittest suite.
+
+Run the suite with `python run_tests.py --benchmark`. Every benchmark times
+an operation at a number of growing input sizes and fits a power law to the
+timings: an exponent of 0 means the operation takes constant time, 1 means
+that it's linear in the size of the input, and so on. A benchmark fails if
+the fitted exponent exceeds the expected exponent by more than
+`EXPONENT_TOLERANCE`, which catches an accidental change in complexity
+regardless of the speed of the machine.
+
+Throughput is machine-specific, so it's only checked against a baseline that
+was recorded on the same machine with `python run_tests.py --benchmark
+--update-baseline`. A benchmark fails if it's more than `THRESHOLD` slower
+than the baseline (as the geometric mean over all sizes).
+"""
+from __future__ import annotations
+
+import collections
+import datetime
+import itertools
+import json
+import math
+import os
+import random
+import timeit
+import typing
+import unittest
+
+import benchmarks
+import solution
+
+BASELINE_PATH = os.environ.get(
+    "ARTICLE_BENCHMARK_BASELINE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+)
+THRESHOLD = float(os.environ.get("ARTICLE_BENCHMARK_THRESHOLD", "0.5"))
+UPDATE_BASELINE = os.environ.get("ARTICLE_BENCHMARK_UPDATE_BASELINE") == "1"
+EXPONENT_TOLERANCE = 0.35
+
+# The content lengths in characters and the numbers of articles to benchmark.
+CONTENT_SIZES = (2 ** 12, 2 ** 14, 2 ** 16, 2 ** 18)
+ARTICLE_COUNTS = (2 ** 8, 2 ** 10, 2 ** 12, 2 ** 14)
+
+Measurement = collections.namedtuple("Measurement", "sizes seconds exponent")
+
+
+def measure(func: typing.Callable[[], typing.Any], min_time: float = 0.02, repeats: int = 5) -> float:
+    """
+    Return the best time of a single call of `func` in seconds.
+
+    Fast operations are called in a loop that takes at least `min_time`
+    seconds, as timing a single call of an operation that takes less than a
+    microsecond mostly measures the overhead of the timer.
+    """
+    timer = timeit.Timer(func)
+    # The first call warms up caches and the lazily created state of the
+    # interpreter, which shouldn't be part of the measurement.
+    func()
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    return min([elapsed] + timer.repeat(repeat=repeats - 1, number=number)) / number
+
+
+def fit_exponent(sizes: typing.Sequence[int], seconds: typing.Sequence[float]) -> float:
+    """
+    Fit `seconds = c * sizes ** exponent` by least squares on a log-log scale and return the exponent.
+
+    With O(n log n) growth, the exponent is slightly higher than 1, which is
+    why the expected exponents are compared with a tolerance.
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-12)) for value in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def slowdown(measurement: Measurement, baseline: typing.Mapping[str, typing.Any]) -> typing.Optional[float]:
+    """
+    Return how much slower `measurement` is than the `baseline` as a ratio.
+
+    The ratio is the geometric mean of the ratios at each size, so a single
+    noisy size has less influence. If the baseline was recorded for other
+    sizes, the measurements can't be compared and `None` is returned.
+    """
+    if list(baseline["sizes"]) != list(measurement.sizes):
+        return None
+
+    log_ratios = [math.log(new / old) for new, old in zip(measurement.seconds, baseline["seconds"])]
+    return math.exp(sum(log_ratios) / len(log_ratios))
+
+
+def make_article(content: str, publication_date: datetime.datetime = datetime.datetime(2020, 7, 1)) -> solution.Article:
+    """Create an article with the given content and placeholder metadata."""
+    return solution.Article(
+        title="The emperor's new clothes",
+        author="Hans Christian Andersen",
+        publication_date=publication_date,
+        content=content,
+    )
+
+
+def make_articles(n_articles: int) -> typing.List[solution.Article]:
+    """Create `n_articles` short articles with random publication dates."""
+    rng = random.Random(n_articles)
+    start = datetime.datetime(2000, 1, 1)
+    return [
+        make_article("content", start + datetime.timedelta(seconds=rng.randrange(20 * 365 * 86400)))
+        for _ in range(n_articles)
+    ]
+
+
+class FieldHolder:
+    """A class with a type-checked attribute to benchmark `ArticleField` with."""
+
+    attribute = solution.ArticleField(int)
+
+    def __init__(self, attribute: int) -> None:
+        self.attribute = attribute
+
+
+class FieldRecordHolder(solution.FieldRecord):
+    """A `FieldRecord` with type-checked attributes to benchmark `FieldPlan` with."""
+
+    attribute = solution.ArticleField(int)
+    name = solution.ArticleField(str)
+
+
+class ArticleScalingBenchmarks(unittest.TestCase):
+    """Scaling benchmarks for the Article methods."""
+
+    baseline = {}
+    measurements = {}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Load the baseline, if there is one."""
+        cls.measurements = {}
+        try:
+            with open(BASELINE_PATH, encoding="utf-8") as file:
+                cls.baseline = json.load(file)
+        except FileNotFoundError:
+            cls.baseline = {}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Write the measurements to the baseline file when updating the baseline."""
+        if not UPDATE_BASELINE:
+            return
+
+        baseline = dict(cls.baseline)
+        baseline.update((name, measurement._asdict()) for name, measurement in cls.measurements.items())
+        with open(BASELINE_PATH, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+
+    def assertScales(
+        self,
+        name: str,
+        make_operation: typing.Callable[[int], typing.Callable[[], typing.Any]],
+        sizes: typing.Sequence[int],
+        expected_exponent: float,
+    ) -> None:
+        """Assert that the operation created by `make_operation` scales and performs as expected."""
+        seconds = [measure(make_operation(size)) for size in sizes]
+        measurement = Measurement(list(sizes), seconds, fit_exponent(sizes, seconds))
+        self.measurements[name] = measurement
+
+        with self.subTest("complexity", operation=name):
+            self.assertLessEqual(
+                measurement.exponent, expected_exponent + EXPONENT_TOLERANCE,
+                f"{name} grows with exponent {measurement.exponent:.2f}, expected {expected_exponent}",
+            )
+
+        if name in self.baseline and not UPDATE_BASELINE:
+            ratio = slowdown(measurement, self.baseline[name])
+            with self.subTest("throughput", operation=name):
+                if ratio is None:
+                    self.skipTest("the baseline was recorded for other sizes")
+                self.assertLessEqual(
+                    ratio, 1 + THRESHOLD, f"{name} is {ratio:.2f}x slower than the baseline"
+                )
+
+    def test_init(self):
+        """Article.__init__ should take constant time in the length of the content."""
+        def make_operation(size):
+            content = benchmarks.make_text(size)
+            return lambda: make_article(content)
+
+        self.assertScales("Article.__init__", make_operation, CONTENT_SIZES, expected_exponent=0)
+
+    def test_len(self):
+        """len() should take constant time in the length of the content."""
+        def make_operation(size):
+            article = make_article(benchmarks.make_text(size))
+            return lambda: len(article)
+
+        self.assertScales("Article.__len__", make_operation, CONTENT_SIZES, expected_exponent=0)
+
+    def test_short_introduction(self):
+        """short_introduction should take linear time in the length of the content on a new article."""
+        def make_operation(size):
+            content = benchmarks.make_text(size)
+            return lambda: make_article(content).short_introduction(size // 2)
+
+        self.assertScales("Article.short_introduction", make_operation, CONTENT_SIZES, expected_exponent=1)
+
+    def test_most_common_words(self):
+        """most_common_words should take linear time in the length of the content on a new article."""
+        def make_operation(size):
+            content = benchmarks.make_text(size)
+            return lambda: make_article(content).most_common_words(5)
+
+        self.assertScales("Article.most_common_words", make_operation, CONTENT_SIZES, expected_exponent=1)
+
+    def test_content_setter(self):
+        """Replacing the content should take constant time in the length of the content."""
+        def make_operation(size):
+            contents = itertools.cycle([benchmarks.make_text(size), benchmarks.make_text(size, "Once upon a time ")])
+            article = make_article(next(contents))
+
+            def replace_content():
+                article.content = next(contents)
+
+            return replace_content
+
+        self.assertScales("Article.content setter", make_operation, CONTENT_SIZES, expected_exponent=0)
+
+    def test_sorting(self):
+        """Sorting articles by publication date should take O(n log n) time."""
+        def make_operation(size):
+            articles = make_articles(size)
+            return lambda: sorted(articles)
+
+        self.assertScales("sorted(articles)", make_operation, ARTICLE_COUNTS, expected_exponent=1)
+
+    def test_field_get(self):
+        """Reading an ArticleField should take constant time per instance."""
+        def make_operation(size):
+            holders = [FieldHolder(index) for index in range(size)]
+            return lambda: [holder.attribute for holder in holders]
+
+        self.assertScales("ArticleField.__get__", make_operation, ARTICLE_COUNTS, expected_exponent=1)
+
+    def test_field_set(self):
+        """Assigning to an ArticleField should take constant time per instance."""
+        def make_operation(size):
+            holders = [FieldHolder(index) for index in range(size)]
+
+            def assign():
+                for holder in holders:
+                    holder.attribute = 1
+
+            return assign
+
+        self.assertScales("ArticleField.__set__", make_operation, ARTICLE_COUNTS, expected_exponent=1)
+
+    def test_field_update(self):
+        """Updating the fields of a FieldRecord should take constant time per instance."""
+        def make_operation(size):
+            holders = [FieldRecordHolder(attribute=index, name="name") for index in range(size)]
+
+            def update():
+                for holder in holders:
+                    holder.update(attribute=1, name="other name")
+
+            return update
+
+        self.assertScales("FieldRecord.update", make_operation, ARTICLE_COUNTS, expected_exponent=1)
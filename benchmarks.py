@@ -0,0 +1,452 @@
+"""
+Benchmarks for the `Article` implementation in `solution.py`.
+
+Run `python benchmarks.py --help` to see the available benchmarks.
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import datetime
+import io
+import itertools
+import os
+import pickle
+import random
+import re
+import sys
+import tempfile
+import timeit
+import typing
+
+import archive
+import shared_articles
+import sketches
+import solution
+import tokenizers
+
+KB = 1024
+MB = 1024 * KB
+
+# The text used to generate articles of arbitrary sizes. It contains a mix of
+# punctuation, case, and newlines to exercise the word boundary handling.
+SAMPLE_TEXT = (
+    "'But he has nothing at all on!' at last cried out all the people. The Emperor "
+    "was vexed, for he knew that the people were right.\nHowever, he thought the "
+    "procession must go on now! And the lords of the bedchamber took greater pains "
+    "than ever, to appear holding up a train, although, in reality, there was no "
+    "train to hold.\n"
+)
+
+
+def make_text(size: int, sample: str = SAMPLE_TEXT) -> str:
+    """Create a text of exactly `size` characters by repeating `sample`."""
+    repeats = size // len(sample) + 1
+    return (sample * repeats)[:size]
+
+
+# A multilingual text for the Unicode tokenizer, with accented Latin, Greek,
+# Cyrillic, and a decomposed accent (the "e\u0301" in "cafe\u0301").
+MULTILINGUAL_TEXT = (
+    "Des Kaisers neue Kleider: »Aber er hat ja gar nichts an!« sagte endlich ein kleines Kind. "
+    "L'empereur était vexé, car il savait que le peuple avait raison, au cafe\u0301 et dans la rue.\n"
+    "Ο αυτοκράτορας συνέχισε την πομπή, ενώ οι αυλικοί κρατούσαν μια ουρά που δεν υπήρχε. "
+    "Но король не обращал внимания и шёл дальше, а придворные несли шлейф, которого не было.\n"
+)
+
+
+def format_size(size: int) -> str:
+    """Format a size in bytes as a short human-readable string."""
+    for unit, factor in (("MB", MB), ("KB", KB)):
+        if size >= factor:
+            return f"{size / factor:g} {unit}"
+    return f"{size} B"
+
+
+def best_time(func: typing.Callable[[], typing.Any], budget: float = 1.0) -> float:
+    """
+    Return the best wall-clock time of calling `func` in seconds.
+
+    The function is called at least once. If the first call took less than
+    `budget` seconds, it's repeated for as long as the budget allows, up to
+    a maximum of five repeats, to reduce the noise in the measurement.
+    """
+    timer = timeit.Timer(func)
+    first = timer.timeit(number=1)
+    repeats = min(5, int(budget / first)) if first else 5
+    if repeats < 1:
+        return first
+    return min([first] + timer.repeat(repeat=repeats, number=1))
+
+
+def write_table(header: typing.Sequence[str], rows: typing.Iterable[typing.Sequence[typing.Any]]) -> None:
+    """Print a simple table with right-aligned columns."""
+    rows = [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(cell) for cell in column) for column in zip(header, *rows)]
+    for row in itertools.chain([header], rows):
+        print("  ".join(f"{cell:>{width}}" for cell, width in zip(row, widths)))
+
+
+def benchmark_tokenizers(sizes: typing.Sequence[int]) -> None:
+    """Compare the throughput of the tokenizers against the original generator path."""
+    engines = {
+        "generator": tokenizers.GeneratorTokenizer(),
+        "translate": tokenizers.TranslateTokenizer(),
+        "regex": tokenizers.RegexTokenizer(),
+    }
+    rows = []
+    for size in sizes:
+        text = make_text(size)
+        reference = None
+        baseline = None
+        for name, tokenizer in engines.items():
+            counts = tokenizer.count(text)
+            if reference is None:
+                reference = list(counts.items())
+            elif list(counts.items()) != reference:
+                raise AssertionError(f"{name} tokenizer differs from the generator tokenizer")
+
+            seconds = best_time(lambda: tokenizer.count(text))
+            baseline = baseline or seconds
+            rows.append((
+                format_size(size),
+                name,
+                f"{seconds:.4f}s",
+                f"{size / MB / seconds:.1f} MB/s",
+                f"{baseline / seconds:.1f}x",
+            ))
+
+    write_table(("size", "tokenizer", "time", "throughput", "speedup"), rows)
+
+
+def benchmark_unicode(sizes: typing.Sequence[int]) -> None:
+    """Compare the throughput of the Unicode tokenizer on multilingual text against the ASCII path."""
+    ascii_tokenizer = tokenizers.TranslateTokenizer()
+    unicode_tokenizer = tokenizers.UnicodeTokenizer()
+    # A compiled pattern for Unicode letters, as an alternative to the table.
+    pattern = re.compile(r"[^\W\d_]+")
+
+    rows = []
+    for size in sizes:
+        english = make_text(size)
+        multilingual = make_text(size, MULTILINGUAL_TEXT)
+        runs = (
+            ("translate (ASCII)", "English", lambda: ascii_tokenizer.count(english)),
+            ("unicode", "English", lambda: unicode_tokenizer.count(english)),
+            ("unicode", "multilingual", lambda: unicode_tokenizer.count(multilingual)),
+            ("regex [^\\W\\d_]+", "multilingual", lambda: collections.Counter(pattern.findall(multilingual.casefold()))),
+        )
+        baseline = None
+        for name, text_name, count in runs:
+            seconds = best_time(count)
+            baseline = baseline or seconds
+            rows.append((
+                format_size(size),
+                name,
+                text_name,
+                f"{seconds:.4f}s",
+                f"{size / MB / seconds:.1f} MB/s",
+                f"{seconds / baseline:.2f}x",
+            ))
+
+    write_table(("size", "tokenizer", "text", "time", "throughput", "vs ASCII"), rows)
+
+
+def make_articles(n_articles: int, seed: int = 2020) -> typing.List[solution.Article]:
+    """Create `n_articles` articles with random publication dates spread over 20 years."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2000, 1, 1)
+    return [
+        solution.Article(
+            title="a", author="b", content="c",
+            publication_date=start + datetime.timedelta(seconds=rng.randrange(20 * 365 * 86400)),
+        )
+        for _ in range(n_articles)
+    ]
+
+
+def benchmark_index(n_articles: int) -> None:
+    """Compare range queries on an `ArticleIndex` against sorting the articles with `sorted()`."""
+    articles = make_articles(n_articles)
+    start, end = datetime.datetime(2010, 1, 1), datetime.datetime(2010, 1, 31)
+
+    def sorted_window() -> typing.List[solution.Article]:
+        return [article for article in sorted(articles) if start <= article.publication_date <= end]
+
+    index = solution.ArticleIndex(articles)
+    if list(index.between(start, end)) != sorted_window():
+        raise AssertionError("ArticleIndex.between differs from filtering the sorted articles")
+
+    extra = make_articles(1000, seed=2021)
+
+    def insert_and_remove() -> None:
+        for article in extra:
+            index.add(article)
+        for article in extra:
+            index.remove(article)
+
+    rows = [
+        ("sort", "sorted(articles)", best_time(lambda: sorted(articles))),
+        ("sort", "ArticleIndex(articles)", best_time(lambda: solution.ArticleIndex(articles))),
+        ("window", "sorted() + filter", best_time(sorted_window)),
+        ("window", "index.between()", best_time(lambda: list(index.between(start, end)))),
+        ("latest 10", "sorted()[-10:]", best_time(lambda: sorted(articles)[-10:])),
+        ("latest 10", "index.latest(10)", best_time(lambda: index.latest(10))),
+        ("1000 edits", "index.add/remove", best_time(insert_and_remove)),
+    ]
+    print(f"{n_articles} articles")
+    write_table(("operation", "method", "time"), [(op, method, f"{seconds:.6f}s") for op, method, seconds in rows])
+
+
+def benchmark_archive(n_articles: int, content_size: int) -> None:
+    """Compare writing and reading an article archive against pickling the articles."""
+    articles = make_articles(n_articles)
+    content = make_text(content_size)
+    for article in articles:
+        article.content = content
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "articles.arc")
+        archive.dump_articles(articles, path)
+        with archive.ArticleArchive(path) as loaded:
+            if [(a.id, a.content, a.last_edited) for a in loaded] != [(a.id, a.content, a.last_edited) for a in articles]:
+                raise AssertionError("the articles read from the archive differ from the originals")
+
+        def pickle_each() -> bytes:
+            buffer = io.BytesIO()
+            for article in articles:
+                pickle.dump(article, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+            return buffer.getvalue()
+
+        def unpickle_each(data: bytes) -> None:
+            buffer = io.BytesIO(data)
+            for _ in articles:
+                pickle.load(buffer)
+
+        def read_lazily() -> None:
+            with archive.ArticleArchive(path, lazy=True) as loaded:
+                for article in loaded:
+                    len(article)
+
+        pickled = pickle_each()
+        size = os.path.getsize(path)
+        rows = [
+            ("write", "pickle.dump per article", len(pickled), best_time(pickle_each)),
+            ("write", "archive.dump_articles", size, best_time(lambda: archive.dump_articles(articles, path))),
+            ("read", "pickle.load per article", len(pickled), best_time(lambda: unpickle_each(pickled))),
+            ("read", "archive.iter_articles", size, best_time(lambda: list(archive.iter_articles(path)))),
+            ("read", "ArticleArchive(lazy=True)", size, best_time(read_lazily)),
+        ]
+
+    print(f"{n_articles} articles of {format_size(content_size)}")
+    write_table(
+        ("operation", "method", "size", "time", "articles/s"),
+        [
+            (op, method, format_size(size), f"{seconds:.4f}s", f"{n_articles / seconds:,.0f}")
+            for op, method, size, seconds in rows
+        ],
+    )
+
+
+def _length_pickled(article: solution.Article) -> int:
+    """Return the length of an article that was pickled to the worker."""
+    return len(article)
+
+
+def _length_shared(handles: typing.Sequence[shared_articles.SharedArticleHandle]) -> typing.List[int]:
+    """Return the lengths of the articles of a batch of handles in a worker."""
+    with shared_articles.SharedArticleReader() as reader:
+        return [len(reader.article(handle)) for handle in handles]
+
+
+def benchmark_shared(n_articles: int, content_size: int, workers: int) -> None:
+    """
+    Compare sending articles to worker processes through shared memory against pickling them.
+
+    The workers only take the length of every article, so the timings are
+    dominated by getting the articles to the workers. Creating the block
+    copies all contents once, which is timed separately from sending the
+    handles to the workers, as a block can be reused for many jobs.
+    """
+    articles = make_articles(n_articles)
+    for index, article in enumerate(articles):
+        article.content = make_text(content_size, f"article {index} " + SAMPLE_TEXT)
+
+    chunk_size = max(1, n_articles // (4 * workers))
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        # Start the workers up front, so starting them isn't part of the timings.
+        list(executor.map(abs, range(workers)))
+
+        def pickled() -> typing.List[int]:
+            return list(executor.map(_length_pickled, articles, chunksize=chunk_size))
+
+        def send_handles(block: shared_articles.SharedArticleBlock) -> typing.List[int]:
+            batches = [block.handles[start:start + chunk_size] for start in range(0, n_articles, chunk_size)]
+            return list(itertools.chain.from_iterable(executor.map(_length_shared, batches)))
+
+        def create_and_send() -> typing.List[int]:
+            with shared_articles.SharedArticleBlock(articles) as block:
+                return send_handles(block)
+
+        if pickled() != create_and_send():
+            raise AssertionError("the articles read from shared memory differ from the pickled articles")
+
+        with shared_articles.SharedArticleBlock(articles) as block:
+            rows = [
+                ("pickle per article", best_time(pickled)),
+                ("create SharedArticleBlock and send handles", best_time(create_and_send)),
+                ("send handles of an existing block", best_time(lambda: send_handles(block))),
+            ]
+
+    print(f"{n_articles} articles of {format_size(content_size)}, {workers} workers")
+    write_table(
+        ("transport", "time", "articles/s"),
+        [(name, f"{seconds:.4f}s", f"{n_articles / seconds:,.0f}") for name, seconds in rows],
+    )
+
+
+def make_word(rank: int) -> str:
+    """Return a distinct lowercase word for every `rank`, spelled with the letters a to z."""
+    letters = []
+    rank += 1
+    while rank:
+        rank, letter = divmod(rank - 1, 26)
+        letters.append(chr(ord("a") + letter))
+    return "".join(reversed(letters))
+
+
+def make_zipf_texts(
+    n_texts: int, words_per_text: int, vocabulary: int, exponent: float = 1.1, seed: int = 2020
+) -> typing.Iterator[str]:
+    """Generate texts with words drawn from a Zipf distribution, like the words of natural language."""
+    rng = random.Random(seed)
+    words = [make_word(rank) for rank in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(vocabulary)))
+    for _ in range(n_texts):
+        ranks = (bisect.bisect(cumulative, rng.random() * cumulative[-1]) for _ in range(words_per_text))
+        yield " ".join(words[min(rank, vocabulary - 1)] for rank in ranks)
+
+
+def benchmark_sketch(n_articles: int, vocabulary: int, capacities: typing.Sequence[int], top: int) -> None:
+    """
+    Compare the accuracy and memory of a `WordSketch` against counting the words exactly.
+
+    The articles have words drawn from a Zipf distribution over `vocabulary`
+    words. For every capacity, the table shows how many of the `top` most
+    common words the sketch finds, the largest difference between the exact
+    and the estimated count of those words, and the error bound of the sketch.
+    """
+    tokenizer = solution.Article.tokenizer
+    word_counts = [tokenizer.count(text) for text in make_zipf_texts(n_articles, 500, vocabulary)]
+
+    def count_exactly() -> collections.Counter:
+        total = collections.Counter()
+        for counts in word_counts:
+            total.update(counts)
+        return total
+
+    def sketch(capacity: int) -> sketches.WordSketch:
+        result = sketches.WordSketch(capacity)
+        for counts in word_counts:
+            result.add_counts(counts)
+        return result
+
+    exact = count_exactly()
+    expected = dict(exact.most_common(top))
+    rows = [(
+        "exact (Counter)", len(exact), format_size(sum(sys.getsizeof(word) for word in exact) + sys.getsizeof(exact)),
+        f"{top}/{top}", 0, 0, f"{best_time(count_exactly):.4f}s",
+    )]
+    for capacity in capacities:
+        result = sketch(capacity)
+        found = result.most_common_words(top)
+        max_error = max(exact[word] - result.estimate(word).lower for word in expected)
+        rows.append((
+            f"WordSketch({capacity})",
+            len(result),
+            format_size(sum(sys.getsizeof(word) for word in result.counters) + sys.getsizeof(result.counters)),
+            f"{len(found.keys() & expected.keys())}/{top}",
+            max_error,
+            result.error,
+            f"{best_time(lambda: sketch(capacity)):.4f}s",
+        ))
+
+    print(f"{n_articles} articles of 500 words, {len(exact)} distinct words out of a vocabulary of {vocabulary}")
+    write_table(("method", "counters", "memory", f"top {top} found", "max error", "error bound", "time"), rows)
+
+
+def main() -> None:
+    """Parse the command line arguments and run the requested benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    tokenizer_parser = subparsers.add_parser(
+        "tokenizers", help=benchmark_tokenizers.__doc__.splitlines()[0]
+    )
+    tokenizer_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[KB, MB, 100 * MB],
+        help="text sizes in characters (default: 1 KB, 1 MB and 100 MB)",
+    )
+
+    unicode_parser = subparsers.add_parser("unicode", help=benchmark_unicode.__doc__.splitlines()[0])
+    unicode_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[KB, MB, 100 * MB],
+        help="text sizes in characters (default: 1 KB, 1 MB and 100 MB)",
+    )
+
+    index_parser = subparsers.add_parser("index", help=benchmark_index.__doc__.splitlines()[0])
+    index_parser.add_argument(
+        "--articles", type=int, default=10 ** 6, help="number of articles (default: 10^6)"
+    )
+
+    archive_parser = subparsers.add_parser("archive", help=benchmark_archive.__doc__.splitlines()[0])
+    archive_parser.add_argument(
+        "--articles", type=int, default=10 ** 5, help="number of articles (default: 10^5)"
+    )
+    archive_parser.add_argument(
+        "--content-size", type=int, default=KB, help="content size in characters (default: 1 KB)"
+    )
+
+    shared_parser = subparsers.add_parser("shared", help=benchmark_shared.__doc__.strip().splitlines()[0])
+    shared_parser.add_argument(
+        "--articles", type=int, default=10 ** 4, help="number of articles (default: 10^4)"
+    )
+    shared_parser.add_argument(
+        "--content-size", type=int, default=64 * KB, help="content size in characters (default: 64 KB)"
+    )
+    shared_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: all CPUs)"
+    )
+
+    sketch_parser = subparsers.add_parser("sketch", help=benchmark_sketch.__doc__.strip().splitlines()[0])
+    sketch_parser.add_argument(
+        "--articles", type=int, default=10 ** 4, help="number of articles (default: 10^4)"
+    )
+    sketch_parser.add_argument(
+        "--vocabulary", type=int, default=10 ** 6, help="number of distinct words (default: 10^6)"
+    )
+    sketch_parser.add_argument(
+        "--capacities", type=int, nargs="+", default=[100, 1000, 10000],
+        help="capacities of the sketches (default: 100, 1000 and 10000)",
+    )
+    sketch_parser.add_argument("--top", type=int, default=50, help="number of top words to compare (default: 50)")
+
+    args = parser.parse_args()
+    if args.benchmark == "tokenizers":
+        benchmark_tokenizers(args.sizes)
+    elif args.benchmark == "unicode":
+        benchmark_unicode(args.sizes)
+    elif args.benchmark == "index":
+        benchmark_index(args.articles)
+    elif args.benchmark == "archive":
+        benchmark_archive(args.articles, args.content_size)
+    elif args.benchmark == "shared":
+        benchmark_shared(args.articles, args.content_size, args.workers)
+    elif args.benchmark == "sketch":
+        benchmark_sketch(args.articles, args.vocabulary, args.capacities, args.top)
+
+
+if __name__ == "__main__":
+    main()
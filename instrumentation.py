@@ -0,0 +1,272 @@
+"""
+Opt-in instrumentation of the hot paths of `Article` and `ArticleField`.
+
+The instrumented methods are not wrapped until the instrumentation is enabled:
+`Instrumentation.enable` replaces them on their classes with wrappers that
+record every call, and `Instrumentation.disable` puts the original functions
+back. While the instrumentation is disabled, the methods are the plain
+functions defined in `solution.py`, so there's no overhead at all, not even
+a check of a flag.
+
+    >>> instrumentation = Instrumentation()
+    >>> with instrumentation:
+    ...     article.most_common_words(5)
+    >>> instrumentation.snapshot()["most_common_words"].calls
+    1
+"""
+from __future__ import annotations
+
+import collections
+import functools
+import threading
+import time
+import typing
+
+import solution
+
+# A single instrumented call, as passed to the sinks.
+CallEvent = collections.namedtuple("CallEvent", "name seconds size")
+
+# The statistics of an instrumented method. The histogram maps the upper
+# bound of each latency bucket in seconds to the number of calls in it.
+MethodStats = collections.namedtuple(
+    "MethodStats", "calls total_seconds max_seconds histogram total_size max_size"
+)
+
+Sink = typing.Callable[[CallEvent], None]
+
+# The number of power-of-two latency buckets, starting at 1 nanosecond. The
+# last bucket is an overflow bucket with all calls of at least 2 ** 38 ns
+# (about 4.6 minutes), so its upper bound is `float("inf")`.
+HISTOGRAM_BUCKETS = 40
+
+
+def article_size(article: solution.BaseArticle, *args: typing.Any, **kwargs: typing.Any) -> typing.Optional[int]:
+    """Return the length of the content of an article, unless that requires reading a stream."""
+    if isinstance(article._content, solution.ContentStream):
+        return None
+    return len(article)
+
+
+def value_size(field: solution.ArticleField, obj: typing.Any, value: typing.Any) -> typing.Optional[int]:
+    """Return the length of the value assigned to a field, if it has one."""
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def field_count(obj: typing.Any, **values: typing.Any) -> int:
+    """Return the number of fields assigned by a function of a `FieldPlan`."""
+    return len(values)
+
+
+# The instrumented methods: the name used in the statistics, the class and
+# the name of the method, and a function that returns the size of the input
+# from the arguments of a call.
+HOOKS = (
+    ("most_common_words", solution.BaseArticle, "most_common_words", article_size),
+    ("short_introduction", solution.BaseArticle, "short_introduction", article_size),
+    ("ArticleField.__set__", solution.ArticleField, "__set__", value_size),
+)
+
+
+def field_plan_hooks() -> typing.Tuple[typing.Tuple[str, type, str, typing.Callable], ...]:
+    """
+    Return hooks for the functions `FieldPlan` generates for every `FieldRecord` class.
+
+    The constructor and `update` of a `FieldRecord` validate their fields
+    without going through `ArticleField.__set__`. As those functions are
+    generated for every class separately, the hooks can only be collected
+    for the classes that exist at the time.
+    """
+    hooks = []
+    seen = set()
+    pending = [solution.FieldRecord]
+    while pending:
+        cls = pending.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        pending.extend(cls.__subclasses__())
+        for attribute in ("__init__", "update"):
+            if hasattr(vars(cls).get(attribute), "__field_plan__"):
+                hooks.append(("FieldPlan", cls, attribute, field_count))
+
+    return tuple(hooks)
+
+
+class _MethodRecorder:
+    """The mutable statistics of a single instrumented method."""
+
+    __slots__ = ("calls", "total_ns", "max_ns", "buckets", "total_size", "max_size")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard the statistics recorded so far."""
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.total_size = 0
+        self.max_size = 0
+
+    def record(self, elapsed_ns: int, size: typing.Optional[int]) -> None:
+        """Record a call that took `elapsed_ns` nanoseconds."""
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.buckets[min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        if size is not None:
+            self.total_size += size
+            self.max_size = max(self.max_size, size)
+
+    def stats(self) -> MethodStats:
+        """Return an immutable copy of the statistics."""
+        histogram = {
+            # Bucket `i` contains the calls that took less than 2 ** i ns,
+            # except for the last one, which has no upper bound.
+            (2 ** index / 1e9 if index < HISTOGRAM_BUCKETS - 1 else float("inf")): count
+            for index, count in enumerate(self.buckets) if count
+        }
+        return MethodStats(
+            calls=self.calls,
+            total_seconds=self.total_ns / 1e9,
+            max_seconds=self.max_ns / 1e9,
+            histogram=histogram,
+            total_size=self.total_size,
+            max_size=self.max_size,
+        )
+
+
+class Instrumentation:
+    """
+    Records call counts, latency histograms, and input sizes of the hot paths.
+
+    Only one `Instrumentation` can be enabled at a time, as enabling it
+    replaces the methods on the classes themselves. It can be used as a
+    context manager, which enables it for the duration of the block.
+
+    Besides the statistics, every call is passed to the sinks added with
+    `add_sink`, for instance to forward the calls to a metrics system. A
+    sink is called in the thread that made the call, so it should be fast.
+
+    With `field_plans=True`, the constructors and `update` methods of the
+    `FieldRecord` classes are recorded together as "FieldPlan", as they
+    validate fields without calling `ArticleField.__set__`.
+    """
+
+    _enabled: typing.Optional[Instrumentation] = None
+
+    def __init__(
+        self,
+        hooks: typing.Iterable[typing.Tuple[str, type, str, typing.Callable]] = HOOKS,
+        field_plans: bool = True,
+    ) -> None:
+        self.hooks = tuple(hooks)
+        self.field_plans = field_plans
+        self.sinks: typing.List[Sink] = []
+        self._lock = threading.Lock()
+        self._recorders = {name: _MethodRecorder() for name, *_ in self.hooks}
+        if field_plans:
+            self._recorders["FieldPlan"] = _MethodRecorder()
+        self._originals = {}
+
+    def __enter__(self) -> Instrumentation:
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        """Return `True` if this instrumentation is enabled."""
+        return Instrumentation._enabled is self
+
+    def enable(self) -> None:
+        """
+        Replace the instrumented methods with wrappers that record their calls.
+
+        The `FieldRecord` classes are collected when the instrumentation is
+        enabled; classes that are created while it's enabled aren't recorded
+        until it's enabled again.
+        """
+        if self.enabled:
+            return
+        if Instrumentation._enabled is not None:
+            raise RuntimeError("another Instrumentation is already enabled.")
+
+        hooks = (self.hooks + field_plan_hooks()) if self.field_plans else self.hooks
+        try:
+            for name, owner, attribute, size in hooks:
+                original = owner.__dict__[attribute]
+                self._originals[owner, attribute] = original
+                setattr(owner, attribute, self._wrap(name, original, size))
+        except BaseException:
+            # Restore the methods that were already replaced, as `disable`
+            # doesn't do anything for an instrumentation that isn't enabled.
+            self._restore()
+            raise
+
+        Instrumentation._enabled = self
+
+    def disable(self) -> None:
+        """Restore the original methods."""
+        if not self.enabled:
+            return
+
+        self._restore()
+        Instrumentation._enabled = None
+
+    def _restore(self) -> None:
+        """Put back the original methods of the replaced methods."""
+        for (owner, attribute), original in self._originals.items():
+            setattr(owner, attribute, original)
+
+        self._originals.clear()
+
+    def _wrap(self, name: str, method: typing.Callable, size: typing.Callable) -> typing.Callable:
+        """Return a wrapper of `method` that records its calls under `name`."""
+        recorder = self._recorders[name]
+        lock = self._lock
+        sinks = self.sinks
+        perf_counter_ns = time.perf_counter_ns
+
+        @functools.wraps(method)
+        def instrumented(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                input_size = size(*args, **kwargs)
+                with lock:
+                    recorder.record(elapsed, input_size)
+                if sinks:
+                    event = CallEvent(name, elapsed / 1e9, input_size)
+                    for sink in sinks:
+                        sink(event)
+
+        return instrumented
+
+    def add_sink(self, sink: Sink) -> None:
+        """Add a callback that receives a `CallEvent` for every instrumented call."""
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: Sink) -> None:
+        """Remove a callback added with `add_sink`."""
+        self.sinks.remove(sink)
+
+    def snapshot(self) -> typing.Dict[str, MethodStats]:
+        """Return the statistics of every instrumented method recorded so far."""
+        with self._lock:
+            return {name: recorder.stats() for name, recorder in self._recorders.items()}
+
+    def reset(self) -> None:
+        """Discard the statistics recorded so far."""
+        with self._lock:
+            for recorder in self._recorders.values():
+                recorder.reset()
@@ -0,0 +1,159 @@
+"""
+An asyncio pipeline stage that turns raw records into articles with precomputed stats.
+
+Fetching articles from a feed is I/O-bound, while counting their words is
+CPU-bound. `ingest` overlaps the two: it keeps reading records from an async
+source while the words of earlier records are counted in an executor, but it
+never has more than `max_concurrency` records in flight. When the consumer
+of the pipeline falls behind, the pipeline stops reading from the source
+instead of buffering an unbounded number of records.
+"""
+from __future__ import annotations
+
+import array
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import typing
+
+import solution
+import tokenizers
+
+# The result of ingesting a single record.
+IngestedArticle = collections.namedtuple("IngestedArticle", "article short_introduction most_common_words")
+
+Record = typing.Mapping[str, typing.Any]
+ArticleFactory = typing.Callable[[Record], solution.BaseArticle]
+
+
+def build_article(record: Record) -> solution.Article:
+    """
+    Create an `Article` from a raw record.
+
+    The record has to contain a title, author, and content. The publication
+    date may be a `datetime.datetime` or an ISO 8601 string, as is common in
+    JSON feeds.
+    """
+    publication_date = record["publication_date"]
+    if isinstance(publication_date, str):
+        publication_date = datetime.datetime.fromisoformat(publication_date)
+
+    return solution.Article(
+        title=record["title"],
+        author=record["author"],
+        publication_date=publication_date,
+        content=record["content"],
+    )
+
+
+def compute_stats(
+    tokenizer: tokenizers.Tokenizer, content: str
+) -> typing.Tuple[collections.Counter, array.array]:
+    """
+    Count the words of `content` and index the positions of its separators.
+
+    This is the CPU-bound part of ingesting an article. It only receives the
+    tokenizer and the content rather than the article itself, so that it can
+    also run in a `concurrent.futures.ProcessPoolExecutor` without pickling
+    the entire article.
+    """
+    return tokenizer.count(content), solution.find_breaks(content)
+
+
+async def ingest(
+    records: typing.AsyncIterable[Record],
+    *,
+    build: ArticleFactory = build_article,
+    executor: typing.Optional[concurrent.futures.Executor] = None,
+    max_concurrency: int = 8,
+    introduction_length: int = 200,
+    n_words: int = 10,
+) -> typing.AsyncIterator[IngestedArticle]:
+    """
+    Turn the raw `records` into articles with precomputed stats, in order.
+
+    Each record is turned into an article with `build`, after which its words
+    are counted and its separators indexed in the `executor` (the default
+    executor of the event loop if `None`). The results are stored in the
+    caches of the article, so calling `most_common_words` or
+    `short_introduction` on the article afterwards doesn't count again.
+
+    At most `max_concurrency` records are processed at the same time. The
+    articles are yielded in the order of the records; if the consumer stops
+    iterating, or a record fails to be processed, the records that are still
+    in flight are cancelled and the exception is propagated.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    loop = asyncio.get_running_loop()
+
+    async def process(record: Record) -> IngestedArticle:
+        article = build(record)
+        word_counts, breaks = await loop.run_in_executor(
+            executor, compute_stats, article.tokenizer, article.content
+        )
+        article.word_counts(word_counts)
+        article.break_index(breaks)
+        return IngestedArticle(
+            article=article,
+            short_introduction=article.short_introduction(introduction_length),
+            most_common_words=article.most_common_words(n_words),
+        )
+
+    # The semaphore limits the number of records that have been read from
+    # the source but not yet handed to the consumer. The producer acquires
+    # a slot before it reads the next record, so when all slots are taken it
+    # stops reading from the source until the consumer catches up. The queue
+    # holds the tasks of the records in flight in the order of the records,
+    # followed by a `None` that marks the end of the records.
+    slots = asyncio.Semaphore(max_concurrency)
+    in_flight: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        iterator = records.__aiter__()
+        while True:
+            await slots.acquire()
+            try:
+                record = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            in_flight.put_nowait(asyncio.ensure_future(process(record)))
+        in_flight.put_nowait(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            if producer.done():
+                # Re-raise the exception of the source, if there was one.
+                producer.result()
+                task = in_flight.get_nowait()
+            else:
+                # Wait for the producer as well, so an exception raised by
+                # the source isn't stuck behind an empty queue.
+                get = asyncio.ensure_future(in_flight.get())
+                await asyncio.wait((get, producer), return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    continue
+                task = get.result()
+
+            if task is None:
+                break
+
+            result = await task
+            slots.release()
+            yield result
+    finally:
+        pending = [producer]
+        while not in_flight.empty():
+            task = in_flight.get_nowait()
+            if task is not None:
+                pending.append(task)
+
+        # Give the cancelled tasks a chance to finish before the event loop
+        # moves on, so they don't outlive the pipeline.
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import argparse
 import collections
+import concurrent.futures
 import datetime
+import importlib
 import io
+import itertools
+import json
 import math
+import os
 import sys
 import textwrap
+import time
 import timeit
 import traceback
 import types
@@ -21,10 +28,25 @@ class SkippedTest(Exception):
 
 
 class QualifierTestRunner:
-    """Test runner for our code jam qualifier test suite."""
+    """
+    Test runner for our code jam qualifier test suite.
 
-    def __init__(self) -> None:
+    With more than one worker, the test classes are spread across worker
+    processes. Each worker writes the report of its test class to a buffer,
+    and the buffers are written in the original order of the test classes,
+    so the report looks the same as that of a serial run.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        slowest: int = 10,
+        timings_path: typing.Optional[str] = None,
+    ) -> None:
         self.stream = StreamWrapper(sys.stderr, max_width=CONSOLE_WIDTH)
+        self.workers = workers
+        self.slowest = slowest
+        self.timings_path = timings_path
 
     def write_header(self) -> None:
         """Write a header for this test run."""
@@ -42,24 +64,65 @@ class QualifierTestRunner:
         self.stream.writeln(f"Test Suite Summary")
         self.stream.write_separator("-")
         if hasattr(result, "results"):
+            section_times = result.section_times()
             self.stream.write(
-                f"{' '*50} PASSED   FAILED   TOTAL   RESULT"
+                f"{' '*50} PASSED   FAILED   TOTAL   RESULT      TIME"
                 "\n"
             )
             for section, section_results in result.results.items():
+                section_time = section_times.get(section, 0.0)
                 section = textwrap.shorten(section, width=50, placeholder="...")
                 total = len(section_results)
                 passed = sum(test_result for test_result in section_results.values())
                 failed = total - passed
-                result = "FAIL" if failed else "PASS"
+                verdict = "FAIL" if failed else "PASS"
                 self.stream.write(
-                    f"{section:<50}  {passed:^6}   {failed:^6}  {total:^5}    {result}\n"
+                    f"{section:<50}  {passed:^6}   {failed:^6}  {total:^5}    {verdict}  {section_time:>8.3f}s\n"
                 )
 
+            if self.slowest and result.timings:
+                self.write_slowest(result)
+
         self.stream.write_separator("=")
         self.stream.writeln(f"Total running time: {duration:.3f}s")
 
-    def run(self, test: unittest.TestSuite) -> None:
+    def write_slowest(self, result: QualifierTestResult) -> None:
+        """Write a table of the tests and subtests with the longest wall-clock times."""
+        # A test with a single subtest takes about as long as the subtest,
+        # so only the subtest is listed.
+        subtests = collections.Counter(
+            (timing.section, timing.test) for timing in result.timings if timing.subtest is not None
+        )
+        timings = [
+            timing for timing in result.timings
+            if timing.subtest is not None or subtests[timing.section, timing.test] != 1
+        ]
+        slowest = sorted(timings, key=lambda timing: timing.wall, reverse=True)[:self.slowest]
+
+        self.stream.write_separator("=")
+        self.stream.writeln(f"Slowest {len(slowest)} tests and subtests")
+        self.stream.write_separator("-")
+        self.stream.writeln(f"{'WALL':>9}  {'CPU':>9}  TEST")
+        for timing in slowest:
+            # Shorten the description of the test method rather than cutting
+            # off the parameters of the subtest at the end.
+            subtest = "" if timing.subtest is None else " " + shorten_subtest(timing.subtest, width=40)
+            width = max(self.stream.max_width - 22 - len(subtest), 20)
+            description = textwrap.shorten(timing.test, width=width, placeholder="...") + subtest
+            self.stream.writeln(f"{timing.wall:>8.3f}s  {timing.cpu:>8.3f}s  {description}")
+
+    def write_timings(self, result: QualifierTestResult, duration: float) -> None:
+        """Write the timings of all tests and subtests to a JSON file at `timings_path`."""
+        report = {
+            "date": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "duration": duration,
+            "sections": result.section_times(),
+            "tests": [timing._asdict() for timing in result.timings],
+        }
+        with open(self.timings_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    def run(self, test: unittest.TestSuite) -> QualifierTestResult:
         """Run a test suite containing `unittest.TestCase` tests."""
         result = QualifierTestResult(self.stream)
         self.write_header()
@@ -67,17 +130,158 @@ class QualifierTestRunner:
         # Record the start time
         start = timeit.default_timer()
 
-        # Pass the TestResult instance to the test suite to run the tests
-        test(result)
+        if self.workers > 1:
+            self.run_parallel(test, result)
+        else:
+            # Pass the TestResult instance to the test suite to run the tests
+            test(result)
 
         # Record the end time
         duration = timeit.default_timer() - start
 
         self.write_footer(result, duration)
+        if self.timings_path:
+            self.write_timings(result, duration)
+
+        return result
+
+    def run_parallel(self, test: unittest.TestSuite, result: QualifierTestResult) -> None:
+        """Run the test classes in `test` in worker processes and merge their results into `result`."""
+        groups = group_by_test_class(test)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(run_test_class, TestClassSpec(
+                    type(tests[0]).__module__, type(tests[0]).__qualname__, [t._testMethodName for t in tests]
+                ))
+                if is_importable(tests[0]) else None
+                for tests in groups
+            ]
+
+            # The outcomes are merged in the order of the test classes,
+            # regardless of the order in which the workers finish them.
+            for tests, future in zip(groups, futures):
+                if future is None:
+                    # Tests that a worker can't import, like the placeholders
+                    # for tests that failed to load, are run in this process.
+                    unittest.TestSuite(tests)(result)
+                    continue
+
+                outcome = future.result()
+                self.stream.write(outcome.output)
+                result.merge(outcome, tests)
+
+
+TestClassSpec = collections.namedtuple("TestClassSpec", "module qualname test_names")
+# The failures, errors, and skipped tests are lists of (test id, formatted
+# traceback or reason) pairs, as test cases can't be sent back by the worker.
+TestClassOutcome = collections.namedtuple(
+    "TestClassOutcome", "output results timings testsRun failures errors skipped"
+)
+
+
+def shorten_subtest(description: str, width: int) -> str:
+    """
+    Shorten the description of a subtest, like `[message] (name=value)`, to at most `width` characters.
+
+    The message is shortened first and the parameters in parentheses are kept
+    whole if they fit, as cutting them off halfway leaves an unbalanced
+    parenthesis. If they don't fit, they are replaced by `(...)`.
+    """
+    if len(description) <= width:
+        return description
+
+    message, params = "", description
+    if description.startswith("[") and "] (" in description:
+        split = description.rindex("] (") + 1
+        message, params = description[:split], description[split + 1:]
+    elif description.startswith("["):
+        message, params = description, ""
+
+    if len(params) > width:
+        params = "(...)"
+    if not message:
+        return params
+
+    # The message and the parameters are separated by a space.
+    room = width - len(params) - 1 if params else width
+    if room < len("[...]"):
+        return params
+    if len(message) > room:
+        message = message[:room - len("...]")].rstrip() + "...]"
+    return f"{message} {params}" if params else message
+
+
+def group_by_test_class(test: unittest.TestSuite) -> typing.List[typing.List[unittest.TestCase]]:
+    """
+    Flatten `test` into lists of consecutive tests that belong to the same test class.
+
+    Entries of the suite that aren't test cases are grouped by their type.
+    """
+    def iter_tests(suite: unittest.TestSuite) -> typing.Iterator[unittest.TestCase]:
+        for item in suite:
+            if isinstance(item, unittest.TestSuite):
+                yield from iter_tests(item)
+            else:
+                yield item
+
+    return [list(tests) for _, tests in itertools.groupby(iter_tests(test), key=type)]
+
+
+def resolve_test_class(module: str, qualname: str) -> type:
+    """Import the test class with the qualified name `qualname` from `module`."""
+    test_class = importlib.import_module(module)
+    for name in qualname.split("."):
+        test_class = getattr(test_class, name)
+    return test_class
+
+
+def is_importable(test: typing.Any) -> bool:
+    """Return `True` if `test` is a test case whose class a worker process can import."""
+    if not isinstance(test, unittest.TestCase):
+        return False
+
+    test_class = type(test)
+    try:
+        return resolve_test_class(test_class.__module__, test_class.__qualname__) is test_class
+    except (ImportError, AttributeError):
+        return False
+
+
+def run_test_class(spec: TestClassSpec) -> TestClassOutcome:
+    """
+    Run the tests of a single test class in a worker process.
+
+    Only the names of the test class and methods are sent to the worker, as
+    test cases can't be pickled. The report is written to a buffer, which is
+    returned with the results, since the worker can't write to the console
+    without interleaving its output with that of the other workers.
+    """
+    test_class = resolve_test_class(spec.module, spec.qualname)
+
+    buffer = io.StringIO()
+    result = QualifierTestResult(StreamWrapper(buffer, max_width=CONSOLE_WIDTH))
+    unittest.TestSuite(test_class(name) for name in spec.test_names)(result)
+
+    return TestClassOutcome(
+        output=buffer.getvalue(),
+        results=result.results,
+        timings=result.timings,
+        testsRun=result.testsRun,
+        failures=[(test_id(test), text) for test, text in result.failures],
+        errors=[(test_id(test), text) for test, text in result.errors],
+        skipped=[(test_id(test), text) for test, text in result.skipped],
+    )
+
+
+def test_id(test: unittest.TestCase) -> str:
+    """Return the id of a test, or of the test method of a subtest."""
+    return getattr(test, "test_case", test).id()
 
 
 TestOutcome = typing.Tuple[typing.Type[BaseException], BaseException, types.TracebackType]
 TestClass = collections.namedtuple("TestClass", "type name")
+# The wall-clock and CPU time of a test method, or of one of its subtests.
+TestTiming = collections.namedtuple("TestTiming", "section test subtest wall cpu")
 
 
 class StreamWrapper:
@@ -167,6 +371,13 @@ class QualifierTestResult(unittest.TestResult):
         self.failure_output = None
         self._success = None
 
+        # The timings are recorded as (wall-clock, CPU) pairs of timestamps.
+        # Subtests don't have a start event, so a subtest is timed from the
+        # end of the previous subtest or the end of `setUp`.
+        self.timings = []
+        self._test_started = None
+        self._subtest_started = None
+
     @staticmethod
     def get_description(callable_object: typing.Callable) -> str:
         """Extract a description from the callable by looking at the docstring."""
@@ -182,7 +393,8 @@ class QualifierTestResult(unittest.TestResult):
         self.current_testclass = TestClass(type=type(test), name=test_section)
 
         self.stream.write_section_header(test_section)
-        self.results[test_section] = {}
+        # Test classes with the same description share a section.
+        self.results.setdefault(test_section, {})
 
     def startTest(self, test: unittest.TestCase) -> None:
         """Prepare the test phase of an individual test method."""
@@ -192,16 +404,107 @@ class QualifierTestResult(unittest.TestResult):
             self.switch_testclass(test)
 
         self.failure_output = []
+        self._test_started = self._subtest_started = self.timestamp()
+
+        # The first subtest is timed from the end of `setUp` rather than the
+        # start of the test, so the fixture isn't counted as part of it.
+        set_up = test.setUp
+
+        def timed_set_up() -> None:
+            set_up()
+            self._subtest_started = self.timestamp()
+
+        test.setUp = timed_set_up
+
+    @staticmethod
+    def timestamp() -> typing.Tuple[float, float]:
+        """Return the current wall-clock and CPU time."""
+        return timeit.default_timer(), time.process_time()
+
+    def record_timing(
+        self,
+        test: unittest.TestCase,
+        subtest: typing.Optional[str],
+        started: typing.Tuple[float, float],
+    ) -> typing.Tuple[float, float]:
+        """Record the time elapsed since `started` for a test or subtest and return the current time."""
+        now = self.timestamp()
+        self.timings.append(TestTiming(
+            section=self.current_testclass.name,
+            test=test.shortDescription().rstrip(".!?"),
+            subtest=subtest,
+            wall=now[0] - started[0],
+            cpu=now[1] - started[1],
+        ))
+        return now
+
+    def section_times(self) -> typing.Dict[str, float]:
+        """Return the total wall-clock time of the test methods in each section."""
+        section_times = collections.defaultdict(float)
+        for timing in self.timings:
+            if timing.subtest is None:
+                section_times[timing.section] += timing.wall
+        return dict(section_times)
 
     def stopTest(self, test: unittest.TestCase) -> None:
         """Finalize the test phase of an individual test method."""
+        self.record_timing(test, None, self._test_started)
+        # Remove the wrapper around `setUp` that `startTest` installed.
+        vars(test).pop("setUp", None)
         test_description = test.shortDescription().rstrip(".!?")
         self.results[self.current_testclass.name][test_description] = not self.failure_output
         self.stream.write_test_outcome(test_description, self.failure_output)
 
+    def merge(self, outcome: TestClassOutcome, tests: typing.Sequence[unittest.TestCase]) -> None:
+        """
+        Merge the outcome of a test class that was run in a worker process.
+
+        The worker sends back the ids of the tests with their formatted
+        tracebacks, which are paired with the `tests` of this process again.
+        A failing subtest is recorded for its test method, as the subtest
+        itself only exists in the worker. An error in a fixture of the class,
+        like `setUpClass`, is recorded for a placeholder, just like `unittest`
+        does in a serial run.
+        """
+        tests_by_id = {test.id(): test for test in tests}
+
+        def restore(pairs: typing.List[typing.Tuple[str, str]]) -> typing.List[typing.Tuple[unittest.TestCase, str]]:
+            return [
+                (tests_by_id[test_id] if test_id in tests_by_id else unittest.suite._ErrorHolder(test_id), text)
+                for test_id, text in pairs
+            ]
+
+        # Test classes in different workers can share a section.
+        for section, results in outcome.results.items():
+            self.results.setdefault(section, {}).update(results)
+        self.timings.extend(outcome.timings)
+        self.testsRun += outcome.testsRun
+        self.failures.extend(restore(outcome.failures))
+        self.errors.extend(restore(outcome.errors))
+        self.skipped.extend(restore(outcome.skipped))
+
     def addError(self, test, err):
+        if not isinstance(test, unittest.TestCase):
+            self.addFixtureError(test, err)
+            return
         self.failure_output.append((test, err))
 
+    def addFixtureError(self, fixture: typing.Any, err: TestOutcome) -> None:
+        """
+        Report an error in a class or module fixture, like `setUpClass`.
+
+        The error isn't raised by a test method, so `unittest` reports it for
+        a placeholder that describes the fixture instead. It's written as a
+        failing entry in a section of its own, as it doesn't belong to the
+        section of any test method.
+        """
+        super().addError(fixture, err)
+        description = fixture.description
+        self.current_testclass = TestClass(None, None)
+        self.stream.write_section_header(description)
+        self.results[description] = {description: False}
+        self.stream.write_test_outcome(description, [(fixture, err)])
+
     def addFailure(self, test, err):
         super().addFailure(test, err)
         self.failure_output.append((test, err))
@@ -212,15 +515,61 @@ class QualifierTestResult(unittest.TestResult):
     def addSubTest(self, test, subtest, outcome):
         """Process the result of a subTest."""
         super().addSubTest(test, subtest, outcome)
+        self._subtest_started = self.record_timing(test, subtest._subDescription(), self._subtest_started)
         if outcome:
             self.failure_output.append((subtest, outcome))
 
 
 def main() -> None:
     """Run an ascii-based test suite."""
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument(
+        "tests", nargs="*",
+        help="names of the test modules, classes, or methods to run (default: test_qualifier)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, metavar="N",
+        help="run the test classes in N worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--slowest", type=int, default=10, metavar="N",
+        help="list the N slowest tests and subtests in the summary (default: 10, 0 to disable)",
+    )
+    parser.add_argument(
+        "--timings", metavar="FILE",
+        help="write the wall-clock and CPU time of every test and subtest to FILE as JSON",
+    )
+    benchmark_group = parser.add_argument_group("benchmarks")
+    benchmark_group.add_argument(
+        "--benchmark", action="store_true",
+        help="run the scaling benchmarks in benchmark_suite.py instead of the tests",
+    )
+    benchmark_group.add_argument(
+        "--baseline", metavar="FILE", help="the baseline file (default: benchmark_baseline.json)",
+    )
+    benchmark_group.add_argument(
+        "--update-baseline", action="store_true", help="record the measurements as the new baseline",
+    )
+    benchmark_group.add_argument(
+        "--threshold", type=float,
+        help="the slowdown against the baseline that fails a benchmark (default: 0.5, i.e. 50%% slower)",
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        # The benchmark suite reads its settings from the environment, which
+        # is inherited by the worker processes as well.
+        if args.baseline:
+            os.environ["ARTICLE_BENCHMARK_BASELINE"] = args.baseline
+        if args.threshold is not None:
+            os.environ["ARTICLE_BENCHMARK_THRESHOLD"] = str(args.threshold)
+        if args.update_baseline:
+            os.environ["ARTICLE_BENCHMARK_UPDATE_BASELINE"] = "1"
+        args.tests = args.tests or ["benchmark_suite"]
+
     test_loader = unittest.TestLoader()
-    test_suite = test_loader.loadTestsFromName("test_qualifier")
-    runner = QualifierTestRunner()
+    test_suite = test_loader.loadTestsFromNames(args.tests or ["test_qualifier"])
+    runner = QualifierTestRunner(workers=args.workers, slowest=args.slowest, timings_path=args.timings)
     runner.run(test_suite)
 
 
@@ -0,0 +1,231 @@
+"""
+Transfer articles to `multiprocessing` workers through shared memory.
+
+Passing an `Article` to a worker process pickles the entire content, which is
+copied into the pipe to the worker and copied again when it's unpickled. With
+a `SharedArticleBlock`, the contents of the articles are encoded once into a
+single `multiprocessing.shared_memory` block, and the workers receive a small
+`SharedArticleHandle` per article instead. A `SharedArticleReader` in the
+worker attaches to the block and turns the handles back into articles whose
+content is a `ContentStream` over the shared memory, so the content is never
+copied as a whole:
+
+    >>> with SharedArticleBlock(articles) as block:
+    ...     results = list(executor.map(count_words, block.handles))
+
+    >>> def count_words(handle):
+    ...     with SharedArticleReader() as reader:
+    ...         return reader.article(handle).most_common_words(5)
+
+Both ends have an explicit lifecycle. The block is owned by the process that
+created it, which unlinks it when the `with` block is exited, after all
+workers are done with it. A reader keeps the blocks it attached to open until
+it's closed; the articles it created can't read their content afterwards.
+"""
+from __future__ import annotations
+
+import collections
+import os
+import sys
+import typing
+from multiprocessing import resource_tracker, shared_memory
+
+import solution
+
+# A picklable reference to an article in a `SharedArticleBlock`: the name of
+# the block, the offset and length in bytes of the encoded content in it and
+# its encoding, the number of characters in the content, and the other fields
+# of the article.
+SharedArticleHandle = collections.namedtuple(
+    "SharedArticleHandle",
+    "block offset length encoding characters id title author publication_date last_edited",
+)
+
+ArticleType = typing.TypeVar("ArticleType", bound=solution.BaseArticle)
+
+# Before Python 3.13, attaching to a block registers it with the resource
+# tracker, so readers have to unregister it again (see `_attach`).
+_UNREGISTER_ATTACHED = sys.version_info < (3, 13) and os.name == "posix"
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing block and keep the resource tracker from unlinking it.
+
+    Before Python 3.13, attaching to a block registers it with the resource
+    tracker of the attaching process as if that process owned it. A worker
+    that was started before the block was created has a resource tracker of
+    its own, which unlinks the block when the worker exits, even though the
+    process that created the block may still be using it (CPython issue
+    gh-82300). The usual workaround is to unregister the block right after
+    attaching; Python 3.13 added `track=False` to prevent the registration.
+
+    Workers that share the resource tracker of the creator, like those that
+    are spawned or forked after the block was created, unregister the block
+    of the creator as well, which is why `SharedArticleBlock.unlink`
+    registers it again before unlinking it.
+    """
+    if sys.version_info >= (3, 13):  # pragma: no cover - depends on the version of Python
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    memory = shared_memory.SharedMemory(name=name)
+    if _UNREGISTER_ATTACHED:
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+class SharedArticleBlock:
+    """
+    A shared memory block with the contents of a number of articles.
+
+    The contents are encoded with `encoding` and stored one after another in
+    a single block, and `handles` contains a `SharedArticleHandle` for every
+    article, in the same order as `articles`. The articles themselves aren't
+    changed; later edits to them aren't reflected in the block.
+
+    The block can be used as a context manager, which closes and unlinks the
+    block when the `with` block is exited. Otherwise, `close` and `unlink`
+    have to be called explicitly, or the block stays around until the
+    `multiprocessing` resource tracker cleans it up when the program exits.
+    """
+
+    def __init__(self, articles: typing.Iterable[solution.BaseArticle], encoding: str = "utf-8"):
+        self.encoding = encoding
+
+        contents = []
+        fields = []
+        for article in articles:
+            content = article.content
+            contents.append(content.encode(encoding))
+            fields.append((len(content), article.id, article.title, article.author,
+                           article.publication_date, article.last_edited))
+
+        # A block can't be empty, even if there's no content to put in it.
+        size = sum(len(content) for content in contents)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.name = self.memory.name
+        self.handles: typing.List[SharedArticleHandle] = []
+
+        buffer = self.memory.buf
+        offset = 0
+        for content, (characters, *metadata) in zip(contents, fields):
+            buffer[offset:offset + len(content)] = content
+            self.handles.append(SharedArticleHandle(self.name, offset, len(content), encoding, characters, *metadata))
+            offset += len(content)
+
+        self.size = offset
+        self.closed = False
+        self.unlinked = False
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the block."""
+        return f"<{self.__class__.__name__} name={self.name!r} articles={len(self.handles)} size={self.size}>"
+
+    def __enter__(self) -> SharedArticleBlock:
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+        self.unlink()
+
+    def __len__(self) -> int:
+        """Return the number of articles in the block."""
+        return len(self.handles)
+
+    def close(self) -> None:
+        """Close the block in this process; the workers can still use it until it's unlinked."""
+        if not self.closed:
+            self.memory.close()
+            self.closed = True
+
+    def unlink(self) -> None:
+        """
+        Destroy the block, once all processes have closed it.
+
+        Only the process that created the block should unlink it. Handles of
+        the block can't be opened by new readers afterwards.
+        """
+        if not self.unlinked:
+            if _UNREGISTER_ATTACHED:
+                # Unlinking unregisters the block, which fails if a reader
+                # that shares the resource tracker already unregistered it.
+                resource_tracker.register(self.memory._name, "shared_memory")
+            self.memory.unlink()
+            self.unlinked = True
+
+
+class SharedArticleReader:
+    """
+    Turns `SharedArticleHandle` objects back into articles in a worker process.
+
+    The reader attaches to a block the first time it opens a handle of that
+    block and keeps it attached until the reader is closed, so opening many
+    handles of the same block only attaches once. The content of an article
+    opened by the reader is a `ContentStream` over the shared memory:
+    `len()` doesn't read it at all, and `short_introduction` and
+    `most_common_words` decode it in chunks without copying it as a whole.
+
+    Closing the reader releases the shared memory, after which the articles it
+    opened can no longer read their content (but their cached word counts and
+    other fields remain available). Read `article.content` before closing the
+    reader to keep a copy of the content.
+    """
+
+    def __init__(self) -> None:
+        self._blocks: typing.Dict[str, shared_memory.SharedMemory] = {}
+        # The views of the contents handed out to articles. They are released
+        # before the blocks are closed, as a block can't be closed while
+        # there are views of its memory.
+        self._views: typing.List[memoryview] = []
+        self.closed = False
+
+    def __enter__(self) -> SharedArticleReader:
+        return self
+
+    def __exit__(self, *exc_info: typing.Any) -> None:
+        self.close()
+
+    def _attach(self, name: str) -> shared_memory.SharedMemory:
+        """Return the block with the given name, attaching to it if needed."""
+        if self.closed:
+            raise ValueError("the reader is closed")
+
+        block = self._blocks.get(name)
+        if block is None:
+            block = self._blocks[name] = _attach(name)
+
+        return block
+
+    def content(self, handle: SharedArticleHandle) -> solution.ContentStream:
+        """Return a `ContentStream` over the content of the article in shared memory."""
+        block = self._attach(handle.block)
+        view = block.buf[handle.offset:handle.offset + handle.length]
+        self._views.append(view)
+        return solution.ContentStream(view, encoding=handle.encoding, characters=handle.characters)
+
+    def article(
+        self,
+        handle: SharedArticleHandle,
+        cls: typing.Type[ArticleType] = solution.Article,
+    ) -> ArticleType:
+        """Create an article of type `cls` from a handle, with its content in shared memory."""
+        article = cls(
+            title=handle.title,
+            author=handle.author,
+            publication_date=handle.publication_date,
+            content=self.content(handle),
+            id=handle.id,
+        )
+        article.last_edited = handle.last_edited
+        return article
+
+    def close(self) -> None:
+        """Release the contents handed out to articles and detach from all blocks."""
+        for view in self._views:
+            view.release()
+        self._views.clear()
+
+        for block in self._blocks.values():
+            block.close()
+        self._blocks.clear()
+        self.closed = True
@@ -0,0 +1,183 @@
+"""
+Approximate word frequencies of a stream of articles in bounded memory.
+
+Counting the words of an entire corpus exactly, like `ArticleCorpus` does,
+needs a counter for every distinct word in the corpus, which grows without
+bound as more articles stream in. A `WordSketch` keeps at most a fixed number
+of counters instead and still finds the most common words, with a guaranteed
+bound on the error of their counts:
+
+    >>> sketch = WordSketch(capacity=1024)
+    >>> for article in articles:
+    ...     sketch.add_article(article)
+    >>> sketch.most_common_words(10)
+
+Sketches of different shards of a corpus can be merged, for instance after
+counting the shards in separate processes, and the merged sketch has the same
+error bound as a single sketch of the whole corpus.
+"""
+from __future__ import annotations
+
+import collections
+import heapq
+import typing
+
+import solution
+import tokenizers
+
+# The bounds on the number of occurrences of a word in the sketched text.
+WordEstimate = collections.namedtuple("WordEstimate", "lower upper")
+
+
+class WordSketch:
+    """
+    A mergeable summary of the most frequent words in a stream of texts.
+
+    The sketch is a Misra-Gries summary, the counterpart of the Space-Saving
+    algorithm that reports lower instead of upper bounds. It keeps a counter
+    for at most `capacity` words. When more words need a counter, the
+    `capacity + 1`-th largest count is subtracted from every counter, and
+    the counters that drop to zero are discarded. To make that reduction
+    cheap, the counters of new words are collected until there are twice
+    `capacity` of them, so the sketch holds at most `2 * capacity` counters
+    (call `compact` to reduce it to `capacity` right away).
+
+    Every reduction subtracts the same amount from at least `capacity + 1`
+    counters, which is why the total amount subtracted, `error`, is at most
+    `(total - sum of the counters) / (capacity + 1)`. For every word:
+
+        estimate(word).lower <= true count <= estimate(word).lower + error
+
+    so any word that occurs more than `total / (capacity + 1)` times is
+    guaranteed to have a counter, and `most_common_words` is exact as long as
+    the counts of the words differ by more than `error`. With a `capacity` at
+    least as large as the number of distinct words, the counts are exact.
+
+    Words are counted with `tokenizer`, which defaults to the tokenizer of
+    `Article`, so the words match those of `Article.most_common_words`. Like
+    `most_common_words`, ties are broken by the order in which the words were
+    first counted by the sketch.
+    """
+
+    def __init__(self, capacity: int = 1024, tokenizer: typing.Optional[tokenizers.Tokenizer] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.tokenizer = tokenizer if tokenizer is not None else solution.Article.tokenizer
+
+        self.counters: typing.Dict[str, int] = {}
+        self.total = 0
+        self.error = 0
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the sketch."""
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} capacity={self.capacity} counters={len(self)} total={self.total} error={self.error}>"
+
+    def __len__(self) -> int:
+        """Return the number of counters in the sketch."""
+        return len(self.counters)
+
+    def add(self, text: str) -> None:
+        """Count the words in `text`."""
+        self.add_counts(self.tokenizer.count(text))
+
+    def add_article(self, article: solution.BaseArticle) -> None:
+        """
+        Count the words in the content of an article.
+
+        The words are taken from `article.word_counts()`, so an article whose
+        words have already been counted isn't counted again. The article has
+        to use the same kind of tokenizer as the sketch.
+        """
+        self._check_tokenizer(article.tokenizer, "an article")
+        self.add_counts(article.word_counts())
+
+    def _check_tokenizer(self, tokenizer: tokenizers.Tokenizer, source: str) -> None:
+        """Raise a `ValueError` if words counted by `tokenizer` can't be added to the sketch."""
+        if type(tokenizer) is not type(self.tokenizer):
+            raise ValueError(
+                f"can't add {source} with tokenizer {tokenizer!r} to a sketch "
+                f"with tokenizer {self.tokenizer!r}."
+            )
+
+    def add_counts(self, word_counts: typing.Mapping[str, int]) -> None:
+        """Add the occurrences of the words in `word_counts`, such as the result of `Tokenizer.count`."""
+        counters = self.counters
+        get = counters.get
+        added = 0
+        for word, count in word_counts.items():
+            counters[word] = get(word, 0) + count
+            added += count
+
+        self.total += added
+        if len(counters) > 2 * self.capacity:
+            self.compact()
+
+    def compact(self) -> None:
+        """Reduce the number of counters to at most `capacity`."""
+        if len(self.counters) <= self.capacity:
+            return
+
+        # The `capacity + 1`-th largest count. After subtracting it, at most
+        # `capacity` counters are still positive.
+        decrement = heapq.nlargest(self.capacity + 1, self.counters.values())[-1]
+        self.counters = {word: count - decrement for word, count in self.counters.items() if count > decrement}
+        self.error += decrement
+
+    def merge(self, other: WordSketch) -> WordSketch:
+        """
+        Add the counts of another sketch to this sketch and return this sketch.
+
+        The errors of the sketches add up, as do their totals, so the bound
+        on the error holds for the merged sketch as well. The bound depends on
+        the capacity, so both sketches have to have the same capacity, and
+        they have to use the same kind of tokenizer.
+        """
+        self._check_tokenizer(other.tokenizer, "a sketch")
+        if other.capacity != self.capacity:
+            raise ValueError(
+                f"can't merge a sketch with capacity {other.capacity} into a sketch "
+                f"with capacity {self.capacity}."
+            )
+
+        self.error += other.error
+        self.add_counts(other.counters)
+        # `add_counts` counts the sum of the counters, but the total of the
+        # other sketch includes the occurrences subtracted from them as well.
+        self.total += other.total - sum(other.counters.values())
+        return self
+
+    @classmethod
+    def merged(cls, sketches: typing.Iterable[WordSketch]) -> WordSketch:
+        """Return a new sketch with the merged counts of `sketches`, which must have the same capacity."""
+        sketches = iter(sketches)
+        try:
+            first = next(sketches)
+        except StopIteration:
+            raise ValueError("there are no sketches to merge") from None
+
+        result = cls(first.capacity, first.tokenizer)
+        result.merge(first)
+        for sketch in sketches:
+            result.merge(sketch)
+
+        return result
+
+    def estimate(self, word: str) -> WordEstimate:
+        """Return the lower and upper bound of the number of occurrences of `word`."""
+        lower = self.counters.get(word, 0)
+        return WordEstimate(lower, lower + self.error)
+
+    def most_common_words(self, n_words: int) -> typing.Dict[str, int]:
+        """
+        Return the `n_words` words with the largest counts and the lower bounds of their counts.
+
+        The true count of each word is at most `error` higher. Asking for more
+        than `capacity` words isn't useful, as the words beyond that are
+        discarded by the next reduction.
+        """
+        # `heapq.nlargest` is stable, so words with the same count keep the
+        # order in which they were first counted.
+        return dict(heapq.nlargest(n_words, self.counters.items(), key=lambda item: item[1]))
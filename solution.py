@@ -1,22 +1,123 @@
 from __future__ import annotations
 
+import array
+import bisect
+import codecs
 import collections
+import collections.abc
+import concurrent.futures
 import datetime
+import heapq
+import io
 import itertools
-import string
+import math
+import mmap
+import multiprocessing
+import operator
+import os
+import re
+import sys
+import threading
+import types
 import typing
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+import tokenizers
+
 AnyType = typing.TypeVar("AnyType")
 
+# The characters `Article.short_introduction` is allowed to break the content on.
+BREAK_PATTERN = re.compile("[ \n]")
+
+# The kinds of content an `Article` can hold: the text itself, a stream to read
+# it from in chunks, or a reference to the text in a file that's loaded lazily.
+Content = typing.Union[str, "ContentStream", "ContentReference"]
+
+# The hit and miss statistics of the caches of articles and their content,
+# modelled after the `CacheInfo` tuple returned by `functools.lru_cache`.
+CacheInfo = collections.namedtuple("CacheInfo", "hits misses")
+
+
+def find_breaks(content: str) -> array.array:
+    """Return the sorted positions of the spaces and newlines in `content`, the break index of an article."""
+    return array.array("q", (match.start() for match in BREAK_PATTERN.finditer(content)))
+
+
+class BreakIndex:
+    """
+    The positions of the spaces and newlines in a content, found as far as they're needed.
+
+    Only the first `end` characters of the content have been scanned, so an
+    introduction of a few characters doesn't scan, or index the separators
+    of, the entire content.
+    """
+
+    __slots__ = ("positions", "end")
+
+    def __init__(self, positions: typing.Optional[array.array] = None, end: int = 0):
+        self.positions = array.array("q") if positions is None else positions
+        self.end = end
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the index."""
+        return f"<{self.__class__.__name__} positions={len(self.positions)} end={self.end}>"
+
+    def scan(self, content: str, stop: int) -> array.array:
+        """Return the positions of the separators, after scanning at least the first `stop` characters."""
+        if self.end < stop:
+            # Scanning at least twice as far as before keeps the total cost of
+            # many calls with increasing lengths linear in the scanned length.
+            stop = min(max(stop, 2 * self.end), len(content))
+            self.positions.extend(match.start() for match in BREAK_PATTERN.finditer(content, self.end, stop))
+            self.end = stop
+
+        return self.positions
 
-class Article:
-    """The `Article` class you need to write for the qualifier."""
+
+class BaseArticle:
+    """
+    The implementation shared by `Article` and `CompactArticle`.
+
+    The base class defines empty `__slots__`, so it doesn't add a `__dict__` to
+    its subclasses. This allows `CompactArticle` to store its attributes in
+    slots only, while `Article` keeps the regular instance `__dict__`.
+    """
+
+    __slots__ = ()
 
     # Class attribute assigned to an instance of `itertools.count` to easily
-    # get the next ID for an Article instance during initialization.
+    # get the next ID for an Article instance during initialization. Any other
+    # iterator of unique ids, like a `BlockIdAllocator` for articles that are
+    # created in multiple processes, can be assigned to it as well.
     article_id = itertools.count()
 
-    def __init__(self, title: str, author: str, publication_date: datetime.datetime, content: str):
+    # The tokenizer used to split the content into words. Subclasses or
+    # instances can assign another `tokenizers.Tokenizer` to change how words
+    # are counted by `most_common_words`.
+    tokenizer = tokenizers.DEFAULT_TOKENIZER
+
+    # An optional `InternPool` that deduplicates the titles and authors of
+    # new articles. Subclasses can assign a pool to opt in.
+    intern_pool: typing.Optional[InternPool] = None
+
+    def __init__(
+        self,
+        title: str,
+        author: str,
+        publication_date: datetime.datetime,
+        content: Content,
+        *,
+        id: typing.Optional[int] = None,
+    ):
+        if self.intern_pool is not None:
+            title = self.intern_pool.intern(title)
+            author = self.intern_pool.intern(author)
+
         self.title = title
         self.author = author
         self.publication_date = publication_date
@@ -27,12 +128,31 @@ class Article:
         self._content = content
 
         # The attributes below are required for the Intermediate Requirements.
-        # Get the next article id
-        self.id = next(self.article_id)
+        # Get the next article id, unless an existing article with a known id
+        # is being restored (for instance, when loading it from an archive).
+        self.id = next(self.article_id) if id is None else id
 
         # The initial `last_edited` time is `None`, as specified.
         self.last_edited = None
 
+        # The word frequencies of the content are only counted when they are
+        # first needed. The `content` setter resets the cache to `None`.
+        self._word_counts = None
+        self._word_counts_tokenizer = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # The positions of the characters `short_introduction` can break the
+        # content on, which are indexed when they are first needed.
+        self._breaks = None
+
+        # The revision log is opt-in, see `enable_revisions`.
+        self.revisions = None
+
+        # The callbacks to notify of edits of the content, which are only
+        # created when the first one is added, see `add_content_listener`.
+        self.content_listeners = None
+
     def __repr__(self) -> str:
         """
         Return the "official" string representation of an `Article`.
@@ -87,18 +207,79 @@ class Article:
         the content so the introduction is at most `n_characters` long. As
         described in the requirements, this method assumes that such a character
         is always present in the text.
+
+        The positions of the spaces and newlines are indexed as far as this
+        method needs them, which turns looking for the rightmost separator
+        into a binary search for subsequent calls.
         """
-        if len(self._content) <= n_characters:
+        if isinstance(self._content, ContentStream):
+            # Streamed content is not indexed, as that would require reading
+            # the entire stream instead of the first `n_characters`.
+            return self._scan_introduction(n_characters)
+
+        # Content that is referenced in a file is loaded through the cache of
+        # recently loaded contents.
+        content = self.content
+        if len(content) <= n_characters:
             # The content is at most `n_characters` long, which means that we
             # can just return it as is.
-            return self._content
+            return content
+
+        # Find the rightmost separator at an index of at most `n_characters`.
+        # If that separator is at index `n_characters` itself, the first
+        # `n_characters` can be returned as-is.
+        breaks = self._break_index(content, n_characters + 1)
+        position = bisect.bisect_right(breaks, n_characters) - 1
+        if position < 0:
+            # Without a separator, the original slice-based implementation
+            # cuts off the last of the `n_characters + 1` characters.
+            return content[:n_characters]
+
+        return content[:breaks[position]]
+
+    def short_introductions(self, lengths: typing.Iterable[int]) -> typing.List[str]:
+        """Return the introductions for each of the `lengths` in one call."""
+        return [self.short_introduction(n_characters) for n_characters in lengths]
+
+    def break_index(self, breaks: typing.Optional[array.array] = None) -> array.array:
+        """
+        Return the positions of all separators that `short_introduction` uses, indexing them if needed.
+
+        An index of the entire content that was built elsewhere with
+        `find_breaks`, for instance in a worker process, can be installed by
+        passing it as `breaks`. It has to be built from the current content,
+        and is discarded, like the cached word counts, when the content is
+        replaced.
+        """
+        if breaks is not None:
+            self._breaks = BreakIndex(breaks, len(self))
+            return breaks
+
+        content = self.content
+        return self._break_index(content, len(content))
 
+    def _break_index(self, content: str, stop: int) -> array.array:
+        """Return the break index of the `content`, which has to be the current content, up to at least `stop`."""
+        if self._breaks is None:
+            self._breaks = BreakIndex()
+
+        return self._breaks.scan(content, stop)
+
+    def _scan_introduction(self, n_characters: int) -> str:
+        """Return the introduction by scanning the first `n_characters + 1` characters."""
         # First, we reduce the content down to a slice with a length of
         # `n_characters + 1`. The `+ 1` is important because if that additional
         # character is a space or newline, we can return the first
         # `n_characters` as-is.
         short_content = self._content[:n_characters + 1]
 
+        if len(short_content) <= n_characters:
+            # The content is at most `n_characters` long, which means that we
+            # can just return it as is. Checking the length of the slice
+            # instead of the content means that streamed content only has to
+            # be read up to `n_characters + 1` characters.
+            return short_content
+
         # Next, we'll find both the rightmost space and newline characters to
         # see which is last. We'll use that one to break on. As `str.rfind`
         # returns `-1` if one of the characters isn't found, this simplifies
@@ -125,33 +306,78 @@ class Article:
         and treats all non-alphabet characters as word boundaries. The words
         returned in the dictionary will be returned in lowercase.
         """
-        # First, we get rid of the uppercase characters by using `str.lower`.
-        lowercase_content = self._content.lower()
-
-        # We don't care about the specific character that separates different
-        # words; we just want to split the string up into words later. To do
-        # this, we simply replace all non-alphabet characters by a space
-        # character. The `str.split()` we use later doesn't care about the
-        # string having multiple spaces in a row, so we don't have to worry
-        # about that.
-        clean_content = "".join(
-            char if char in string.ascii_lowercase else " "
-            for char in lowercase_content
-        )
-
-        # Use `str.split` to split the string up into words
-        words = clean_content.split()
-
-        # Use `collections.Counter` to count the occurrences of words.
-        word_counts = collections.Counter(words)
-
         # Use the `most_common` method of `collections.Counter` to get a list
         # of the `n_words` most common words and their counts, and turn the
         # result into a `dict` again.
-        most_common_words = dict(word_counts.most_common(n_words))
+        most_common_words = dict(self.word_counts().most_common(n_words))
 
         return most_common_words
 
+    def word_counts(self, counts: typing.Optional[collections.Counter] = None) -> collections.Counter:
+        """
+        Return a `collections.Counter` with the word frequencies of the content.
+
+        Counting the words requires a pass over the entire content, which is
+        why the result is cached on the instance the first time it's needed.
+        Subsequent calls reuse the cached `Counter` until the content is
+        changed by the `content` setter or another tokenizer is assigned.
+
+        The returned `Counter` is shared with the cache and should be treated
+        as read-only. Since a `Counter` remembers the order in which its keys
+        were first inserted, the cached instance preserves the first-occurrence
+        order `most_common_words` uses to break ties.
+
+        Word frequencies that were counted elsewhere, for instance in a worker
+        process, can be installed in the cache by passing them as `counts`.
+        They have to be counted from the current content with the tokenizer
+        of the article.
+        """
+        if counts is not None:
+            self._store_word_counts(counts, self.tokenizer)
+        elif self._has_word_counts():
+            self._cache_hits += 1
+        else:
+            self._store_word_counts(self._count_words(self._content), self.tokenizer)
+
+        return self._word_counts
+
+    def _has_word_counts(self) -> bool:
+        """Return `True` if the cached word frequencies are valid for the current tokenizer."""
+        # The cache also has to be rebuilt if another tokenizer was assigned
+        # since the words were counted.
+        return self._word_counts is not None and self._word_counts_tokenizer is self.tokenizer
+
+    def _store_word_counts(self, word_counts: collections.Counter, tokenizer: tokenizers.Tokenizer) -> None:
+        """
+        Store word frequencies that were counted for the current content in the cache.
+
+        This allows word frequencies that were counted elsewhere, for instance
+        in a worker process of an `ArticleCorpus`, to be used by the cache.
+        Storing a result counts as a cache miss, as the words had to be counted.
+        """
+        self._cache_misses += 1
+        self._word_counts = word_counts
+        self._word_counts_tokenizer = tokenizer
+
+    def cache_info(self) -> CacheInfo:
+        """Return the number of hits and misses of the word frequency cache."""
+        return CacheInfo(hits=self._cache_hits, misses=self._cache_misses)
+
+    def _count_words(self, content: Content) -> collections.Counter:
+        """Count the occurrences of the lowercased, alphabetic words in `content`."""
+        # The tokenizer lowercases the content and treats all non-alphabet
+        # characters as word boundaries. It returns the words in the order in
+        # which they occur, so `collections.Counter` inserts each word at the
+        # position of its first occurrence.
+        if isinstance(content, ContentStream):
+            # Streamed content is counted chunk by chunk to avoid reading it
+            # into memory as a whole.
+            return self.tokenizer.count_chunks(content.iter_chunks())
+        if isinstance(content, ContentReference):
+            return self.tokenizer.count(content.read())
+
+        return self.tokenizer.count(content)
+
     # Start of the Intermediate Requirements section
     @property
     def content(self) -> str:
@@ -161,16 +387,133 @@ class Article:
         This property is implemented so we can use a `setter` method for the
         content attribute as well. This allows us to capture the datetime of the
         last edit that was made to the content.
+
+        If the content is streamed from a `ContentStream`, accessing it reads
+        the entire stream into memory. Content from a `ContentReference` is
+        read from disk on first access and cached in its `ContentCache`.
         """
+        if isinstance(self._content, (ContentStream, ContentReference)):
+            return self._content.read()
+
         return self._content
 
     @content.setter
-    def content(self, new_content: str) -> None:
-        """Set a new value for content and capture the `last_edit` datetime."""
+    def content(self, new_content: Content) -> None:
+        """
+        Set a new value for content and capture the `last_edit` datetime.
+
+        If the new content only appends text to the old content, the cached
+        word frequencies and break index are updated with the appended text
+        instead of being discarded. Use `append` to skip the check for an append.
+        """
         self.last_edited = datetime.datetime.now()
+        old_content = self._content
         self._content = new_content
 
-    def __lt__(self, other: Article) -> typing.Union[bool, NotImplemented]:
+        # Checking for an append is only worth it if there are cached values
+        # to update.
+        if (
+            (self._word_counts is not None or self._breaks is not None)
+            and isinstance(old_content, str)
+            and isinstance(new_content, str)
+            and len(new_content) > len(old_content)
+            and new_content.startswith(old_content)
+        ):
+            self._content_appended(old_content, new_content[len(old_content):])
+        else:
+            # The cached values belong to the old content.
+            self._reset_caches()
+
+        if self.revisions is not None:
+            self.revisions.record(self.content, self.last_edited)
+
+        if self.content_listeners:
+            self._notify_content_listeners()
+
+    def append(self, text: str) -> None:
+        """
+        Append `text` to the content and capture the `last_edit` datetime.
+
+        Only the appended text is processed to update the cached values.
+        """
+        if not isinstance(self._content, str):
+            self.content = self.content + text
+            return
+
+        self.last_edited = datetime.datetime.now()
+        old_content = self._content
+        self._content = old_content + text
+        self._content_appended(old_content, text)
+
+        if self.revisions is not None:
+            self.revisions.record(self._content, self.last_edited)
+
+        if self.content_listeners:
+            self._notify_content_listeners()
+
+    def enable_revisions(
+        self,
+        snapshot_interval: int = 16,
+        max_revisions: typing.Optional[int] = None,
+        max_age: typing.Optional[datetime.timedelta] = None,
+    ) -> RevisionLog:
+        """
+        Start recording the revisions of the content in `self.revisions`.
+
+        The current content is recorded as the first revision. See
+        `RevisionLog` for the meaning of the arguments.
+        """
+        self.revisions = RevisionLog(
+            self.content,
+            timestamp=self.last_edited,
+            snapshot_interval=snapshot_interval,
+            max_revisions=max_revisions,
+            max_age=max_age,
+        )
+        return self.revisions
+
+    def add_content_listener(self, listener: typing.Callable[[BaseArticle], None]) -> None:
+        """
+        Call `listener` with the article after every edit of its content.
+
+        The listener is called after the cached values have been updated, so
+        it can use `word_counts` to get the word frequencies of the new
+        content. This is how a `WordIndex` keeps its postings up to date.
+        """
+        if self.content_listeners is None:
+            self.content_listeners = []
+        self.content_listeners.append(listener)
+
+    def remove_content_listener(self, listener: typing.Callable[[BaseArticle], None]) -> None:
+        """Stop calling a listener that was added with `add_content_listener`."""
+        self.content_listeners.remove(listener)
+
+    def _notify_content_listeners(self) -> None:
+        """Call the content listeners after an edit of the content."""
+        # Iterate over a copy, as a listener may remove itself.
+        for listener in list(self.content_listeners):
+            listener(self)
+
+    def _reset_caches(self) -> None:
+        """Discard the values that were derived from the content."""
+        self._word_counts = None
+        self._breaks = None
+
+    def _content_appended(self, old_content: str, tail: str) -> None:
+        """Update the values derived from `old_content` after `tail` was appended to it."""
+        if self._has_word_counts():
+            self.tokenizer.count_appended(self._word_counts, old_content, tail)
+        else:
+            self._word_counts = None
+
+        # An index of part of the old content is still valid, as appending
+        # doesn't change that part; only a complete index is extended.
+        if self._breaks is not None and self._breaks.end == len(old_content):
+            offset = len(old_content)
+            self._breaks.positions.extend(offset + match.start() for match in BREAK_PATTERN.finditer(tail))
+            self._breaks.end += len(tail)
+
+    def __lt__(self, other: BaseArticle) -> typing.Union[bool, NotImplemented]:
         """
         Return `True` if this Article was published earlier than the `other` Article.
 
@@ -182,19 +525,601 @@ class Article:
         operation, `__gt__`, in the `other` object.
         """
         # This method only implements `<` between `Article` instances,
-        if not isinstance(other, Article):
+        if not isinstance(other, BaseArticle):
             return NotImplemented
 
         return self.publication_date < other.publication_date
 
 
+class Article(BaseArticle):
+    """The `Article` class you need to write for the qualifier."""
+
+
+# The number of characters, or bytes of binary sources, `ContentStream` reads
+# at a time by default.
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# The kinds of sources a `ContentStream` can read content from. As `mmap.mmap`
+# also has file-like methods, buffers are recognized by their type.
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+ContentSource = typing.Union[str, os.PathLike, typing.IO, bytes, bytearray, memoryview, mmap.mmap]
+
+
+class ContentStream:
+    """
+    Content of an `Article` that is read from a file, file object, or buffer on demand.
+
+    Holding the content of a very large article in a `str` means that the
+    entire text has to fit in memory, together with the temporary copies made
+    while counting its words. An `Article` created with a `ContentStream` as
+    its content reads the content in chunks of `chunk_size` instead, which
+    keeps the memory used by `len()`, `short_introduction`, and
+    `most_common_words` bounded by the chunk size.
+
+    The `source` can be a path, a text or binary file object, or an object that
+    supports the buffer protocol, such as an `mmap.mmap`. Binary sources are
+    decoded incrementally with `encoding`. The `chunk_size` is a number of
+    characters for paths and text files, but a number of bytes for binary file
+    objects and buffers, as the number of bytes that encode a given number of
+    characters isn't known before decoding them. File objects are read from the
+    position they had when the stream was created; file objects that are not
+    seekable can only be read once.
+
+    The content of the source is assumed not to change while it's used by
+    the stream, as the length of the content is cached after it's counted.
+    If the number of `characters` is known up front, `len()` uses it without
+    reading the source at all.
+    """
+
+    def __init__(
+        self,
+        source: ContentSource,
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        characters: typing.Optional[int] = None,
+    ):
+        self.source = source
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+
+        self._length = characters
+        self._start = None
+        self._consumed = False
+        if not isinstance(source, (str, os.PathLike, *BUFFER_TYPES)) and source.seekable():
+            self._start = source.tell()
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the stream."""
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} source={self.source!r} encoding={self.encoding!r}>"
+
+    def __len__(self) -> int:
+        """Return the number of characters in the content, counting them on first use."""
+        if self._length is None:
+            self._length = sum(len(chunk) for chunk in self.iter_chunks())
+
+        return self._length
+
+    def __getitem__(self, index: typing.Union[int, slice]) -> str:
+        """
+        Return a character or a slice of the content.
+
+        Slices that start at the beginning of the content only read as many
+        chunks as needed; other indices read the entire content.
+        """
+        if isinstance(index, slice) and not index.start and index.step is None and index.stop is not None:
+            if index.stop < 0:
+                return self.read()[index]
+            return self.prefix(index.stop)
+
+        return self.read()[index]
+
+    def prefix(self, n_characters: int) -> str:
+        """Return the first `n_characters` of the content."""
+        chunks = []
+        remaining = n_characters
+        if remaining <= 0:
+            return ""
+
+        for chunk in self.iter_chunks(min(self.chunk_size, n_characters)):
+            chunks.append(chunk[:remaining])
+            remaining -= len(chunk)
+            if remaining <= 0:
+                break
+
+        return "".join(chunks)
+
+    def read(self) -> str:
+        """Return the entire content as a `str`."""
+        return "".join(self.iter_chunks())
+
+    def iter_chunks(self, chunk_size: typing.Optional[int] = None) -> typing.Iterator[str]:
+        """Iterate over the content in chunks decoded from `chunk_size` characters or bytes of the source."""
+        chunk_size = chunk_size or self.chunk_size
+
+        if isinstance(self.source, BUFFER_TYPES):
+            yield from self._decode_buffer(memoryview(self.source), chunk_size)
+        elif isinstance(self.source, (str, os.PathLike)):
+            # The file is opened with `newline=""` to return the content as it
+            # is stored, just like the other kinds of sources.
+            with open(self.source, encoding=self.encoding, newline="") as file:
+                yield from self._read_file(file, chunk_size)
+        else:
+            if self._start is not None:
+                self.source.seek(self._start)
+            elif self._consumed:
+                raise io.UnsupportedOperation("a non-seekable file object can only be read once")
+
+            self._consumed = True
+            yield from self._read_file(self.source, chunk_size)
+
+    def _read_file(self, file: typing.IO, chunk_size: int) -> typing.Iterator[str]:
+        """Read a text or binary file object in chunks, decoding binary data."""
+        if isinstance(file, io.TextIOBase):
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        while True:
+            data = file.read(chunk_size)
+            chunk = decoder.decode(data, final=not data)
+            if chunk:
+                yield chunk
+            if not data:
+                return
+
+    def _decode_buffer(self, buffer: memoryview, chunk_size: int) -> typing.Iterator[str]:
+        """Decode a buffer in chunks without copying the buffer as a whole."""
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        buffer = buffer.cast("B")
+        for start in range(0, len(buffer), chunk_size):
+            chunk = decoder.decode(buffer[start:start + chunk_size])
+            if chunk:
+                yield chunk
+
+        chunk = decoder.decode(b"", final=True)
+        if chunk:
+            yield chunk
+
+
+class ContentCache:
+    """
+    A bounded LRU cache of contents loaded from `ContentReference` objects.
+
+    The cache keeps at most `max_entries` contents with a combined length of
+    at most `max_characters`. When a new content doesn't fit, the least
+    recently used contents are evicted. Contents longer than `max_characters`
+    are returned without being cached.
+    """
+
+    def __init__(self, max_entries: int = 256, max_characters: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_characters = max_characters
+
+        self._contents = collections.OrderedDict()
+        self._characters = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the cache."""
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} entries={len(self._contents)} characters={self._characters}>"
+
+    def get(self, reference: ContentReference) -> str:
+        """Return the content of `reference`, loading it from disk if it's not cached."""
+        key = reference.key()
+        with self._lock:
+            content = self._contents.get(key)
+            if content is not None:
+                self._hits += 1
+                self._contents.move_to_end(key)
+                return content
+            self._misses += 1
+
+        # The file is read without holding the lock, so other contents can be
+        # retrieved from the cache in the meantime.
+        content = reference.load()
+
+        with self._lock:
+            if key not in self._contents and len(content) <= self.max_characters:
+                self._contents[key] = content
+                self._characters += len(content)
+                while len(self._contents) > self.max_entries or self._characters > self.max_characters:
+                    _, evicted = self._contents.popitem(last=False)
+                    self._characters -= len(evicted)
+
+        return content
+
+    def cache_info(self) -> CacheInfo:
+        """Return the number of hits and misses of the cache."""
+        return CacheInfo(hits=self._hits, misses=self._misses)
+
+    def clear(self) -> None:
+        """Remove all contents from the cache."""
+        with self._lock:
+            self._contents.clear()
+            self._characters = 0
+
+
+# The cache used by `ContentReference` objects unless another one is passed in.
+CONTENT_CACHE = ContentCache()
+
+
+class ContentReference:
+    """
+    A reference to the content of an `Article` that is stored in a file.
+
+    The reference consists of the `path` of the file and the `offset` and
+    `length` in bytes of the encoded content in that file. The content is only
+    read from disk when it's first needed and is kept in a `ContentCache` of
+    recently loaded contents, so repeated calls of `short_introduction` and
+    `most_common_words` don't read the file again.
+
+    `len()` of an article with a reference as its content uses `characters`
+    without doing any I/O. If the number of characters isn't known up front,
+    it's taken from the content the first time it's loaded.
+    """
+
+    __slots__ = ("path", "offset", "length", "characters", "encoding", "cache")
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike],
+        offset: int,
+        length: int,
+        characters: typing.Optional[int] = None,
+        encoding: str = "utf-8",
+        cache: typing.Optional[ContentCache] = None,
+    ):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.characters = characters
+        self.encoding = encoding
+        self.cache = cache if cache is not None else CONTENT_CACHE
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the reference."""
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} path={self.path!r} offset={self.offset} length={self.length}>"
+
+    def __len__(self) -> int:
+        """Return the number of characters in the content."""
+        if self.characters is None:
+            self.characters = len(self.read())
+
+        return self.characters
+
+    def __getitem__(self, index: typing.Union[int, slice]) -> str:
+        """Return a character or a slice of the content."""
+        return self.read()[index]
+
+    def key(self) -> typing.Tuple[str, int, int, str]:
+        """Return the key of the content in a `ContentCache`."""
+        return os.fspath(self.path), self.offset, self.length, self.encoding
+
+    def read(self) -> str:
+        """Return the content, from the cache if possible."""
+        return self.cache.get(self)
+
+    def load(self) -> str:
+        """Read the content from disk, bypassing the cache."""
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read(self.length)
+
+        if len(data) != self.length:
+            raise EOFError(f"expected {self.length} bytes at offset {self.offset} of {self.path!r}")
+
+        return data.decode(self.encoding)
+
+
+# A function that returns `True` if a value is valid for an `ArticleField`.
+Validator = typing.Callable[[typing.Any], bool]
+
+# The origins of unions; `int | None` has a different origin than `Optional[int]`.
+UNION_TYPES = (typing.Union, getattr(types, "UnionType", typing.Union))
+
+
+def _is_plain_class(field_type: typing.Any) -> bool:
+    """Return `True` if `field_type` is a class that can be used with `isinstance` as-is."""
+    # Parameterized builtins, like `list[str]`, pass for classes on some
+    # versions of Python, and `typing.Any` is a class since Python 3.11.
+    return (
+        isinstance(field_type, type)
+        and field_type is not typing.Any
+        and not typing.get_args(field_type)
+    )
+
+
+def _type_name(field_type: typing.Any) -> str:
+    """Return a readable name for a type or a `typing` generic, like `List[str]`."""
+    if field_type is type(None):
+        return "None"
+    if field_type is typing.Any:
+        return "Any"
+    if _is_plain_class(field_type):
+        return field_type.__name__
+
+    origin = typing.get_origin(field_type)
+    args = typing.get_args(field_type)
+    if origin is None:
+        # Special forms like `typing.Any` have a `_name`, but no origin.
+        return getattr(field_type, "_name", None) or repr(field_type)
+
+    if origin in UNION_TYPES:
+        if len(args) == 2 and type(None) in args:
+            (arg,) = (arg for arg in args if arg is not type(None))
+            return f"Optional[{_type_name(arg)}]"
+        name = "Union"
+    else:
+        name = getattr(field_type, "_name", None) or getattr(origin, "__name__", repr(origin))
+
+    arg_names = ", ".join("..." if arg is Ellipsis else _type_name(arg) for arg in args)
+    return f"{name}[{arg_names}]"
+
+
+def _compile_validator(field_type: typing.Any, items: typing.Optional[str] = None) -> Validator:
+    """
+    Build a function that checks if a value is an instance of `field_type`.
+
+    The function is built once for every field, so the `typing` introspection
+    doesn't have to be repeated for every value that's validated.
+
+    For generic containers, like `List[str]`, only the type of the container
+    itself is checked by default. With `items="shallow"`, the items of the
+    container are also checked against the unparameterized types of the
+    type arguments. With `items="deep"`, the items are checked recursively.
+    """
+    if field_type is typing.Any:
+        return lambda value: True
+
+    if _is_plain_class(field_type):
+        return lambda value: isinstance(value, field_type)
+
+    origin = typing.get_origin(field_type)
+    args = typing.get_args(field_type)
+
+    if origin in UNION_TYPES:
+        options = [_compile_validator(arg, items) for arg in args]
+        return lambda value: any(option(value) for option in options)
+
+    if not isinstance(origin, type):
+        raise TypeError(f"unsupported field type {field_type!r}.")
+
+    # Without item checks, or without type arguments to check the items
+    # against, only the type of the container itself is checked.
+    if items is None or not args:
+        return lambda value: isinstance(value, origin)
+
+    item_checks = "deep" if items == "deep" else None
+    item_validators = [_compile_validator(arg, item_checks) for arg in args if arg is not Ellipsis]
+
+    if issubclass(origin, tuple):
+        if len(args) == 2 and args[1] is Ellipsis:
+            (item_validator,) = item_validators
+            return lambda value: isinstance(value, tuple) and all(map(item_validator, value))
+
+        return lambda value: (
+            isinstance(value, tuple)
+            and len(value) == len(item_validators)
+            and all(validator(item) for validator, item in zip(item_validators, value))
+        )
+
+    if issubclass(origin, collections.abc.Mapping) and len(item_validators) == 2:
+        key_validator, value_validator = item_validators
+        return lambda value: (
+            isinstance(value, origin)
+            and all(map(key_validator, value.keys()))
+            and all(map(value_validator, value.values()))
+        )
+
+    if issubclass(origin, collections.abc.Iterable) and len(item_validators) == 1:
+        (item_validator,) = item_validators
+        return lambda value: isinstance(value, origin) and all(map(item_validator, value))
+
+    return lambda value: isinstance(value, origin)
+
+
+# The statistics of an `InternPool`: the number of strings in the pool, the
+# number of values that were (hits) or weren't (misses) already in the pool,
+# and the total size of the duplicate strings that were replaced by the
+# strings in the pool.
+InternInfo = collections.namedtuple("InternInfo", "entries hits misses bytes_saved")
+
+
+def _reference_counts(strings: typing.Mapping[str, str]) -> typing.List[typing.Tuple[str, int]]:
+    """Return the keys of `strings` with their reference counts."""
+    return [(value, sys.getrefcount(value)) for value in list(strings)]
+
+
+def _pool_references() -> typing.Optional[int]:
+    """
+    Return the reference count `_reference_counts` reports for a string that's only held by a pool.
+
+    The number of references held by the interpreter itself while counting
+    differs between Python versions, and an `OrderedDict` holds an extra
+    reference to its keys, so it's measured rather than hardcoded. Reference
+    counts are a detail of CPython: on interpreters without
+    `sys.getrefcount`, like PyPy, `None` is returned and the pool is never
+    pruned.
+    """
+    if sys.implementation.name != "cpython" or not hasattr(sys, "getrefcount"):  # pragma: no cover
+        return None
+
+    values = ["".join(["intern", "probe"])]
+    strings = collections.OrderedDict(zip(values, values))
+    del values
+    [(_, count)] = _reference_counts(strings)
+    return count
+
+
+POOL_REFERENCES = _pool_references()
+
+
+class InternPool:
+    """
+    A bounded pool that deduplicates equal strings, like the authors of articles.
+
+    Strings that are created by deserialization are separate objects even if
+    they're equal, so a million articles by the same author hold a million
+    copies of the name. Passing the values through `intern` replaces each
+    duplicate by the first equal string that went into the pool.
+
+    Unlike `sys.intern`, the pool doesn't keep its strings alive forever.
+    When the pool is full, the strings that are no longer referenced by
+    anything but the pool are pruned first, based on their reference count.
+    If that's not enough, the least recently used strings are evicted until
+    the pool is back at three quarters of `max_entries`, so pruning only
+    happens once every so many new strings. Evicting a string that's still
+    in use only means that the next equal string isn't deduplicated against
+    it.
+
+    Until then, the pool keeps its strings alive: a string whose articles are
+    gone stays in memory until the pool fills up or `prune` is called. A
+    `weakref` can't be used to notice that a string is no longer in use, as
+    `str` objects don't support weak references, so pruning relies on
+    `sys.getrefcount` and only works on CPython. On other interpreters, the
+    pool only evicts the least recently used strings.
+    """
+
+    def __init__(self, max_entries: int = 65536):
+        if max_entries < 1:
+            raise ValueError("max_entries should be at least 1.")
+
+        self.max_entries = max_entries
+        self._strings = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the pool."""
+        return f"<{self.__class__.__name__} entries={len(self)} max_entries={self.max_entries}>"
+
+    def __len__(self) -> int:
+        """Return the number of strings in the pool."""
+        return len(self._strings)
+
+    def intern(self, value: typing.Any) -> typing.Any:
+        """
+        Return the string in the pool that's equal to `value`, adding `value` if there is none.
+
+        Values that aren't exactly of type `str` are returned unchanged.
+        """
+        if type(value) is not str:
+            return value
+
+        with self._lock:
+            pooled = self._strings.get(value)
+            if pooled is not None:
+                self._strings.move_to_end(value)
+                self._hits += 1
+                if pooled is not value:
+                    self._bytes_saved += sys.getsizeof(value)
+                return pooled
+
+            self._misses += 1
+            self._strings[value] = value
+            if len(self._strings) > self.max_entries:
+                self._shrink()
+            return value
+
+    def _shrink(self) -> None:
+        """Make room in a full pool by pruning, then evicting the least recently used strings."""
+        self._prune()
+        while len(self._strings) > self.max_entries * 3 // 4:
+            self._strings.popitem(last=False)
+
+    def _prune(self) -> int:
+        """Remove the strings that are only referenced by the pool and return how many were removed."""
+        if POOL_REFERENCES is None:  # pragma: no cover - only CPython has reference counts
+            return 0
+
+        unused = [value for value, count in _reference_counts(self._strings) if count <= POOL_REFERENCES]
+        for value in unused:
+            del self._strings[value]
+        return len(unused)
+
+    def prune(self) -> int:
+        """Remove the strings that are no longer used outside of the pool and return how many were removed."""
+        with self._lock:
+            return self._prune()
+
+    def info(self) -> InternInfo:
+        """Return the statistics of the pool."""
+        return InternInfo(
+            entries=len(self._strings),
+            hits=self._hits,
+            misses=self._misses,
+            bytes_saved=self._bytes_saved,
+        )
+
+    def clear(self) -> None:
+        """Remove all strings from the pool."""
+        with self._lock:
+            self._strings.clear()
+
+
 class ArticleField:
-    """The `ArticleField` class for the Advanced Requirements."""
+    """
+    The `ArticleField` class for the Advanced Requirements.
+
+    By default, the descriptor stores its value in the instance `__dict__`
+    under the name of the attribute. Classes that use `__slots__` instead of an
+    instance `__dict__` can use `storage="slot"`, which stores the value in a
+    slot named after the attribute with a leading underscore. For a field
+    named `title`, the class has to define a `_title` slot.
+
+    Besides classes, the `field_type` can be a `typing` generic, like
+    `List[str]`, `Optional[datetime]`, or `Dict[str, int]`. The validator for
+    the type is built once, when the descriptor is created. Generic containers
+    are only checked for the type of the container itself, unless `items` is
+    set to "shallow" (check the items against the unparameterized types of the
+    type arguments) or "deep" (check the items recursively).
+
+    If an `InternPool` is passed as `intern`, string values are deduplicated
+    through the pool before they're stored.
+    """
+
+    def __init__(
+        self,
+        field_type: typing.Any,
+        storage: str = "dict",
+        items: typing.Optional[str] = None,
+        intern: typing.Optional[InternPool] = None,
+    ):
+        if storage not in ("dict", "slot"):
+            raise ValueError(f"storage should be 'dict' or 'slot', got {storage!r} instead.")
+        if items not in (None, "shallow", "deep"):
+            raise ValueError(f"items should be None, 'shallow' or 'deep', got {items!r} instead.")
 
-    def __init__(self, field_type: typing.Type[typing.Any]):
         self.field_type = field_type
+        self.storage = storage
+        self.items = items
+        self.intern = intern
         self.attribute_name = None
 
+        # Plain classes are checked with `isinstance` directly, which avoids
+        # the overhead of calling a validator function for the common case.
+        self.type_name = _type_name(field_type)
+        if _is_plain_class(field_type):
+            self.instance_of = field_type
+            self.validator = None
+        else:
+            self.instance_of = None
+            self.validator = _compile_validator(field_type, items)
+
+        # The member descriptor of the slot the value is stored in, which is
+        # looked up in `__set_name__` when `storage` is "slot".
+        self.slot = None
+
     def __repr__(self) -> str:
         """Return the 'official' string representation of the descriptor."""
         cls_name = self.__class__.__name__
@@ -223,8 +1148,20 @@ class ArticleField:
         if self.attribute_name is None:
             self.attribute_name = name
 
+        if self.storage == "slot" and self.slot is None:
+            # The slots of a class are created before `__set_name__` is
+            # called, so the member descriptor is available on the owner.
+            slot_name = f"_{self.attribute_name}"
+            slot = getattr(owner, slot_name, None)
+            if not isinstance(slot, types.MemberDescriptorType):
+                raise TypeError(
+                    f"{owner.__name__!r} has no slot {slot_name!r} to store "
+                    f"attribute {self.attribute_name!r} in."
+                )
+            self.slot = slot
+
     def __get__(self, obj: typing.Optional[AnyType], owner: typing.Type[AnyType]) -> typing.Any:
-        """Get the value from `obj.__dict__` using `self.attribute_name`."""
+        """Get the value from `obj.__dict__` (or its slot) using `self.attribute_name`."""
         # If the attribute is accessed via the `owner` class object, we return
         # the descriptor itself. This allows for easier introspection of the
         # descriptor.
@@ -233,10 +1170,15 @@ class ArticleField:
 
         # Try to get the actual value from `obj.__dict__`. Since this raises
         # a KeyError, not an AttributeError, when no value was set yet, we
-        # catch the exception and raise an AttributeError instead.
+        # catch the exception and raise an AttributeError instead. An empty
+        # slot raises an AttributeError for the name of the slot, which we
+        # replace by one for the name of the attribute.
         try:
-            value = obj.__dict__[self.attribute_name]
-        except KeyError:
+            if self.slot is not None:
+                value = self.slot.__get__(obj, owner)
+            else:
+                value = obj.__dict__[self.attribute_name]
+        except (KeyError, AttributeError):
             cls_name = owner.__name__
             raise AttributeError(
                 f"{cls_name!r} object has no attribute {self.attribute_name!r}"
@@ -246,15 +1188,1434 @@ class ArticleField:
 
     def __set__(self, obj: typing.Optional[AnyType], new_value: typing.Any) -> None:
         """Store the new value for attribute in obj.__dict__ after validating its type."""
-        if not isinstance(new_value, self.field_type):
-            # Get the names of the expected type and the actual type of the new_value
-            expected_type = self.field_type.__name__
-            actual_type = type(new_value).__name__
-
-            # Raise a type error to indicate that actual type did not validate.
-            raise TypeError(
-                f"expected an instance of type {expected_type!r} for attribute "
-                f"{self.attribute_name!r}, got {actual_type!r} instead."
-            )
+        # The same check as `is_valid`, inlined to save a method call on every
+        # assignment.
+        if self.instance_of is not None:
+            valid = isinstance(new_value, self.instance_of)
+        else:
+            valid = self.validator(new_value)
+
+        if not valid:
+            raise self.type_error(new_value)
+
+        if self.intern is not None:
+            new_value = self.intern.intern(new_value)
+
+        if self.slot is not None:
+            self.slot.__set__(obj, new_value)
+        else:
+            obj.__dict__[self.attribute_name] = new_value
+
+    def is_valid(self, value: typing.Any) -> bool:
+        """Return `True` if `value` can be assigned to the attribute."""
+        if self.instance_of is not None:
+            return isinstance(value, self.instance_of)
+
+        return self.validator(value)
+
+    def type_error(self, value: typing.Any) -> TypeError:
+        """Return the `TypeError` raised when an invalid `value` is assigned to the attribute."""
+        # Get the names of the expected type and the actual type of the value
+        expected_type = self.type_name
+        actual_type = type(value).__name__
+
+        return TypeError(
+            f"expected an instance of type {expected_type!r} for attribute "
+            f"{self.attribute_name!r}, got {actual_type!r} instead."
+        )
+
+
+# The default of the parameters of `FieldPlan.update` for fields that aren't
+# given a new value.
+_UNCHANGED = object()
+
+
+class FieldPlan:
+    """
+    The `ArticleField` descriptors of a class, validated and assigned as a group.
+
+    Assigning to each attribute separately goes through `ArticleField.__set__`
+    for every field, which adds the cost of a descriptor call per attribute.
+    A plan collects the fields of a class once, including the fields it
+    inherits, and compiles two functions for them, similar to how `dataclasses`
+    generates an `__init__`: `initialize(obj, **values)`, which requires a value
+    for every field, and `update(obj, **values)`, which accepts any of them.
+
+    Both functions check the types of all values inline before they assign
+    any of them, so an invalid value leaves the object unchanged. Invalid
+    values raise the same `TypeError` as assigning them one by one; missing
+    and unknown fields raise the usual `TypeError` of a call with the wrong
+    keyword arguments.
+
+    The plan is created when the class is created, see `FieldRecord`, so
+    fields that are added to the class afterwards are not part of it.
+    """
+
+    def __init__(self, owner: type):
+        self.owner = owner
+
+        # The fields in the order in which they are defined, starting with the
+        # fields of the base classes. A name that a subclass redefines as
+        # something else than a field is no longer a field.
+        self.fields: typing.Dict[str, ArticleField] = {}
+        for cls in reversed(owner.__mro__):
+            for name, value in vars(cls).items():
+                self.fields.pop(name, None)
+                if isinstance(value, ArticleField):
+                    self.fields[name] = value
+
+        self.initialize = self._compile("__init__", required=True)
+        self.initialize.__doc__ = "Validate the values of all fields and assign them."
+        self.update = self._compile("update", required=False)
+        self.update.__doc__ = "Validate the given values of fields and assign them, all or none of them."
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the plan."""
+        return f"<{self.__class__.__name__} for {self.owner.__name__} fields={list(self.fields)}>"
+
+    def _compile(self, function_name: str, required: bool) -> typing.Callable[..., None]:
+        """
+        Generate the source of a function that validates and assigns all fields and compile it.
+
+        The fields are keyword-only parameters named after the fields. The
+        objects the function needs, like the types of the fields, are passed
+        in as globals with names that start with two underscores, which a
+        field defined in a class body can't have, as it would be mangled.
+        """
+        namespace = {"__UNCHANGED": _UNCHANGED}
+        parameters = []
+        checks = []
+        assignments = []
+        for index, (name, field) in enumerate(self.fields.items()):
+            namespace[f"__field_{index}"] = field
+            parameters.append(name if required else f"{name}=__UNCHANGED")
+            given = "" if required else f"{name} is not __UNCHANGED and "
+
+            # The same check as `ArticleField.is_valid`, inlined in the source.
+            if field.instance_of is not None:
+                namespace[f"__type_{index}"] = field.instance_of
+                valid = f"isinstance({name}, __type_{index})"
+            else:
+                namespace[f"__validator_{index}"] = field.validator
+                valid = f"__validator_{index}({name})"
+            checks.append(f"    if {given}not {valid}:")
+            checks.append(f"        raise __field_{index}.type_error({name})")
+
+            lines = []
+            if field.intern is not None:
+                namespace[f"__intern_{index}"] = field.intern.intern
+                lines.append(f"{name} = __intern_{index}({name})")
+            if field.slot is not None:
+                namespace[f"__slot_{index}"] = field.slot.__set__
+                lines.append(f"__slot_{index}(__obj, {name})")
+            else:
+                lines.append(f"__obj.__dict__[{field.attribute_name!r}] = {name}")
+
+            if required:
+                assignments.extend(f"    {line}" for line in lines)
+            else:
+                assignments.append(f"    if {name} is not __UNCHANGED:")
+                assignments.extend(f"        {line}" for line in lines)
+
+        signature = ", ".join(["__obj", "*", *parameters] if parameters else ["__obj"])
+        body = checks + assignments or ["    pass"]
+        exec("\n".join([f"def {function_name}({signature}):", *body]), namespace)
+
+        function = namespace[function_name]
+        function.__qualname__ = f"{self.owner.__qualname__}.{function_name}"
+        function.__module__ = self.owner.__module__
+        function.__field_plan__ = self
+        return function
+
+
+class FieldRecord:
+    """
+    A base class for classes with `ArticleField` attributes that are assigned together.
+
+    Every subclass gets a `FieldPlan` of its fields as `field_plan` when it's
+    created. Unless the subclass inherits another `__init__`, its constructor
+    takes the values of all fields as keyword arguments, and `update` assigns
+    any number of them; both are the compiled functions of the plan, which
+    validate all values in a single pass.
+
+    >>> class Record(FieldRecord):
+    ...     title = ArticleField(str)
+    ...     views = ArticleField(int)
+    >>> record = Record(title="The emperor's new clothes", views=0)
+    >>> record.update(views=1)
+
+    The base class defines empty `__slots__`, so it can be combined with
+    classes that store their fields in slots, like `CompactArticle`.
+    """
+
+    __slots__ = ()
+
+    field_plan: typing.ClassVar[FieldPlan]
+
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        """Collect the fields of the new subclass into its `FieldPlan` and install its functions."""
+        super().__init_subclass__(**kwargs)
+        # `__set_name__` has already been called on the fields at this point,
+        # so their attribute names and slots are known.
+        cls.field_plan = FieldPlan(cls)
+
+        # Methods defined by the subclass itself are left alone, and so is an
+        # `__init__` inherited from a class other than a `FieldRecord`.
+        init = cls.__init__
+        if "__init__" not in vars(cls) and (init is FieldRecord.__init__ or hasattr(init, "__field_plan__")):
+            cls.__init__ = cls.field_plan.initialize
+        if "update" not in vars(cls):
+            cls.update = cls.field_plan.update
+
+    def __init__(self, **fields: typing.Any):
+        self.field_plan.initialize(self, **fields)
+
+    def update(self, **fields: typing.Any) -> None:
+        """Validate the given values of fields and assign them, all or none of them."""
+        self.field_plan.update(self, **fields)
+
+
+FieldRecord.field_plan = FieldPlan(FieldRecord)
+
+
+class CompactArticle(BaseArticle, FieldRecord):
+    """
+    An `Article` that stores its attributes in slots instead of an instance `__dict__`.
+
+    Without an instance `__dict__`, every `CompactArticle` uses noticeably
+    less memory than an `Article`, which adds up when millions of articles
+    are kept in memory. The trade-off is that no other attributes can be
+    assigned to instances; in particular, the `tokenizer` can only be changed
+    on the class, not on individual instances.
+
+    The `title`, `author`, and `publication_date` attributes are validated
+    `ArticleField` descriptors that store their values in slots, which can
+    be assigned together with `update`.
+    """
+
+    __slots__ = (
+        "_title",
+        "_author",
+        "_publication_date",
+        "_content",
+        "id",
+        "last_edited",
+        "_word_counts",
+        "_word_counts_tokenizer",
+        "_cache_hits",
+        "_cache_misses",
+        "_breaks",
+        "revisions",
+        "content_listeners",
+    )
+
+    title = ArticleField(str, storage="slot")
+    author = ArticleField(str, storage="slot")
+    publication_date = ArticleField(datetime.datetime, storage="slot")
+
+
+# The result of `ArticleCorpus.word_counts`: A `dict` that maps the `id` of each
+# article in the corpus to its word frequencies and the corpus-wide `Counter`.
+CorpusWordCounts = collections.namedtuple("CorpusWordCounts", "articles total")
+
+
+def _count_batch(
+    batch: typing.List[typing.Tuple[tokenizers.Tokenizer, str]]
+) -> typing.Tuple[typing.List[collections.Counter], collections.Counter]:
+    """
+    Count the words of a batch of contents in a worker process.
+
+    Besides the word frequencies of each content in the batch, the worker
+    also merges them into a total for the batch. This moves most of the work
+    of merging the counts to the workers, leaving the main process with only
+    one `Counter` per batch to merge.
+    """
+    word_counts = [tokenizer.count(content) for tokenizer, content in batch]
+
+    total = collections.Counter()
+    for counts in word_counts:
+        total.update(counts)
+
+    return word_counts, total
+
+
+class ArticleCorpus:
+    """
+    A collection of articles that counts their words in batches across processes.
+
+    Counting the words of many articles one by one spends most of its time in
+    a single process. An `ArticleCorpus` splits the articles that don't have
+    cached word frequencies yet into batches and sends only their contents
+    and tokenizers to a `concurrent.futures.ProcessPoolExecutor`. The counts
+    that come back are stored in the cache of each article, so subsequent
+    calls of `Article.most_common_words` don't count the words again.
+
+    The corpus-wide counts are merged in the order of the articles in the
+    corpus. As a `collections.Counter` keeps the insertion order of its keys,
+    ties in `most_common_words` are broken by the first occurrence of a word
+    in the corpus, just like they are for a single article.
+    """
+
+    def __init__(
+        self,
+        articles: typing.Iterable[BaseArticle] = (),
+        max_workers: typing.Optional[int] = None,
+        batch_size: int = 256,
+    ):
+        self.articles = list(articles)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the corpus."""
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} articles={len(self.articles)} max_workers={self.max_workers!r}>"
+
+    def __len__(self) -> int:
+        """Return the number of articles in the corpus."""
+        return len(self.articles)
+
+    def __iter__(self) -> typing.Iterator[BaseArticle]:
+        """Iterate over the articles in the corpus."""
+        return iter(self.articles)
+
+    def __getitem__(self, index: int) -> BaseArticle:
+        """Return the article at position `index` in the corpus."""
+        return self.articles[index]
+
+    def add(self, article: BaseArticle) -> None:
+        """Add an article at the end of the corpus."""
+        self.articles.append(article)
+
+    def word_counts(self, executor: typing.Optional[concurrent.futures.Executor] = None) -> CorpusWordCounts:
+        """
+        Return the word frequencies of each article and of the corpus as a whole.
+
+        The articles are counted in a `ProcessPoolExecutor` with `max_workers`
+        workers, unless an `executor` is passed in. With `max_workers=1`, the
+        articles are counted in the current process without starting a pool.
+        """
+        pending = [article for article in self.articles if not article._has_word_counts()]
+        batches = [
+            pending[start:start + self.batch_size]
+            for start in range(0, len(pending), self.batch_size)
+        ]
+        payloads = [[(article.tokenizer, article.content) for article in batch] for batch in batches]
+
+        if not payloads:
+            results = []
+        elif executor is not None:
+            results = executor.map(_count_batch, payloads)
+        elif self.max_workers == 1:
+            results = map(_count_batch, payloads)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(_count_batch, payloads))
+
+        # Store the counts of the workers in the caches of the articles. The
+        # batch totals are only used if every article in the corpus had to be
+        # counted; otherwise, the total is merged from the per-article counts
+        # to keep the order of first occurrence intact.
+        batch_totals = []
+        for batch, (word_counts, batch_total) in zip(batches, results):
+            for article, counts in zip(batch, word_counts):
+                article._store_word_counts(counts, article.tokenizer)
+            batch_totals.append(batch_total)
+
+        if len(pending) == len(self.articles):
+            totals = batch_totals
+        else:
+            totals = (article._word_counts for article in self.articles)
+
+        total = collections.Counter()
+        for counts in totals:
+            total.update(counts)
+
+        articles = {article.id: article._word_counts for article in self.articles}
+        return CorpusWordCounts(articles=articles, total=total)
+
+    def most_common_words(
+        self, n_words: int, executor: typing.Optional[concurrent.futures.Executor] = None
+    ) -> typing.Dict[str, int]:
+        """
+        Return the `n_words` most common words in the corpus with their counts.
+
+        Ties are broken by the first occurrence of the words in the corpus.
+        """
+        return dict(self.word_counts(executor).total.most_common(n_words))
+
+
+# A record to load into an `ArticleTable`: either a mapping with the keys
+# "title", "author", "publication_date", and "content" (and optionally "id"
+# and "last_edited"), or a sequence of those four values in that order.
+ArticleRecord = typing.Union[typing.Mapping[str, typing.Any], typing.Sequence[typing.Any]]
+
+# The naive datetime the timestamps in an `ArticleTable` are relative to, and
+# the timestamp used to represent a `last_edited` value of `None`.
+EPOCH = datetime.datetime(1970, 1, 1)
+NO_TIMESTAMP = -2 ** 63
+
+
+def to_timestamp(value: typing.Optional[datetime.datetime]) -> int:
+    """Convert a naive datetime to an integer number of microseconds since `EPOCH`."""
+    if value is None:
+        return NO_TIMESTAMP
+    if value.tzinfo is not None:
+        raise ValueError("an ArticleTable can only store naive datetimes.")
+
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_timestamp(timestamp: int) -> typing.Optional[datetime.datetime]:
+    """Convert a timestamp created by `to_timestamp` back to a naive datetime."""
+    if timestamp == NO_TIMESTAMP:
+        return None
+
+    return EPOCH + datetime.timedelta(microseconds=timestamp)
+
+
+class ArticleTable:
+    """
+    A column-oriented store of articles with lazy `Article`-compatible views.
+
+    Instead of one object per article, the table keeps one column per field:
+    the ids and the timestamps of the publication dates and last edits are
+    stored in `array.array` columns, the titles and authors in lists, and the
+    contents of all articles in a single concatenated `str` with a column of
+    offsets into it. Scanning a column, like `publication_timestamps`, doesn't
+    create any objects for the articles at all.
+
+    Indexing or iterating over the table returns an `ArticleView` for each
+    row, which only slices its content out of the buffer when it's accessed.
+    Edits made through a view are stored in the table, so all views of a
+    row see the same values.
+    """
+
+    # The number of records that are transposed into columns at a time.
+    load_batch_size = 65536
+
+    def __init__(self, records: typing.Iterable[ArticleRecord] = ()):
+        self.ids = array.array("q")
+        self.titles = []
+        self.authors = []
+        self.publication_timestamps = array.array("q")
+        self.last_edited_timestamps = array.array("q")
+
+        # The content of row `i` is `self.buffer[offsets[i]:offsets[i + 1]]`,
+        # unless it was replaced through a view; edited contents are kept in
+        # a separate `dict` instead of rebuilding the buffer.
+        self.buffer = ""
+        self.offsets = array.array("q", [0])
+        self.edited_contents = {}
+
+        self.extend(records)
+
+    @classmethod
+    def from_articles(cls, articles: typing.Iterable[BaseArticle]) -> ArticleTable:
+        """Create a table with the fields of existing articles, keeping their ids."""
+        return cls(
+            {
+                "id": article.id,
+                "title": article.title,
+                "author": article.author,
+                "publication_date": article.publication_date,
+                "last_edited": article.last_edited,
+                "content": article.content,
+            }
+            for article in articles
+        )
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the table."""
+        return f"<{self.__class__.__name__} rows={len(self)}>"
+
+    def __len__(self) -> int:
+        """Return the number of articles in the table."""
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> ArticleView:
+        """Return a view of the article in `row`."""
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("ArticleTable index out of range")
+
+        return ArticleView(self, row)
+
+    def __iter__(self) -> typing.Iterator[ArticleView]:
+        """Iterate over views of the articles in the table."""
+        return (ArticleView(self, row) for row in range(len(self)))
+
+    def extend(self, records: typing.Iterable[ArticleRecord]) -> None:
+        """
+        Load the articles in `records` into the table.
+
+        The records are loaded in batches: each batch is transposed into
+        columns, which are appended to the columns of the table in bulk. All
+        records in a single call should be of the same kind, either mappings
+        or sequences.
+
+        Articles without an "id" get the next id of `BaseArticle.article_id`, just
+        like articles that are created one by one.
+        """
+        # The contents of the batches are joined to the buffer once, at the
+        # end: concatenating each batch to the buffer would copy the entire
+        # buffer for every batch. The columns and the buffer are kept in sync
+        # even if a record fails to load.
+        parts = [self.buffer]
+        try:
+            self._extend(records, parts)
+        finally:
+            self.buffer = "".join(parts)
+
+    def _extend(self, records: typing.Iterable[ArticleRecord], parts: typing.List[str]) -> None:
+        """Load the records into the columns, appending the contents of each batch to `parts`."""
+        iterator = iter(records)
+        while True:
+            batch = list(itertools.islice(iterator, self.load_batch_size))
+            if not batch:
+                return
+
+            if isinstance(batch[0], collections.abc.Mapping):
+                ids = [record.get("id") for record in batch]
+                titles = [record["title"] for record in batch]
+                authors = [record["author"] for record in batch]
+                publication_dates = [record["publication_date"] for record in batch]
+                last_edits = [record.get("last_edited") for record in batch]
+                contents = [record["content"] for record in batch]
+                ids = [next(BaseArticle.article_id) if id_ is None else id_ for id_ in ids]
+            else:
+                titles, authors, publication_dates, contents = zip(*batch)
+                ids = itertools.islice(BaseArticle.article_id, len(batch))
+                last_edits = ()
+
+            # The whole batch is converted before any column is extended, so
+            # a record that fails to convert doesn't leave the columns with
+            # different lengths.
+            ids = array.array("q", ids)
+            publication_timestamps = array.array("q", map(to_timestamp, publication_dates))
+            if last_edits:
+                last_edited_timestamps = array.array("q", map(to_timestamp, last_edits))
+            else:
+                last_edited_timestamps = array.array("q", [NO_TIMESTAMP]) * len(batch)
+
+            # The offsets are the running total of the lengths of the contents.
+            offsets = array.array("q", itertools.accumulate(map(len, contents), initial=self.offsets[-1]))
+            content = "".join(contents)
+
+            self.ids.extend(ids)
+            self.titles.extend(titles)
+            self.authors.extend(authors)
+            self.publication_timestamps.extend(publication_timestamps)
+            self.last_edited_timestamps.extend(last_edited_timestamps)
+            self.offsets.extend(offsets[1:])
+            parts.append(content)
+
+    def content_at(self, row: int) -> str:
+        """Return the content of the article in `row`."""
+        if row in self.edited_contents:
+            return self.edited_contents[row]
+
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]]
+
+    def content_length_at(self, row: int) -> int:
+        """Return the length of the content of the article in `row` without slicing it."""
+        if row in self.edited_contents:
+            return len(self.edited_contents[row])
+
+        return self.offsets[row + 1] - self.offsets[row]
+
+
+class ArticleView(BaseArticle):
+    """
+    A lightweight view of a row of an `ArticleTable` that behaves like an `Article`.
+
+    The fields of the article are read from the columns of the table when they
+    are accessed. The content is sliced out of the buffer of the table the
+    first time it's needed and kept by the view afterwards; `len()` uses the
+    offsets of the table and doesn't need the content at all.
+    """
+
+    __slots__ = (
+        "table",
+        "row",
+        "_materialized_content",
+        "_word_counts",
+        "_word_counts_tokenizer",
+        "_cache_hits",
+        "_cache_misses",
+        "_breaks",
+        "revisions",
+        "content_listeners",
+    )
+
+    def __init__(self, table: ArticleTable, row: int):
+        self.table = table
+        self.row = row
+        self._materialized_content = None
+
+        self._word_counts = None
+        self._word_counts_tokenizer = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._breaks = None
+        self.revisions = None
+        self.content_listeners = None
+
+    def __eq__(self, other: typing.Any) -> typing.Union[bool, NotImplemented]:
+        """Return `True` if both views are views of the same row of the same table."""
+        if not isinstance(other, ArticleView):
+            return NotImplemented
+
+        return self.table is other.table and self.row == other.row
+
+    def __hash__(self) -> int:
+        """Return a hash based on the table and row of the view."""
+        return hash((id(self.table), self.row))
+
+    def __len__(self) -> int:
+        """Return the length of the content without materializing it."""
+        if self._materialized_content is not None:
+            return len(self._materialized_content)
+
+        return self.table.content_length_at(self.row)
+
+    @property
+    def id(self) -> int:
+        """Return the id of the article."""
+        return self.table.ids[self.row]
+
+    @property
+    def title(self) -> str:
+        """Return the title of the article."""
+        return self.table.titles[self.row]
+
+    @title.setter
+    def title(self, title: str) -> None:
+        self.table.titles[self.row] = title
+
+    @property
+    def author(self) -> str:
+        """Return the author of the article."""
+        return self.table.authors[self.row]
+
+    @author.setter
+    def author(self, author: str) -> None:
+        self.table.authors[self.row] = author
+
+    @property
+    def publication_date(self) -> datetime.datetime:
+        """Return the publication date of the article."""
+        return from_timestamp(self.table.publication_timestamps[self.row])
+
+    @publication_date.setter
+    def publication_date(self, publication_date: datetime.datetime) -> None:
+        self.table.publication_timestamps[self.row] = to_timestamp(publication_date)
+
+    @property
+    def last_edited(self) -> typing.Optional[datetime.datetime]:
+        """Return the datetime of the last edit of the content, if any."""
+        return from_timestamp(self.table.last_edited_timestamps[self.row])
+
+    @last_edited.setter
+    def last_edited(self, last_edited: typing.Optional[datetime.datetime]) -> None:
+        self.table.last_edited_timestamps[self.row] = to_timestamp(last_edited)
+
+    @property
+    def _content(self) -> str:
+        """Return the content of the article, slicing it out of the table on first access."""
+        if self._materialized_content is None:
+            self._materialized_content = self.table.content_at(self.row)
+
+        return self._materialized_content
+
+    @_content.setter
+    def _content(self, content: str) -> None:
+        self.table.edited_contents[self.row] = content
+        self._materialized_content = content
+
+
+# The sort key of an article in an `ArticleIndex`. The id breaks ties between
+# articles with the same publication date in order of creation.
+IndexKey = typing.Tuple[datetime.datetime, int]
+
+
+class ArticleIndex:
+    """
+    Articles kept in order of their publication date, with range queries.
+
+    Sorting a list of articles compares them with `Article.__lt__`, which runs
+    Python code for every comparison. The index instead orders the articles by
+    a key tuple of `(publication_date, id)`, which is compared in C, and keeps
+    the order up to date as articles are added and removed, so it doesn't have
+    to be sorted again for every query.
+
+    The keys are stored in a list of sorted buckets of at most twice
+    `bucket_size` keys, with a separate list of the largest key in each bucket.
+    Finding the position of a key is a binary search over the maximums and
+    then over a single bucket, which takes O(log n) comparisons. Inserting or
+    removing a key only moves the keys within its bucket, and a bucket that
+    grows too large is split in two.
+    """
+
+    bucket_size = 1000
+
+    def __init__(self, articles: typing.Iterable[BaseArticle] = ()):
+        self._keys = []
+        self._articles = []
+        self._maxes = []
+
+        # Building the index from scratch sorts all articles once, which is a
+        # lot faster than inserting them one by one. Two stable sorts on a
+        # single attribute each are faster than one sort on the key tuples and
+        # give the same order.
+        ordered = sorted(articles, key=operator.attrgetter("id"))
+        ordered.sort(key=operator.attrgetter("publication_date"))
+        keys = [(article.publication_date, article.id) for article in ordered]
+
+        self._key_by_id = {key[1]: key for key in keys}
+        if len(self._key_by_id) != len(keys):
+            raise ValueError("an article can only occur once in the index")
+
+        for start in range(0, len(keys), self.bucket_size):
+            self._keys.append(keys[start:start + self.bucket_size])
+            self._articles.append(ordered[start:start + self.bucket_size])
+            self._maxes.append(self._keys[-1][-1])
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the index."""
+        return f"<{self.__class__.__name__} articles={len(self)}>"
+
+    def __len__(self) -> int:
+        """Return the number of articles in the index."""
+        return len(self._key_by_id)
+
+    def __contains__(self, article: BaseArticle) -> bool:
+        """Return `True` if the article is in the index."""
+        return article.id in self._key_by_id
+
+    def __iter__(self) -> typing.Iterator[BaseArticle]:
+        """Iterate over the articles from the earliest to the latest publication date."""
+        return itertools.chain.from_iterable(self._articles)
+
+    def __reversed__(self) -> typing.Iterator[BaseArticle]:
+        """Iterate over the articles from the latest to the earliest publication date."""
+        return itertools.chain.from_iterable(reversed(bucket) for bucket in reversed(self._articles))
+
+    def add(self, article: BaseArticle) -> None:
+        """Add an article to the index."""
+        if article.id in self._key_by_id:
+            raise ValueError(f"the article with id {article.id} is already in the index")
+
+        key = (article.publication_date, article.id)
+        self._key_by_id[article.id] = key
+
+        if not self._maxes:
+            self._keys.append([key])
+            self._articles.append([article])
+            self._maxes.append(key)
+            return
+
+        # Insert into the first bucket whose maximum is larger than the key,
+        # or into the last bucket if the key is the largest so far.
+        bucket_index = min(bisect.bisect_left(self._maxes, key), len(self._maxes) - 1)
+        keys = self._keys[bucket_index]
+        position = bisect.bisect_left(keys, key)
+        keys.insert(position, key)
+        self._articles[bucket_index].insert(position, article)
+        self._maxes[bucket_index] = keys[-1]
+
+        if len(keys) > 2 * self.bucket_size:
+            self._split(bucket_index)
+
+    def remove(self, article: BaseArticle) -> None:
+        """
+        Remove an article from the index.
+
+        The article is found by the key it had when it was added, so it can be
+        removed even if its publication date was changed in the meantime.
+        """
+        try:
+            key = self._key_by_id.pop(article.id)
+        except KeyError:
+            raise ValueError(f"the article with id {article.id} is not in the index") from None
+
+        bucket_index, position = self._locate(key)
+        keys = self._keys[bucket_index]
+        del keys[position]
+        del self._articles[bucket_index][position]
+
+        if keys:
+            self._maxes[bucket_index] = keys[-1]
+        else:
+            del self._keys[bucket_index]
+            del self._articles[bucket_index]
+            del self._maxes[bucket_index]
+
+    def discard(self, article: BaseArticle) -> None:
+        """Remove an article from the index if it's present."""
+        if article.id in self._key_by_id:
+            self.remove(article)
+
+    def between(self, start: datetime.datetime, end: datetime.datetime) -> typing.Iterator[BaseArticle]:
+        """Iterate over the articles published from `start` up to and including `end`, in order."""
+        # A 1-tuple sorts before all keys with the same date, while a key with
+        # infinity as its id sorts after all of them.
+        bucket_index, position = self._locate((start,))
+        end_key = (end, math.inf)
+
+        while bucket_index < len(self._keys):
+            keys = self._keys[bucket_index]
+            if self._maxes[bucket_index] <= end_key:
+                yield from itertools.islice(self._articles[bucket_index], position, None)
+            else:
+                stop = bisect.bisect_right(keys, end_key, position)
+                yield from itertools.islice(self._articles[bucket_index], position, stop)
+                return
+
+            bucket_index += 1
+            position = 0
+
+    def latest(self, k: int) -> typing.List[BaseArticle]:
+        """Return the `k` articles with the latest publication dates, latest first."""
+        return list(itertools.islice(reversed(self), k))
+
+    def earliest(self, k: int) -> typing.List[BaseArticle]:
+        """Return the `k` articles with the earliest publication dates, earliest first."""
+        return list(itertools.islice(self, k))
+
+    def _locate(self, key: typing.Tuple[typing.Any, ...]) -> typing.Tuple[int, int]:
+        """Return the bucket and the position in that bucket of the first key >= `key`."""
+        bucket_index = bisect.bisect_left(self._maxes, key)
+        if bucket_index == len(self._maxes):
+            return bucket_index, 0
+
+        return bucket_index, bisect.bisect_left(self._keys[bucket_index], key)
+
+    def _split(self, bucket_index: int) -> None:
+        """Split a bucket that has grown too large into two halves."""
+        keys = self._keys[bucket_index]
+        articles = self._articles[bucket_index]
+        half = len(keys) // 2
+
+        self._keys[bucket_index:bucket_index + 1] = [keys[:half], keys[half:]]
+        self._articles[bucket_index:bucket_index + 1] = [articles[:half], articles[half:]]
+        self._maxes[bucket_index:bucket_index + 1] = [keys[half - 1], keys[-1]]
+
+
+# The typecodes `Postings` stores its values with, from the smallest to the
+# largest. Each array uses the smallest typecode that fits all of its values.
+POSTING_TYPECODES = ("B", "H", "I", "Q")
+
+# The number of deltas that `Postings` sums at a time to find the position of
+# an id, without decoding all ids.
+POSTING_BLOCK_SIZE = 256
+
+
+def _compact_array(values: typing.Sequence[int]) -> array.array:
+    """Return the `values` in an unsigned array with the smallest typecode that fits them."""
+    return _widen(array.array(POSTING_TYPECODES[0]), max(values, default=0), values)
+
+
+def _widen(values: array.array, value: int, contents: typing.Optional[typing.Iterable[int]] = None) -> array.array:
+    """
+    Return `values`, converted to a wider typecode if that's needed to store `value`.
+
+    If `contents` is given, the returned array contains those instead of the
+    current values.
+    """
+    if value >> (8 * values.itemsize) == 0:
+        return values if contents is None else array.array(values.typecode, contents)
+
+    for typecode in POSTING_TYPECODES:
+        if value >> (8 * array.array(typecode).itemsize) == 0:
+            return array.array(typecode, values if contents is None else contents)
+
+    raise OverflowError(f"{value} is too large to store in the postings")
+
+
+class Postings:
+    """
+    The ids of the articles that contain a word, with the number of occurrences in each.
+
+    The ids are kept in ascending order and stored as the differences between
+    consecutive ids, which are a lot smaller than the ids themselves, so they
+    usually fit in one or two bytes each instead of the 28 bytes of an `int`
+    object. The ids are decoded with `itertools.accumulate`, which runs in C.
+    Inserting or removing an id only changes the delta of its successor.
+    """
+
+    __slots__ = ("deltas", "frequencies")
+
+    def __init__(self, items: typing.Sequence[typing.Tuple[int, int]] = ()):
+        """Create postings from `(article_id, frequency)` pairs in ascending order of the ids."""
+        ids = [article_id for article_id, _ in items]
+        self.deltas = _compact_array([b - a for a, b in zip([0] + ids, ids)])
+        self.frequencies = _compact_array([frequency for _, frequency in items])
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the postings."""
+        return f"<{self.__class__.__name__} articles={len(self)}>"
+
+    def __len__(self) -> int:
+        """Return the number of articles in the postings."""
+        return len(self.deltas)
+
+    def ids(self) -> typing.List[int]:
+        """Return the ids of the articles in ascending order."""
+        return list(itertools.accumulate(self.deltas))
+
+    def items(self) -> typing.Iterator[typing.Tuple[int, int]]:
+        """Iterate over the `(article_id, frequency)` pairs in ascending order of the ids."""
+        return zip(itertools.accumulate(self.deltas), self.frequencies)
+
+    def _locate(self, article_id: int) -> typing.Tuple[int, int, bool]:
+        """
+        Return the position of `article_id`, the id before that position, and whether the id is present.
+
+        The position is the one `bisect_left` would return for the ids. The
+        deltas are summed a block at a time with `sum` on a slice of the array,
+        which runs in C, until the block that contains the position; only the
+        ids of that block are decoded.
+        """
+        deltas = self.deltas
+        start = 0
+        previous = 0
+        while start < len(deltas):
+            block_total = sum(deltas[start:start + POSTING_BLOCK_SIZE])
+            if previous + block_total >= article_id:
+                break
+            previous += block_total
+            start += POSTING_BLOCK_SIZE
+        else:
+            return len(deltas), previous, False
+
+        # `ids[0]` is the id before the block, `ids[i]` the id at `start + i - 1`.
+        ids = list(itertools.accumulate(deltas[start:start + POSTING_BLOCK_SIZE], initial=previous))
+        index = bisect.bisect_left(ids, article_id, 1)
+        return start + index - 1, ids[index - 1], ids[index] == article_id
+
+    def set(self, article_id: int, frequency: int) -> None:
+        """Set the frequency of the word in an article, adding the article if needed."""
+        position, previous, found = self._locate(article_id)
+        self.frequencies = _widen(self.frequencies, frequency)
+        if found:
+            self.frequencies[position] = frequency
+            return
+
+        delta = article_id - previous
+        self.deltas = _widen(self.deltas, delta)
+        self.deltas.insert(position, delta)
+        self.frequencies.insert(position, frequency)
+        if position + 1 < len(self.deltas):
+            # The next id is now relative to the inserted id.
+            self.deltas[position + 1] -= delta
+
+    def remove(self, article_id: int) -> None:
+        """Remove an article from the postings."""
+        position, _, found = self._locate(article_id)
+        if not found:
+            raise KeyError(article_id)
+
+        if position + 1 < len(self.deltas):
+            # The next id is now relative to the id before the removed one.
+            merged = self.deltas[position] + self.deltas[position + 1]
+            self.deltas = _widen(self.deltas, merged)
+            self.deltas[position + 1] = merged
+
+        del self.deltas[position]
+        del self.frequencies[position]
+
+
+class WordIndex:
+    """
+    An inverted index from words to the articles that contain them.
+
+    The words of an article are the keys of its `word_counts`, so the index
+    finds the same words as `most_common_words`, using the tokenizer of each
+    article. The words in queries are normalized with the `tokenizer` of the
+    index, which should be the same as that of the articles.
+
+    The index registers itself as a content listener on each article. When
+    the content of an article is edited, only the postings of the words whose
+    frequency in that article changed are updated. As the word frequencies of
+    an append are updated incrementally by the article itself, keeping the
+    index up to date after an append only costs the words of the appended
+    text, rather than a rebuild of the index.
+    """
+
+    def __init__(
+        self,
+        articles: typing.Iterable[BaseArticle] = (),
+        tokenizer: typing.Optional[tokenizers.Tokenizer] = None,
+    ):
+        self.tokenizer = tokenizer if tokenizer is not None else tokenizers.DEFAULT_TOKENIZER
+        self._articles = {}
+        # The words of each article with their frequencies, to find out which
+        # postings have to change after an edit.
+        self._terms = {}
+
+        # Building the postings of all articles at once, in order of their
+        # ids, only appends to the lists of postings.
+        items = collections.defaultdict(list)
+        for article in sorted(articles, key=operator.attrgetter("id")):
+            word_counts = self._register(article)
+            for word, count in word_counts.items():
+                items[word].append((article.id, count))
+
+        self._postings = {word: Postings(word_items) for word, word_items in items.items()}
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the index."""
+        return f"<{self.__class__.__name__} articles={len(self)} words={len(self._postings)}>"
+
+    def __len__(self) -> int:
+        """Return the number of articles in the index."""
+        return len(self._articles)
+
+    def __contains__(self, article: BaseArticle) -> bool:
+        """Return `True` if the article is in the index."""
+        return article.id in self._articles
+
+    def _register(self, article: BaseArticle) -> collections.Counter:
+        """Start tracking an article and return its word frequencies."""
+        if article.id in self._articles:
+            raise ValueError(f"the article with id {article.id} is already in the index")
+
+        word_counts = article.word_counts()
+        self._articles[article.id] = article
+        self._terms[article.id] = (tuple(word_counts), _compact_array(list(word_counts.values())))
+        article.add_content_listener(self._content_changed)
+        return word_counts
+
+    def add(self, article: BaseArticle) -> None:
+        """Add an article to the index."""
+        for word, count in self._register(article).items():
+            self._set_posting(word, article.id, count)
+
+    def remove(self, article: BaseArticle) -> None:
+        """Remove an article from the index."""
+        if article.id not in self._articles:
+            raise ValueError(f"the article with id {article.id} is not in the index")
+
+        words, _ = self._terms.pop(article.id)
+        for word in words:
+            self._remove_posting(word, article.id)
+
+        del self._articles[article.id]
+        article.remove_content_listener(self._content_changed)
+
+    def discard(self, article: BaseArticle) -> None:
+        """Remove an article from the index if it's present."""
+        if article.id in self._articles:
+            self.remove(article)
+
+    def _content_changed(self, article: BaseArticle) -> None:
+        """Update the postings of the words whose frequency changed in an edit of `article`."""
+        words, frequencies = self._terms[article.id]
+        old_counts = dict(zip(words, frequencies))
+        new_counts = article.word_counts()
+
+        for word in old_counts.keys() - new_counts.keys():
+            self._remove_posting(word, article.id)
+        for word, count in new_counts.items():
+            if old_counts.get(word) != count:
+                self._set_posting(word, article.id, count)
+
+        self._terms[article.id] = (tuple(new_counts), _compact_array(list(new_counts.values())))
+
+    def _set_posting(self, word: str, article_id: int, count: int) -> None:
+        """Set the frequency of `word` in an article."""
+        postings = self._postings.get(word)
+        if postings is None:
+            self._postings[word] = Postings([(article_id, count)])
+        else:
+            postings.set(article_id, count)
+
+    def _remove_posting(self, word: str, article_id: int) -> None:
+        """Remove an article from the postings of `word`."""
+        postings = self._postings[word]
+        postings.remove(article_id)
+        if not postings:
+            del self._postings[word]
+
+    def postings(self, word: str) -> typing.List[typing.Tuple[int, int]]:
+        """Return the `(article_id, frequency)` pairs of the articles that contain `word`."""
+        postings = self._postings.get(self.tokenizer.normalize(word))
+        return list(postings.items()) if postings is not None else []
+
+    def search_all(self, *words: str) -> typing.List[BaseArticle]:
+        """Return the articles that contain all of the `words`, in order of their ids."""
+        postings = [self._postings.get(self.tokenizer.normalize(word)) for word in words]
+        if not postings or None in postings:
+            return []
+
+        # Intersecting starting from the shortest postings keeps the sets small.
+        postings.sort(key=len)
+        ids = set(postings[0].ids())
+        for other in postings[1:]:
+            ids.intersection_update(other.ids())
+
+        return [self._articles[article_id] for article_id in sorted(ids)]
+
+    def search_any(self, *words: str) -> typing.List[BaseArticle]:
+        """Return the articles that contain any of the `words`, in order of their ids."""
+        ids = set()
+        for word in words:
+            postings = self._postings.get(self.tokenizer.normalize(word))
+            if postings is not None:
+                ids.update(postings.ids())
+
+        return [self._articles[article_id] for article_id in sorted(ids)]
+
+    def top(self, k: int, *words: str) -> typing.List[typing.Tuple[BaseArticle, int]]:
+        """
+        Return the `k` articles with the most occurrences of the `words`, with their counts.
+
+        The count of an article is the sum of the frequencies of all `words` in
+        it. Articles with the same count are returned in order of their ids.
+        """
+        scores = collections.Counter()
+        for word in words:
+            postings = self._postings.get(self.tokenizer.normalize(word))
+            if postings is not None:
+                for article_id, frequency in postings.items():
+                    scores[article_id] += frequency
+
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self._articles[article_id], score) for article_id, score in ranked]
+
+
+class IdSource:
+    """
+    Base class for the shared sources a `BlockIdAllocator` leases blocks of ids from.
+
+    A source has to hand out every id at most once, even when blocks are leased
+    concurrently by multiple processes.
+    """
+
+    def lease(self, size: int) -> range:
+        """Reserve the next `size` ids and return them as a `range`."""
+        raise NotImplementedError
+
+
+class SharedValueIdSource(IdSource):
+    """
+    Lease ids from a counter in shared memory, for processes started by `multiprocessing`.
+
+    The counter is a `multiprocessing.Value`, which has to be created in the
+    parent process and passed to the child processes, for instance with the
+    `initializer` and `initargs` of a process pool.
+    """
+
+    def __init__(self, value: typing.Optional[typing.Any] = None, start: int = 0):
+        self.value = value if value is not None else multiprocessing.Value("q", start)
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the source."""
+        return f"<{self.__class__.__name__} next_id={self.value.value}>"
+
+    def lease(self, size: int) -> range:
+        """Reserve the next `size` ids and return them as a `range`."""
+        with self.value.get_lock():
+            start = self.value.value
+            self.value.value = start + size
+
+        return range(start, start + size)
+
+
+class FileIdSource(IdSource):
+    """
+    Lease ids from a counter stored in a file that's protected by a file lock.
+
+    Unlike a `SharedValueIdSource`, this works for processes that were not
+    started from the same parent, as long as they use the same `path`. The
+    file only contains the next id that hasn't been leased yet.
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike], start: int = 0):
+        self.path = path
+        self.start = start
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the source."""
+        return f"<{self.__class__.__name__} path={self.path!r}>"
+
+    def lease(self, size: int) -> range:
+        """Reserve the next `size` ids and return them as a `range`."""
+        with open(self.path, "a+b") as file:
+            self._lock(file)
+            try:
+                file.seek(0)
+                contents = file.read().strip()
+                start = int(contents) if contents else self.start
+
+                file.seek(0)
+                file.truncate()
+                file.write(str(start + size).encode("ascii"))
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                self._unlock(file)
+
+        return range(start, start + size)
+
+    @staticmethod
+    def _lock(file: typing.BinaryIO) -> None:
+        """Acquire an exclusive lock on `file`, blocking until it's available."""
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+    @staticmethod
+    def _unlock(file: typing.BinaryIO) -> None:
+        """Release the lock acquired by `_lock`."""
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+        else:  # pragma: no cover - Windows
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BlockIdAllocator:
+    """
+    An iterator of article ids that are unique across threads and processes.
+
+    Getting every id from a shared source would require synchronizing the
+    processes for every article that's created. Instead, the allocator leases
+    a block of `block_size` ids from its `source` at a time and hands them out
+    locally until the block is used up. A lock makes this safe to use from
+    multiple threads.
+
+    The allocator detects when it's used in a process that was forked after it
+    leased a block and leases a new block in that case, so the parent and the
+    child never hand out the ids of the same block.
+
+    To use it, assign it to the `article_id` attribute of the article classes:
+
+    >>> BaseArticle.article_id = BlockIdAllocator(SharedValueIdSource())
+
+    Ids are unique, but, unlike the ids from `itertools.count`, they are not
+    sequential across processes.
+    """
+
+    def __init__(self, source: IdSource, block_size: int = 1024):
+        self.source = source
+        self.block_size = block_size
+
+        self._lock = threading.Lock()
+        self._block = iter(())
+        self._pid = None
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the allocator."""
+        cls_name = self.__class__.__name__
+        return f"<{cls_name} source={self.source!r} block_size={self.block_size}>"
+
+    def __iter__(self) -> BlockIdAllocator:
+        """Return the allocator itself, as it is an iterator."""
+        return self
+
+    def __next__(self) -> int:
+        """Return the next unique id, leasing a new block if needed."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # The block was leased by another (parent) process.
+                self._block = iter(())
+                self._pid = os.getpid()
+
+            for article_id in self._block:
+                return article_id
+
+            self._block = iter(self.source.lease(self.block_size))
+            return next(self._block)
+
+
+# A revision in a `RevisionLog`: its number, the datetime at which it was
+# recorded, and whether it's stored as a full snapshot of the content.
+RevisionInfo = collections.namedtuple("RevisionInfo", "number timestamp snapshot")
+
+# A change from one revision to the next: the length of the prefix and suffix
+# the revisions have in common, and the text that replaces the part between.
+Delta = collections.namedtuple("Delta", "prefix suffix text")
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Return the length of the longest common prefix of `a` and `b`."""
+    # Comparing slices runs in C, so a binary search over the length of the
+    # prefix is much faster than comparing the strings character by character.
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Return the length of the longest common suffix of `a` and `b`, up to `limit`."""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def make_delta(old: str, new: str) -> Delta:
+    """Return the `Delta` that turns `old` into `new`."""
+    prefix = _common_prefix_length(old, new)
+    suffix = _common_suffix_length(old, new, min(len(old), len(new)) - prefix)
+    return Delta(prefix=prefix, suffix=suffix, text=new[prefix:len(new) - suffix])
+
+
+def apply_delta(old: str, delta: Delta) -> str:
+    """Return the revision that `delta` turns `old` into."""
+    return old[:delta.prefix] + delta.text + old[len(old) - delta.suffix:]
+
+
+class RevisionLog:
+    """
+    The history of the content of an `Article`, stored as compact deltas.
+
+    Storing a full copy of every revision of a large article quickly adds up.
+    Most edits change a single region of the content, like appending a
+    paragraph or fixing a typo, so each revision is stored as a `Delta` to the
+    previous one: the length of the prefix and suffix the two revisions have
+    in common, and the text that replaces the part in between.
+
+    Every `snapshot_interval` revisions, the full content is stored instead,
+    so rebuilding any revision takes at most `snapshot_interval - 1` deltas.
+    A snapshot is also stored when a delta would not be smaller than the
+    content itself.
+
+    Old revisions are evicted when there are more than `max_revisions` or when
+    they are older than `max_age` (relative to the latest revision). The
+    oldest remaining revision is turned into a snapshot if it was a delta, so
+    the remaining revisions can still be rebuilt. The latest revision is
+    never evicted. Revisions keep their numbers after older ones are evicted.
+    """
+
+    def __init__(
+        self,
+        content: str,
+        timestamp: typing.Optional[datetime.datetime] = None,
+        snapshot_interval: int = 16,
+        max_revisions: typing.Optional[int] = None,
+        max_age: typing.Optional[datetime.timedelta] = None,
+    ):
+        if snapshot_interval < 1:
+            raise ValueError("snapshot_interval should be at least 1.")
+        if max_revisions is not None and max_revisions < 1:
+            raise ValueError("max_revisions should be at least 1.")
+
+        self.snapshot_interval = snapshot_interval
+        self.max_revisions = max_revisions
+        self.max_age = max_age
+
+        # Each entry is a tuple of (timestamp, snapshot or delta). The number
+        # of the first entry is `self.first`.
+        self._entries = collections.deque([(timestamp, content)])
+        self.first = 0
+        self._latest = content
+        self._since_snapshot = 0
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the log."""
+        return f"<{self.__class__.__name__} revisions={self.first}..{self.latest}>"
+
+    def __len__(self) -> int:
+        """Return the number of revisions that are kept in the log."""
+        return len(self._entries)
+
+    @property
+    def latest(self) -> int:
+        """Return the number of the latest revision."""
+        return self.first + len(self._entries) - 1
+
+    def record(self, content: str, timestamp: typing.Optional[datetime.datetime] = None) -> int:
+        """Record `content` as the latest revision and return its number."""
+        self._since_snapshot += 1
+        entry = content
+        if self._since_snapshot < self.snapshot_interval:
+            delta = make_delta(self._latest, content)
+            if len(delta.text) < len(content):
+                entry = delta
+
+        if entry is content:
+            self._since_snapshot = 0
+
+        self._entries.append((timestamp, entry))
+        self._latest = content
+        self._evict()
+        return self.latest
+
+    def get(self, number: int) -> str:
+        """Rebuild and return the content of revision `number`."""
+        if number < 0:
+            number += self.latest + 1
+        if not self.first <= number <= self.latest:
+            raise IndexError(f"revision {number} is not in the log")
+        if number == self.latest:
+            return self._latest
+
+        # Walk back to the nearest snapshot and apply the deltas after it.
+        position = number - self.first
+        start = position
+        while isinstance(self._entries[start][1], Delta):
+            start -= 1
+
+        content = self._entries[start][1]
+        for _, delta in itertools.islice(self._entries, start + 1, position + 1):
+            content = apply_delta(content, delta)
+
+        return content
+
+    def __getitem__(self, number: int) -> str:
+        """Rebuild and return the content of revision `number`."""
+        return self.get(number)
+
+    def info(self) -> typing.List[RevisionInfo]:
+        """Return the number, timestamp, and kind of every revision in the log."""
+        return [
+            RevisionInfo(number=self.first + position, timestamp=timestamp, snapshot=isinstance(entry, str))
+            for position, (timestamp, entry) in enumerate(self._entries)
+        ]
+
+    def _evict(self) -> None:
+        """Evict the oldest revisions that fall outside of the retention policy."""
+        latest_timestamp = self._entries[-1][0]
+        evicted = False
+        while len(self._entries) > 1:
+            timestamp = self._entries[0][0]
+            too_many = self.max_revisions is not None and len(self._entries) > self.max_revisions
+            too_old = (
+                self.max_age is not None
+                and timestamp is not None
+                and latest_timestamp is not None
+                and latest_timestamp - timestamp > self.max_age
+            )
+            if not (too_many or too_old):
+                break
+
+            # The content of the next revision has to be rebuilt before the
+            # revision it's based on is evicted.
+            if isinstance(self._entries[1][1], Delta):
+                next_timestamp, delta = self._entries[1]
+                self._entries[1] = (next_timestamp, self.get(self.first + 1))
+
+            self._entries.popleft()
+            self.first += 1
+            evicted = True
 
-        obj.__dict__[self.attribute_name] = new_value
+        if evicted and len(self._entries) == 1:
+            self._since_snapshot = 0
@@ -0,0 +1,1486 @@
+import array
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import io
+import itertools
+import json
+import math
+import mmap
+import multiprocessing
+import pathlib
+import random
+import re
+import string
+import sys
+import tempfile
+import tracemalloc
+import typing
+import unittest
+from unittest import mock
+
+import archive
+import benchmark_suite
+import instrumentation
+import pipeline
+import run_tests
+import shared_articles
+import sketches
+import solution
+import tokenizers
+
+
+def make_article(content: str = "", **kwargs) -> solution.Article:
+    """Create an Article with placeholder metadata and the given content."""
+    kwargs.setdefault("title", "The emperor's new clothes")
+    kwargs.setdefault("author", "Hans Christian Andersen")
+    kwargs.setdefault("publication_date", datetime.datetime(1837, 4, 7, 12, 15, 0))
+    return solution.Article(content=content, **kwargs)
+
+
+def make_zipf_texts(n_texts: int, words_per_text: int, vocabulary: int, seed: int) -> typing.List[str]:
+    """Generate texts with words drawn from a Zipf distribution over `vocabulary` distinct words."""
+    words = ["".join(letters) for letters in itertools.product(string.ascii_lowercase, repeat=3)][:vocabulary]
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(words, weights, k=words_per_text)) for _ in range(n_texts)]
+
+
+def shared_article_stats(handles: typing.Sequence[shared_articles.SharedArticleHandle]) -> typing.List[tuple]:
+    """Open articles from shared memory in a worker process and return some of their stats."""
+    with shared_articles.SharedArticleReader() as reader:
+        articles = [reader.article(handle) for handle in handles]
+        return [(article.id, len(article), article.short_introduction(20), article.most_common_words(2))
+                for article in articles]
+
+
+class T400WordCountCacheTests(unittest.TestCase):
+    """Tests for the word frequency cache."""
+
+    def setUp(self) -> None:
+        """Create an article with some repeated words before running each test."""
+        self.article = make_article("'But he has nothing at all on!' at last cried out all the people.")
+
+    def test_401_cache_is_reused(self):
+        """Repeated calls should count the words once and reuse the result."""
+        tokenizer = tokenizers.TranslateTokenizer()
+        self.article.tokenizer = tokenizer
+        with mock.patch.object(tokenizer, "count", wraps=tokenizer.count) as count_words:
+            self.assertEqual({"at": 2, "all": 2}, self.article.most_common_words(2))
+            self.assertEqual({"at": 2, "all": 2, "but": 1}, self.article.most_common_words(3))
+
+        count_words.assert_called_once()
+        self.assertEqual(solution.CacheInfo(hits=1, misses=1), self.article.cache_info())
+
+    def test_402_content_setter_invalidates_cache(self):
+        """Setting new content should discard the cached word frequencies."""
+        self.article.most_common_words(2)
+        self.article.content = "of his.\nHis whole"
+
+        self.assertEqual({"his": 2, "of": 1}, self.article.most_common_words(2))
+        self.assertEqual(solution.CacheInfo(hits=0, misses=2), self.article.cache_info())
+
+
+class T500TokenizerTests(unittest.TestCase):
+    """Tests for the bulk tokenizers."""
+
+    contents = (
+        "'But he has nothing at all on!' at last cried out all the people.",
+        "'I know I'm not stupid,' the man thought,",
+        "see anything.\nHis whole\tbody_was 4 NAKED",
+        "Caf\u00e9 na\u00efve \u212aelvin \u0130stanbul \u00e6ther",
+        "",
+    )
+
+    def test_501_tokenizers_match_generator(self):
+        """The bulk tokenizers should produce the same words as the generator tokenizer."""
+        reference = tokenizers.GeneratorTokenizer()
+        for tokenizer in (tokenizers.TranslateTokenizer(), tokenizers.RegexTokenizer()):
+            for content in self.contents:
+                with self.subTest(tokenizer=tokenizer, content=content):
+                    self.assertEqual(reference.words(content), tokenizer.words(content))
+
+    def test_502_assigning_tokenizer_invalidates_cache(self):
+        """Assigning another tokenizer to an article should recount its words."""
+        article = make_article("Kelvin \u212aelvin")
+        self.assertEqual({"kelvin": 2}, article.most_common_words(2))
+
+        article.tokenizer = tokenizers.RegexTokenizer()
+        article.most_common_words(2)
+        self.assertEqual(solution.CacheInfo(hits=0, misses=2), article.cache_info())
+
+
+class T600ArticleCorpusTests(unittest.TestCase):
+    """Tests for counting the words of a corpus of articles."""
+
+    def setUp(self) -> None:
+        """Create a corpus with a few short articles before running each test."""
+        self.contents = (
+            "'But he has nothing at all on!' at last cried out all the people.",
+            "The Emperor was vexed, for he knew that the people were right.",
+            "However, he thought the procession must go on now!",
+        )
+        self.articles = [make_article(content) for content in self.contents]
+
+    def test_601_word_counts_in_process_pool(self):
+        """Counting the words in a process pool should give the same results as a serial count."""
+        corpus = solution.ArticleCorpus(self.articles, max_workers=2, batch_size=2)
+        result = corpus.word_counts()
+
+        expected_total = collections.Counter()
+        for content in self.contents:
+            expected_total.update(tokenizers.GeneratorTokenizer().count(content))
+
+        self.assertEqual(list(expected_total.items()), list(result.total.items()))
+        for article, content in zip(self.articles, self.contents):
+            with self.subTest(article=article):
+                self.assertEqual(make_article(content).word_counts(), result.articles[article.id])
+                self.assertTrue(article._has_word_counts())
+
+    def test_602_most_common_words_tie_break(self):
+        """Ties in the corpus should be broken by the first occurrence in the corpus."""
+        self.articles[1].word_counts()
+        corpus = solution.ArticleCorpus(self.articles, max_workers=1)
+
+        expected = {"the": 4, "he": 3, "at": 2, "all": 2, "on": 2, "people": 2, "but": 1}
+        self.assertEqual(list(expected.items()), list(corpus.most_common_words(7).items()))
+
+
+class T700ContentStreamTests(unittest.TestCase):
+    """Tests for articles with streamed content."""
+
+    content = (
+        "'But he has nothing at all on!' at last cried out all the people.\n"
+        "The Emperor was vexed, for he knew that the people were right. Café Kelvin"
+    )
+
+    def sources(self) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        """Yield the content in each of the supported kinds of sources."""
+        encoded = self.content.encode("utf-8")
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "article.txt")
+            path.write_bytes(encoded)
+
+            yield "path", path
+            yield "text file", io.StringIO(self.content)
+            yield "binary file", io.BytesIO(encoded)
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield "mmap", buffer
+
+    def test_701_streamed_article_matches_str_article(self):
+        """An article with streamed content should behave like an article with str content."""
+        expected = make_article(self.content)
+        for name, source in self.sources():
+            with self.subTest(source=name):
+                # A tiny chunk size makes sure that words are split across chunks.
+                article = make_article(solution.ContentStream(source, chunk_size=3))
+                self.assertEqual(expected.most_common_words(10), article.most_common_words(10))
+                self.assertEqual(len(expected), len(article))
+                self.assertEqual(expected.short_introduction(20), article.short_introduction(20))
+                self.assertEqual(self.content, article.content)
+
+    def test_702_count_chunks_carries_split_words(self):
+        """Words that are split across chunks should be counted as a single word."""
+        chunks = ["'But he has no", "th", "ing at all ", "on!' at l", "ast"]
+        expected = tokenizers.GeneratorTokenizer().count("".join(chunks))
+        self.assertEqual(
+            list(expected.items()),
+            list(tokenizers.DEFAULT_TOKENIZER.count_chunks(chunks).items()),
+        )
+
+
+class T800AppendTests(unittest.TestCase):
+    """Tests for updating the word frequencies of appended content."""
+
+    appends = (
+        ("'But he has no", "thing at all on!'"),
+        ("at last cried out all", " the people"),
+        ("The Emperor was vexed, for", " he knew that the emperor"),
+        ("", "Am I a fool?"),
+        ("a b a", "b"),
+        ("people", "!"),
+    )
+
+    def test_801_append_updates_word_counts(self):
+        """Appending content should give the same word frequencies as counting from scratch."""
+        for method in ("setter", "append"):
+            for content, tail in self.appends:
+                with self.subTest(method=method, content=content, tail=tail):
+                    article = make_article(content)
+                    article.word_counts()
+
+                    if method == "setter":
+                        article.content = content + tail
+                    else:
+                        article.append(tail)
+
+                    expected = tokenizers.GeneratorTokenizer().count(content + tail)
+                    self.assertEqual(list(expected.items()), list(article.word_counts().items()))
+                    self.assertEqual(solution.CacheInfo(hits=1, misses=1), article.cache_info())
+
+    @mock.patch("solution.datetime")
+    def test_802_append_updates_last_edited(self, local_datetime):
+        """Appending content should update the last_edited attribute."""
+        local_datetime.datetime.now.return_value = datetime.datetime(2020, 7, 2, 15, 3, 10)
+        article = make_article("'I know I'm not stupid,'")
+        article.append(" the man thought")
+
+        self.assertEqual("'I know I'm not stupid,' the man thought", article.content)
+        self.assertEqual(datetime.datetime(2020, 7, 2, 15, 3, 10), article.last_edited)
+
+
+class T900BreakIndexTests(unittest.TestCase):
+    """Tests for the break index used by short_introduction."""
+
+    contents = (
+        "'But he has nothing at all on!' at last cried out all the people.",
+        "'I know I'm not stupid,' the man thought,",
+        "see anything.\nHis whole",
+        "Emperor\nwas vexed",
+        "nothing-to-break-on-here",
+    )
+
+    def test_901_introductions_match_scan(self):
+        """The indexed introductions should match the introductions found by scanning."""
+        for content in self.contents:
+            article = make_article(content)
+            lengths = range(len(content) + 2)
+            expected = [article._scan_introduction(n) for n in lengths]
+            with self.subTest(content=content):
+                self.assertEqual(expected, article.short_introductions(lengths))
+
+    def test_902_index_follows_content_edits(self):
+        """The break index should be updated by appends and discarded by other edits."""
+        article = make_article("see anything.")
+        self.assertEqual("see", article.short_introduction(5))
+        self.assertEqual(array.array("q", [3]), article._breaks.positions)
+
+        article.content = "see anything.\nHis whole"
+        self.assertEqual("see anything.", article.short_introduction(16))
+        self.assertEqual(array.array("q", [3, 13]), article._breaks.positions)
+        self.assertEqual(array.array("q", [3, 13, 17]), article.break_index())
+
+        article.content += " body"
+        self.assertEqual(array.array("q", [3, 13, 17, 23]), article._breaks.positions)
+
+        article.content = "'Magnificent,' said the two"
+        self.assertIsNone(article._breaks)
+        self.assertEqual("'Magnificent,'", article.short_introduction(15))
+
+    def test_903_index_is_built_as_far_as_needed(self):
+        """A short introduction of a long article shouldn't index the separators of the entire content."""
+        article = make_article("the people " * 10000)
+        self.assertEqual("the people", article.short_introduction(12))
+        self.assertLess(article._breaks.end, 100)
+
+        lengths = range(0, 2000, 7)
+        expected = [article._scan_introduction(n) for n in lengths]
+        self.assertEqual(expected, article.short_introductions(lengths))
+        self.assertLess(article._breaks.end, 4002)
+
+
+class T1000CompactArticleTests(unittest.TestCase):
+    """Tests for the slot-based CompactArticle."""
+
+    def test_1001_compact_article_behaves_like_article(self):
+        """A CompactArticle should support the same operations as an Article."""
+        content = "'But he has nothing at all on!' at last cried out all the people."
+        article = make_article(content)
+        compact = solution.CompactArticle(
+            title=article.title, author=article.author,
+            publication_date=article.publication_date, content=content,
+        )
+
+        self.assertFalse(hasattr(compact, "__dict__"))
+        self.assertEqual(repr(article).replace("Article", "CompactArticle", 1), repr(compact))
+        self.assertEqual(len(article), len(compact))
+        self.assertEqual(article.short_introduction(20), compact.short_introduction(20))
+        self.assertEqual(article.most_common_words(3), compact.most_common_words(3))
+        self.assertEqual([article, compact], sorted([compact, article], key=lambda a: a.id))
+
+    def test_1002_compact_article_uses_less_memory(self):
+        """A CompactArticle should allocate less memory than an Article."""
+        def allocated(cls: type) -> int:
+            tracemalloc.start()
+            try:
+                articles = [
+                    cls(title="a", author="b", publication_date=datetime.datetime(1837, 4, 7), content="c")
+                    for _ in range(1000)
+                ]
+                return tracemalloc.get_traced_memory()[0]
+            finally:
+                del articles
+                tracemalloc.stop()
+
+        self.assertLess(allocated(solution.CompactArticle), allocated(solution.Article))
+
+    def test_1003_slot_storage_validates_values(self):
+        """An ArticleField with slot storage should validate and store values in its slot."""
+        class SlottedArticle:
+            __slots__ = ("_attribute",)
+            attribute = solution.ArticleField(int, storage="slot")
+
+        article = SlottedArticle()
+        with self.assertRaisesRegex(AttributeError, "'attribute'"):
+            article.attribute
+
+        article.attribute = 10
+        self.assertEqual(10, article.attribute)
+        with self.assertRaises(TypeError):
+            article.attribute = "some string"
+
+    def test_1004_slot_storage_requires_slot(self):
+        """Using slot storage in a class without a matching slot should raise a TypeError."""
+        class SlottedArticle:
+            __slots__ = ()
+
+        # Calling `__set_name__` directly, as a class statement wraps the error
+        # in a RuntimeError before Python 3.12.
+        field = solution.ArticleField(int, storage="slot")
+        with self.assertRaisesRegex(TypeError, "'SlottedArticle' has no slot '_attribute'"):
+            field.__set_name__(SlottedArticle, "attribute")
+
+
+class T1100GenericFieldTests(unittest.TestCase):
+    """Tests for ArticleField validators of typing generics."""
+
+    def make_record(self, field_type: typing.Any, items: typing.Optional[str] = None) -> typing.Any:
+        """Create an instance of a class with a single ArticleField named attribute."""
+        class Record:
+            attribute = solution.ArticleField(field_type, items=items)
+
+        return Record()
+
+    def test_1101_generic_fields_validate_values(self):
+        """Fields with generic types should accept valid values and reject invalid ones."""
+        cases = (
+            (typing.List[str], None, ["a", 1], 1),
+            (typing.List[str], "shallow", ["a", "b"], ["a", 1]),
+            (typing.List[typing.List[int]], "shallow", [["a"]], [("a",)]),
+            (typing.List[typing.List[int]], "deep", [[1, 2]], [["a"]]),
+            (typing.Optional[datetime.datetime], None, None, "2020-07-02"),
+            (typing.Dict[str, int], "deep", {"a": 1}, {"a": "1"}),
+            (typing.Tuple[int, str], "deep", (1, "a"), (1, 2)),
+            (typing.Tuple[int, ...], "deep", (1, 2, 3), (1, "2")),
+            (typing.Any, None, object(), None),
+        )
+
+        for field_type, items, valid, invalid in cases:
+            with self.subTest(field_type=field_type, items=items):
+                record = self.make_record(field_type, items)
+                record.attribute = valid
+                self.assertIs(valid, record.attribute)
+
+                if field_type is not typing.Any:
+                    with self.assertRaises(TypeError):
+                        record.attribute = invalid
+
+    def test_1102_generic_type_error_message(self):
+        """The TypeError message should include the name of the generic type."""
+        record = self.make_record(typing.Optional[typing.Dict[str, int]])
+        msg = (
+            "expected an instance of type 'Optional[Dict[str, int]]' for attribute "
+            "'attribute', got 'list' instead"
+        )
+        with self.assertRaisesRegex(TypeError, re.escape(msg)):
+            record.attribute = []
+
+
+class T1200ArticleTableTests(unittest.TestCase):
+    """Tests for the columnar ArticleTable."""
+
+    def setUp(self) -> None:
+        """Create a table with a few articles before running each test."""
+        self.records = [
+            ("The emperor's new clothes", "Hans Christian Andersen", datetime.datetime(1837, 4, 7, 12, 15),
+             "'But he has nothing at all on!' at last cried out all the people."),
+            ("The little mermaid", "Hans Christian Andersen", datetime.datetime(1837, 4, 7),
+             "Far out in the ocean, where the water is as blue as the prettiest cornflower"),
+            ("The ugly duckling", "Hans Christian Andersen", datetime.datetime(1843, 11, 11, 0, 0, 0, 1), ""),
+        ]
+        self.table = solution.ArticleTable(self.records)
+
+    def test_1201_views_match_articles(self):
+        """Views of the rows should behave like articles created from the same records."""
+        self.assertEqual(3, len(self.table))
+        for view, record in zip(self.table, self.records):
+            article = make_article(title=record[0], author=record[1], publication_date=record[2], content=record[3])
+            with self.subTest(title=record[0]):
+                self.assertEqual(repr(article).replace("Article", "ArticleView", 1), repr(view))
+                self.assertEqual(len(article), len(view))
+                self.assertIsNone(view._materialized_content)
+                self.assertEqual(article.short_introduction(30), view.short_introduction(30))
+                self.assertEqual(article.most_common_words(4), view.most_common_words(4))
+                self.assertEqual(article.content, view.content)
+                self.assertIsNone(view.last_edited)
+
+        self.assertEqual([self.table[1], self.table[0]], sorted([self.table[0], self.table[1]]))
+
+    def test_1202_edits_are_stored_in_table(self):
+        """Editing the content of a view should be visible through other views of the row."""
+        view = self.table[-1]
+        view.content = "It was so glorious out in the country."
+
+        self.assertIsNotNone(self.table[2].last_edited)
+        self.assertEqual("It was so glorious out in the country.", self.table[2].content)
+        self.assertEqual(len(view.content), len(self.table[2]))
+        self.assertEqual(self.records[1][3], self.table[1].content)
+
+    def test_1203_from_articles_keeps_ids(self):
+        """A table created from articles should keep their ids."""
+        articles = [make_article(record[3]) for record in self.records]
+        table = solution.ArticleTable.from_articles(articles)
+        self.assertEqual([article.id for article in articles], [view.id for view in table])
+
+    def test_1204_failed_batch_keeps_columns_in_sync(self):
+        """A record that fails to load shouldn't leave the columns with different lengths."""
+        aware = datetime.datetime(1837, 4, 7, tzinfo=datetime.timezone.utc)
+        records = [self.records[0], self.records[1][:2] + (aware,) + self.records[1][3:]]
+        for batch_size in (1, 2):
+            with self.subTest(batch_size=batch_size):
+                table = solution.ArticleTable(self.records[2:])
+                table.load_batch_size = batch_size
+                with self.assertRaises(ValueError):
+                    table.extend(records)
+
+                # With batches of a single record, the first record was loaded.
+                expected = self.records[2:] + self.records[:1] if batch_size == 1 else self.records[2:]
+                columns = (table.ids, table.titles, table.authors, table.publication_timestamps,
+                           table.last_edited_timestamps, table.offsets[1:])
+                self.assertEqual([len(expected)] * len(columns), [len(column) for column in columns])
+                self.assertEqual([record[3] for record in expected], [view.content for view in table])
+
+
+class T1300ArticleIndexTests(unittest.TestCase):
+    """Tests for the ArticleIndex ordered by publication date."""
+
+    def setUp(self) -> None:
+        """Create articles with shuffled publication dates before running each test."""
+        dates = [datetime.datetime(2020, 1, 1) + datetime.timedelta(days=day % 50) for day in range(200)]
+        random.Random(2020).shuffle(dates)
+        self.articles = [make_article("c", publication_date=date) for date in dates]
+
+    def test_1301_iterates_in_sorted_order(self):
+        """The index should iterate in the same order as sorting the articles."""
+        index = solution.ArticleIndex(self.articles[:100])
+        index.bucket_size = 8
+        for article in self.articles[100:]:
+            index.add(article)
+
+        self.assertEqual(sorted(self.articles), list(index))
+        self.assertEqual(sorted(self.articles)[::-1], list(reversed(index)))
+
+    def test_1302_range_queries(self):
+        """between and latest should return the same articles as filtering a sorted list."""
+        index = solution.ArticleIndex()
+        index.bucket_size = 8
+        for article in self.articles:
+            index.add(article)
+        for article in self.articles[::3]:
+            index.remove(article)
+
+        remaining = sorted(article for article in self.articles if article in index)
+        start, end = datetime.datetime(2020, 1, 10), datetime.datetime(2020, 1, 20)
+        expected = [article for article in remaining if start <= article.publication_date <= end]
+
+        self.assertEqual(len(remaining), len(index))
+        self.assertEqual(expected, list(index.between(start, end)))
+        self.assertEqual(remaining[::-1][:5], index.latest(5))
+        self.assertEqual([], list(index.between(end, start)))
+
+    def test_1303_does_not_use_lt(self):
+        """The index should never compare articles with __lt__."""
+        with mock.patch.object(solution.BaseArticle, "__lt__", side_effect=AssertionError):
+            index = solution.ArticleIndex(self.articles)
+            index.add(make_article("c", publication_date=datetime.datetime(2020, 1, 5)))
+            list(index.between(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 5)))
+
+
+def allocate_ids(allocator: solution.BlockIdAllocator, n_ids: int) -> typing.List[int]:
+    """Allocate `n_ids` ids from `allocator`, used in worker processes and threads."""
+    return [next(allocator) for _ in range(n_ids)]
+
+
+def install_shared_allocator(value: typing.Any) -> None:
+    """Assign an allocator that shares the counter `value` to the articles of a worker process."""
+    solution.BaseArticle.article_id = solution.BlockIdAllocator(
+        solution.SharedValueIdSource(value), block_size=7
+    )
+
+
+def create_article_ids(n_articles: int) -> typing.List[int]:
+    """Create `n_articles` articles in a worker process and return their ids."""
+    return [make_article().id for _ in range(n_articles)]
+
+
+class T1400IdAllocatorTests(unittest.TestCase):
+    """Tests for allocating unique article ids with block leasing."""
+
+    def test_1401_ids_are_unique_across_threads(self):
+        """Ids allocated from multiple threads should be unique."""
+        allocator = solution.BlockIdAllocator(solution.SharedValueIdSource(), block_size=5)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(allocate_ids, [allocator] * 8, [500] * 8))
+
+        ids = [article_id for result in results for article_id in result]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_1402_ids_are_unique_across_processes(self):
+        """Ids allocated from multiple processes should be unique."""
+        value = multiprocessing.Value("q", 0)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=4, initializer=install_shared_allocator, initargs=(value,)
+        ) as pool:
+            results = list(pool.map(create_article_ids, [100] * 8))
+
+        ids = [article_id for result in results for article_id in result]
+        self.assertEqual(800, len(set(ids)))
+
+    def test_1403_file_source_leases_consecutive_blocks(self):
+        """A file-based source should continue where the previous lease ended."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "ids")
+            first = solution.FileIdSource(path, start=10)
+            second = solution.FileIdSource(path)
+
+            self.assertEqual(range(10, 15), first.lease(5))
+            self.assertEqual(range(15, 18), second.lease(3))
+
+    def test_1404_article_uses_allocator(self):
+        """Articles should get their ids from the allocator assigned to article_id."""
+        allocator = solution.BlockIdAllocator(solution.SharedValueIdSource(start=1000))
+        with mock.patch.object(solution.BaseArticle, "article_id", allocator):
+            self.assertEqual(1000, make_article().id)
+            self.assertEqual(1001, make_article().id)
+
+
+class T1500RevisionLogTests(unittest.TestCase):
+    """Tests for the delta-compressed revision log."""
+
+    edits = (
+        "'But he has nothing at all on!'",
+        "'But he has nothing at all on!' at last cried out all the people.",
+        "'But he has nothing on!' at last cried out all the people.",
+        "'But he has nothing on!' at last cried out all the people. The Emperor was vexed",
+        "The Emperor was vexed",
+        "The Emperor was vexed, for he knew that the people were right.",
+        "",
+        "However, he thought the procession must go on now!",
+    )
+
+    def test_1501_rebuilds_every_revision(self):
+        """Every recorded revision should be rebuilt exactly."""
+        article = make_article(self.edits[0])
+        log = article.enable_revisions(snapshot_interval=3)
+        for content in self.edits[1:]:
+            article.content = content
+
+        self.assertEqual(len(self.edits) - 1, log.latest)
+        self.assertEqual(list(self.edits), [log[number] for number in range(len(self.edits))])
+        self.assertEqual(article.last_edited, log.info()[-1].timestamp)
+
+        # At most `snapshot_interval - 1` deltas follow each snapshot.
+        snapshots = [info.number for info in log.info() if info.snapshot]
+        self.assertTrue(all(b - a <= 3 for a, b in zip(snapshots, snapshots[1:] + [log.latest + 1])))
+
+    def test_1502_deltas_are_compact(self):
+        """Appending to a large article should only store the appended text."""
+        article = make_article("x" * 100000)
+        log = article.enable_revisions()
+        article.append(" and a little more")
+
+        self.assertEqual(solution.Delta(prefix=100000, suffix=0, text=" and a little more"), log._entries[1][1])
+
+    def test_1503_eviction(self):
+        """Evicting old revisions should keep the remaining revisions intact."""
+        log = solution.RevisionLog(self.edits[0], snapshot_interval=4, max_revisions=3)
+        for content in self.edits[1:]:
+            log.record(content)
+
+        self.assertEqual(3, len(log))
+        self.assertEqual(len(self.edits) - 3, log.first)
+        self.assertEqual(list(self.edits[-3:]), [log[number] for number in range(log.first, log.latest + 1)])
+        with self.assertRaises(IndexError):
+            log.get(0)
+
+    def test_1504_eviction_by_age(self):
+        """Revisions older than max_age should be evicted."""
+        start = datetime.datetime(2020, 7, 2)
+        log = solution.RevisionLog("a", timestamp=start, max_age=datetime.timedelta(hours=1))
+        log.record("ab", start + datetime.timedelta(minutes=30))
+        log.record("abc", start + datetime.timedelta(minutes=90))
+
+        self.assertEqual(1, log.first)
+        self.assertEqual(["ab", "abc"], [log[1], log[2]])
+
+
+class T1600ContentReferenceTests(unittest.TestCase):
+    """Tests for lazily loaded, file-backed article content."""
+
+    def setUp(self) -> None:
+        """Write a few contents to a single archive file before running each test."""
+        self.contents = (
+            "'But he has nothing at all on!' at last cried out all the people.",
+            "Café naïve: the Emperor was vexed, for he knew that the people were right.",
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = pathlib.Path(directory.name, "archive.bin")
+
+        self.cache = solution.ContentCache(max_entries=1)
+        self.references = []
+        with open(self.path, "wb") as file:
+            file.write(b"header")
+            for content in self.contents:
+                data = content.encode("utf-8")
+                self.references.append(solution.ContentReference(
+                    self.path, file.tell(), len(data), characters=len(content), cache=self.cache
+                ))
+                file.write(data)
+
+    def test_1601_len_does_not_load_content(self):
+        """len() of an article with referenced content should not read the file."""
+        articles = [make_article(reference) for reference in self.references]
+        with mock.patch.object(solution.ContentReference, "load", side_effect=AssertionError):
+            self.assertEqual([len(content) for content in self.contents], [len(a) for a in articles])
+
+    def test_1602_content_is_loaded_once(self):
+        """The content should be loaded on first access and served from the cache afterwards."""
+        article = make_article(self.references[1])
+        expected = make_article(self.contents[1])
+
+        self.assertEqual(expected.short_introduction(20), article.short_introduction(20))
+        self.assertEqual(expected.short_introduction(40), article.short_introduction(40))
+        self.assertEqual(expected.most_common_words(3), article.most_common_words(3))
+        self.assertEqual(self.contents[1], article.content)
+        self.assertEqual(solution.CacheInfo(hits=3, misses=1), self.cache.cache_info())
+
+    def test_1603_cache_is_bounded(self):
+        """Loading more contents than the cache holds should evict the least recently used."""
+        for reference in self.references + self.references[:1]:
+            reference.read()
+
+        self.assertEqual(solution.CacheInfo(hits=0, misses=3), self.cache.cache_info())
+        self.assertEqual(1, len(self.cache._contents))
+
+
+class T1700ArchiveTests(unittest.TestCase):
+    """Tests for the binary article archive format."""
+
+    def setUp(self) -> None:
+        """Create a few articles with different kinds of dates before running each test."""
+        self.articles = [
+            make_article("'But he has nothing at all on!' at last cried out all the people."),
+            make_article(
+                "Café naïve: the Emperor was vexed.",
+                title="Keiserens nye Klæder",
+                publication_date=datetime.datetime(
+                    1837, 4, 7, 12, 15, tzinfo=datetime.timezone(datetime.timedelta(hours=1))
+                ),
+            ),
+            make_article(""),
+        ]
+        self.articles[0].content += " The end."
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = pathlib.Path(directory.name, "articles.arc")
+
+    def assertArticlesEqual(self, expected, actual) -> None:
+        """Assert that two lists of articles have the same fields."""
+        fields = ("id", "title", "author", "publication_date", "last_edited", "content")
+        self.assertEqual(
+            [[getattr(article, field) for field in fields] for article in expected],
+            [[getattr(article, field) for field in fields] for article in actual],
+        )
+
+    def test_1701_streaming_round_trip(self):
+        """Articles read back one at a time should have the same fields and ids."""
+        buffer = io.BytesIO()
+        self.assertEqual(3, archive.dump_articles(self.articles, buffer))
+        buffer.seek(0)
+        self.assertArticlesEqual(self.articles, list(archive.iter_articles(buffer)))
+
+    def test_1702_random_access(self):
+        """The index footer should allow reading any article directly."""
+        archive.dump_articles(self.articles, self.path)
+        with archive.ArticleArchive(self.path) as articles:
+            self.assertEqual(3, len(articles))
+            self.assertArticlesEqual(self.articles[::-1], [articles[-1], articles[1], articles[0]])
+            self.assertArticlesEqual(self.articles, list(articles))
+
+    def test_1703_lazy_content(self):
+        """Lazily loaded articles should only read their content when it's needed."""
+        archive.dump_articles(self.articles, self.path)
+        with archive.ArticleArchive(self.path, lazy=True) as articles:
+            article = articles[1]
+            with mock.patch.object(solution.ContentReference, "load", side_effect=AssertionError):
+                self.assertEqual(len(self.articles[1]), len(article))
+            self.assertArticlesEqual(self.articles, list(articles))
+
+    def test_1704_invalid_archives_are_rejected(self):
+        """Truncated files and files in other formats should raise an ArchiveError."""
+        buffer = io.BytesIO()
+        archive.dump_articles(self.articles, buffer)
+        data = buffer.getvalue()
+        for name, corrupt in (("other format", b"PK" + data[2:]), ("truncated", data[:-30])):
+            with self.subTest(name):
+                self.path.write_bytes(corrupt)
+                with self.assertRaises(archive.ArchiveError):
+                    archive.ArticleArchive(self.path)
+                with self.assertRaises(archive.ArchiveError):
+                    list(archive.iter_articles(self.path))
+
+    def test_1705_raw_stream_is_left_open(self):
+        """Reading from an unbuffered stream shouldn't close the stream of the caller."""
+        archive.dump_articles(self.articles, self.path)
+        with open(self.path, "rb", buffering=0) as file:
+            articles = archive.iter_articles(file)
+            self.assertArticlesEqual(self.articles[:1], [next(articles)])
+            del articles
+            self.assertFalse(file.closed)
+
+    def test_1706_failed_dump_is_not_finished(self):
+        """An archive whose writer raised an exception shouldn't look like a complete archive."""
+        def articles():
+            yield self.articles[0]
+            raise RuntimeError("the source failed")
+
+        with self.assertRaises(RuntimeError):
+            archive.dump_articles(articles(), self.path)
+        with self.assertRaises(archive.ArchiveError):
+            archive.ArticleArchive(self.path)
+        with self.assertRaises(archive.ArchiveError):
+            list(archive.iter_articles(self.path))
+
+
+class T1800IngestionPipelineTests(unittest.TestCase):
+    """Tests for the asyncio ingestion pipeline."""
+
+    def setUp(self) -> None:
+        """Create some raw records and a log of the records read from the source."""
+        self.records = [
+            {
+                "title": f"Article {index}",
+                "author": "Hans Christian Andersen",
+                "publication_date": "1837-04-07T12:15:00",
+                "content": f"The Emperor {'was vexed ' * index}and the people were right.",
+            }
+            for index in range(20)
+        ]
+        self.read = []
+
+    async def source(self, fail_at: typing.Optional[int] = None) -> typing.AsyncIterator[dict]:
+        """An in-process stand-in for a feed that yields control between records."""
+        for index, record in enumerate(self.records):
+            await asyncio.sleep(0)
+            if index == fail_at:
+                raise ConnectionError("the feed went away")
+            self.read.append(index)
+            yield record
+
+    def collect(self, max_concurrency: int = 4, **kwargs) -> typing.List[pipeline.IngestedArticle]:
+        """Run the pipeline over the source and return the results in a list."""
+        async def run():
+            results = []
+            async for result in pipeline.ingest(self.source(), max_concurrency=max_concurrency, **kwargs):
+                # Simulate a slow consumer, which should slow the source down.
+                for _ in range(5):
+                    await asyncio.sleep(0)
+                results.append(result)
+                self.assertLessEqual(len(self.read) - len(results), max_concurrency)
+            return results
+
+        return asyncio.run(run())
+
+    def test_1801_articles_and_stats(self):
+        """The pipeline should yield the articles in order with the same stats as computing them directly."""
+        results = self.collect(introduction_length=20, n_words=3)
+
+        self.assertEqual([record["title"] for record in self.records], [r.article.title for r in results])
+        for record, result in zip(self.records, results):
+            expected = make_article(record["content"])
+            self.assertEqual(expected.short_introduction(20), result.short_introduction)
+            self.assertEqual(expected.most_common_words(3), result.most_common_words)
+            self.assertEqual(datetime.datetime(1837, 4, 7, 12, 15), result.article.publication_date)
+
+    def test_1802_stats_are_cached(self):
+        """The words should be counted once, in the executor, and not again by the article."""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            results = self.collect(executor=executor)
+
+        article = results[3].article
+        with mock.patch.object(article.tokenizer, "count", side_effect=AssertionError):
+            with mock.patch.object(solution, "find_breaks", side_effect=AssertionError):
+                article.most_common_words(5)
+                article.short_introduction(30)
+        self.assertEqual(solution.find_breaks(article.content), article.break_index())
+        self.assertEqual(solution.CacheInfo(hits=2, misses=1), article.cache_info())
+
+    def test_1803_backpressure(self):
+        """The pipeline should never read more than `max_concurrency` records ahead of the consumer."""
+        for max_concurrency in (1, 3):
+            with self.subTest(max_concurrency=max_concurrency):
+                self.read.clear()
+                self.assertEqual(len(self.records), len(self.collect(max_concurrency=max_concurrency)))
+
+    def test_1804_errors_are_propagated(self):
+        """Errors in the source or in building an article should stop the pipeline."""
+        def build(record):
+            if record["title"] == "Article 5":
+                raise ValueError("bad record")
+            return pipeline.build_article(record)
+
+        async def run(records, **kwargs):
+            return [result async for result in pipeline.ingest(records, **kwargs)]
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run(self.source(), build=build))
+        with self.assertRaises(ConnectionError):
+            asyncio.run(run(self.source(fail_at=7)))
+
+
+class T1900TestRunnerTests(unittest.TestCase):
+    """Tests for the parallel mode and the timings of the test runner."""
+
+    def run_report(self, workers: int) -> typing.Tuple[str, dict]:
+        """Run two test classes of this module and return the report and the results."""
+        suite = unittest.TestSuite(
+            unittest.defaultTestLoader.loadTestsFromTestCase(test_class)
+            for test_class in (T400WordCountCacheTests, T900BreakIndexTests)
+        )
+        runner = run_tests.QualifierTestRunner(workers=workers)
+        runner.stream = run_tests.StreamWrapper(io.StringIO(), max_width=run_tests.CONSOLE_WIDTH)
+
+        results = {}
+        with mock.patch.object(runner, "write_footer", lambda result, duration: results.update(result.results)):
+            runner.run(suite)
+
+        report = runner.stream.getvalue()
+        return report[report.index("\n\n"):], results
+
+    def test_1901_parallel_report_matches_serial_report(self):
+        """The report and results of a parallel run should be identical to those of a serial run."""
+        serial_report, serial_results = self.run_report(workers=1)
+        parallel_report, parallel_results = self.run_report(workers=2)
+
+        self.assertEqual(serial_report, parallel_report)
+        self.assertEqual(list(serial_results.items()), list(parallel_results.items()))
+        self.assertEqual(2, len(parallel_results))
+
+    def test_1902_timings(self):
+        """Every test and subtest should be timed, and the timings written to a JSON file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = pathlib.Path(directory.name, "timings.json")
+
+        runner = run_tests.QualifierTestRunner(slowest=3, timings_path=str(path))
+        runner.stream = run_tests.StreamWrapper(io.StringIO(), max_width=run_tests.CONSOLE_WIDTH)
+        result = runner.run(unittest.defaultTestLoader.loadTestsFromTestCase(T500TokenizerTests))
+
+        tests = [timing for timing in result.timings if timing.subtest is None]
+        subtests = [timing for timing in result.timings if timing.subtest is not None]
+        self.assertEqual(result.testsRun, len(tests))
+        self.assertTrue(subtests)
+        self.assertTrue(all(timing.wall >= 0 and timing.cpu >= 0 for timing in result.timings))
+
+        report = json.loads(path.read_text())
+        self.assertEqual([list(timing) for timing in result.timings], [list(t.values()) for t in report["tests"]])
+        self.assertEqual(result.section_times(), report["sections"])
+        self.assertIn("Slowest 3 tests and subtests", runner.stream.getvalue())
+
+    def write_test_module(self, source: str) -> str:
+        """Write `source` to a temporary test module that the workers can import and return its name."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        name = f"runner_tests_{self.id().rsplit('_', 1)[-1]}"
+        pathlib.Path(directory.name, f"{name}.py").write_text(source)
+
+        sys.path.insert(0, directory.name)
+        self.addCleanup(sys.path.remove, directory.name)
+        self.addCleanup(sys.modules.pop, name, None)
+        return name
+
+    def run_quietly(self, suite: unittest.TestSuite, workers: int) -> run_tests.QualifierTestResult:
+        """Run `suite` with a runner that writes to a buffer and return the result."""
+        runner = run_tests.QualifierTestRunner(workers=workers)
+        runner.stream = run_tests.StreamWrapper(io.StringIO(), max_width=run_tests.CONSOLE_WIDTH)
+        return runner.run(suite)
+
+    def test_1903_parallel_failures_are_merged(self):
+        """A parallel run should record the failing test cases with their tracebacks."""
+        suite = unittest.defaultTestLoader.loadTestsFromName(self.write_test_module(
+            "import unittest\n"
+            "class Failing(unittest.TestCase):\n"
+            "    '''A failing test class.'''\n"
+            "    def test_fails(self):\n"
+            "        '''A test that fails.'''\n"
+            "        with self.subTest(x=1):\n"
+            "            self.fail('failing on purpose')\n"
+        ))
+        failing_test = next(iter(run_tests.group_by_test_class(suite)[0]))
+
+        result = self.run_quietly(suite, workers=2)
+        self.assertEqual(1, len(result.failures))
+        test, traceback = result.failures[0]
+        self.assertIs(failing_test, test)
+        self.assertIn("AssertionError: failing on purpose", traceback)
+
+    def test_1904_fixture_errors_and_local_classes(self):
+        """Errors in setUpClass should be reported, and classes that workers can't import run in this process."""
+        name = self.write_test_module(
+            "import unittest\n"
+            "class BrokenFixture(unittest.TestCase):\n"
+            "    '''A test class with a failing fixture.'''\n"
+            "    @classmethod\n"
+            "    def setUpClass(cls):\n"
+            "        raise RuntimeError('broken fixture')\n"
+            "    def test_never_runs(self):\n"
+            "        '''A test that never runs.'''\n"
+        )
+
+        class LocalTests(unittest.TestCase):
+            """A test class that can't be imported by a worker."""
+
+            def test_local(self):
+                """A passing test."""
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                # Running a suite empties it, so every run needs a new one.
+                suite = unittest.defaultTestLoader.loadTestsFromName(name)
+                suite.addTests(unittest.defaultTestLoader.loadTestsFromTestCase(LocalTests))
+                result = self.run_quietly(suite, workers=workers)
+                self.assertEqual(1, result.testsRun)
+                self.assertEqual(1, len(result.errors))
+                fixture, traceback = result.errors[0]
+                self.assertIn("setUpClass", fixture.id())
+                self.assertIn("RuntimeError: broken fixture", traceback)
+                self.assertEqual({"A passing test": True}, result.results["A test class that can't be imported by a worker"])
+
+    def test_1905_slowest_table(self):
+        """Tests with a single subtest should be listed once, and subtest parameters shouldn't be cut off."""
+        runner = run_tests.QualifierTestRunner(slowest=10)
+        runner.stream = run_tests.StreamWrapper(io.StringIO(), max_width=run_tests.CONSOLE_WIDTH)
+        result = run_tests.QualifierTestResult(runner.stream)
+        result.timings = [
+            run_tests.TestTiming("Section", "Single subtest", "(n=1)", 0.5, 0.5),
+            run_tests.TestTiming("Section", "Single subtest", None, 0.6, 0.6),
+            run_tests.TestTiming("Section", "Two subtests", "[complexity of a long computation] (n=1000)", 0.3, 0.3),
+            run_tests.TestTiming("Section", "Two subtests", "[complexity of a long computation] (n=2000)", 0.4, 0.4),
+            run_tests.TestTiming("Section", "Two subtests", None, 0.7, 0.7),
+        ]
+        runner.write_slowest(result)
+
+        table = runner.stream.getvalue()
+        self.assertIn("Slowest 4 tests and subtests", table)
+        self.assertEqual(1, table.count("Single subtest"))
+        self.assertIn("Single subtest (n=1)", table)
+        self.assertIn("Two subtests [complexity of a long compu...] (n=2000)", table)
+
+        self.assertEqual("[complexity] (...)", run_tests.shorten_subtest("[complexity] (text='" + "a" * 40 + "')", 40))
+
+    def test_1906_shared_sections_and_subtest_timings(self):
+        """Classes that share a section should all be reported, and subtests shouldn't be timed with setUp."""
+        name = self.write_test_module(
+            "import time\n"
+            "import unittest\n"
+            "class First(unittest.TestCase):\n"
+            "    '''A shared section.'''\n"
+            "    def setUp(self):\n"
+            "        time.sleep(0.05)\n"
+            "    def test_first(self):\n"
+            "        '''The first test.'''\n"
+            "        with self.subTest(n=1):\n"
+            "            pass\n"
+            "class Second(unittest.TestCase):\n"
+            "    '''A shared section.'''\n"
+            "    def test_second(self):\n"
+            "        '''The second test.'''\n"
+        )
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                result = self.run_quietly(unittest.defaultTestLoader.loadTestsFromName(name), workers=workers)
+                self.assertEqual({"The first test": True, "The second test": True}, result.results["A shared section"])
+
+                first = [timing for timing in result.timings if timing.test == "The first test"]
+                [subtest] = [timing for timing in first if timing.subtest is not None]
+                [test] = [timing for timing in first if timing.subtest is None]
+                self.assertLess(subtest.wall, 0.05)
+                self.assertGreaterEqual(test.wall, 0.05)
+
+
+class T2000BenchmarkSuiteTests(unittest.TestCase):
+    """Tests for the complexity fit and baseline comparison of the benchmark suite."""
+
+    def test_2001_fit_exponent(self):
+        """The fitted exponent should match the exponent of a power law."""
+        sizes = [2 ** 10, 2 ** 12, 2 ** 14, 2 ** 16]
+        for exponent in (0, 1, 2):
+            with self.subTest(exponent=exponent):
+                seconds = [3e-6 * size ** exponent for size in sizes]
+                self.assertAlmostEqual(exponent, benchmark_suite.fit_exponent(sizes, seconds))
+
+        n_log_n = [size * math.log(size) for size in sizes]
+        self.assertTrue(1 < benchmark_suite.fit_exponent(sizes, n_log_n) < 1 + benchmark_suite.EXPONENT_TOLERANCE)
+
+    def test_2002_slowdown(self):
+        """The slowdown should be the geometric mean of the ratios against the baseline."""
+        measurement = benchmark_suite.Measurement(sizes=[1, 2], seconds=[2.0, 8.0], exponent=2.0)
+        self.assertAlmostEqual(2.0, benchmark_suite.slowdown(measurement, {"sizes": [1, 2], "seconds": [2.0, 2.0]}))
+        self.assertIsNone(benchmark_suite.slowdown(measurement, {"sizes": [1, 4], "seconds": [2.0, 2.0]}))
+
+
+class T2100InstrumentationTests(unittest.TestCase):
+    """Tests for the opt-in instrumentation of the hot paths."""
+
+    def setUp(self) -> None:
+        """Create an instrumentation that is disabled after each test."""
+        self.instrumentation = instrumentation.Instrumentation()
+        self.addCleanup(self.instrumentation.disable)
+
+    def test_2101_calls_are_recorded(self):
+        """Enabled instrumentation should record call counts, latencies, and input sizes."""
+        class Record(solution.FieldRecord):
+            title = solution.ArticleField(str)
+            views = solution.ArticleField(int)
+
+        article = make_article("'But he has nothing at all on!' at last cried out all the people.")
+        with self.instrumentation:
+            Record(title="The emperor's new clothes", views=0).update(views=1)
+            article.most_common_words(3)
+            article.short_introduction(20)
+            article.short_introduction(n_characters=30)
+            with self.assertRaises(TypeError):
+                solution.CompactArticle(title=1, author="b", publication_date=datetime.datetime.now(), content="")
+
+        stats = self.instrumentation.snapshot()
+        self.assertEqual(1, stats["most_common_words"].calls)
+        self.assertEqual(2, stats["short_introduction"].calls)
+        self.assertEqual(2 * len(article), stats["short_introduction"].total_size)
+        self.assertEqual(len(article), stats["short_introduction"].max_size)
+        self.assertEqual(1, stats["ArticleField.__set__"].calls)
+        self.assertEqual((2, 3), (stats["FieldPlan"].calls, stats["FieldPlan"].total_size))
+        for name, method_stats in stats.items():
+            with self.subTest(name):
+                self.assertEqual(method_stats.calls, sum(method_stats.histogram.values()))
+                self.assertLessEqual(method_stats.max_seconds, method_stats.total_seconds)
+
+        self.instrumentation.reset()
+        self.assertEqual({0}, {method_stats.calls for method_stats in self.instrumentation.snapshot().values()})
+
+    def test_2102_sinks(self):
+        """Every instrumented call should be passed to the sinks."""
+        events = []
+        self.instrumentation.add_sink(events.append)
+        with self.instrumentation:
+            make_article("Once upon a time").short_introduction(4)
+
+        self.assertEqual([("short_introduction", 16)], [(event.name, event.size) for event in events])
+
+    def test_2103_disabled_instrumentation_is_free(self):
+        """Disabling the instrumentation should restore the original methods."""
+        originals = {name: getattr(solution.BaseArticle, name) for name in ("most_common_words", "short_introduction")}
+        original_set = solution.ArticleField.__set__
+
+        with self.instrumentation:
+            self.assertIsNot(original_set, solution.ArticleField.__set__)
+            with self.assertRaises(RuntimeError):
+                instrumentation.Instrumentation().enable()
+
+        self.assertIs(original_set, solution.ArticleField.__set__)
+        self.assertIs(solution.CompactArticle.field_plan.update, vars(solution.CompactArticle)["update"])
+        for name, original in originals.items():
+            self.assertIs(original, getattr(solution.BaseArticle, name))
+
+        make_article("Not recorded").most_common_words(1)
+        self.assertEqual(0, self.instrumentation.snapshot()["most_common_words"].calls)
+
+    def test_2104_failed_enable_restores_methods(self):
+        """If replacing a method fails, the methods that were already replaced should be restored."""
+        original = vars(solution.BaseArticle)["most_common_words"]
+        missing = ("missing", solution.BaseArticle, "missing_method", instrumentation.article_size)
+        hooks = instrumentation.HOOKS + (missing,)
+        failing = instrumentation.Instrumentation(hooks=hooks)
+
+        with self.assertRaises(KeyError):
+            failing.enable()
+        self.assertFalse(failing.enabled)
+        self.assertIs(original, vars(solution.BaseArticle)["most_common_words"])
+        self.instrumentation.enable()
+
+    def test_2105_overflow_bucket(self):
+        """The last bucket of the histogram should count every call too long for the other buckets."""
+        recorder = instrumentation._MethodRecorder()
+        for elapsed_ns in (2 ** 37, 2 ** 38, 2 ** 45):
+            recorder.record(elapsed_ns, None)
+
+        self.assertEqual({2 ** 38 / 1e9: 1, float("inf"): 2}, recorder.stats().histogram)
+
+
+class T2200UnicodeTokenizerTests(unittest.TestCase):
+    """Tests for the opt-in Unicode word mode."""
+
+    content = (
+        "Die STRASSE und die Straße. Naïve cafe\u0301s, «naïve» CAFÉS!\u00a0"
+        "Ο αυτοκράτορας, ο ΑΥΤΟΚΡΆΤΟΡΑΣ; король и КОРОЛЬ: 2020_ready"
+    )
+
+    def setUp(self) -> None:
+        """Create an article that counts its words with the Unicode tokenizer."""
+        self.article = make_article(self.content)
+        self.article.tokenizer = tokenizers.UnicodeTokenizer()
+
+    def test_2201_unicode_words(self):
+        """Words in any script should be casefolded and not split on accents or marks."""
+        # Casefolding maps the final sigma to a regular sigma, so both
+        # spellings of the Greek word are counted together.
+        self.assertEqual(
+            {
+                "die": 2, "strasse": 2, "und": 1, "naïve": 2, "cafe\u0301s": 1, "cafés": 1,
+                "ο": 2, "αυτοκράτορασ": 2, "король": 2, "и": 1, "ready": 1,
+            },
+            self.article.word_counts(),
+        )
+        self.assertEqual({"die": 2, "strasse": 2}, self.article.most_common_words(2))
+
+    def test_2202_count_matches_split(self):
+        """The bulk count should match counting the words from split, including their order."""
+        rng = random.Random(2020)
+        alphabet = "ab é»« \u0301xyZ.1_Ωλ\u00a0\n"
+        tokenizer = tokenizers.UnicodeTokenizer()
+        for _ in range(20):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randrange(200)))
+            with self.subTest(text=text):
+                expected = collections.Counter(tokenizer.words(text))
+                self.assertEqual(list(expected.items()), list(tokenizer.count(text).items()))
+
+    def test_2203_appends_and_chunks(self):
+        """Appending to and streaming the content should give the same counts as counting it at once."""
+        tokenizer = self.article.tokenizer
+        self.article.word_counts()
+        self.article.append("ße und mehr")
+        self.assertEqual(tokenizer.count(self.content + "ße und mehr"), self.article.word_counts())
+
+        chunks = [self.content[index:index + 7] for index in range(0, len(self.content), 7)]
+        self.assertEqual(tokenizer.count(self.content), tokenizer.count_chunks(chunks))
+
+
+class T2300WordIndexTests(unittest.TestCase):
+    """Tests for the inverted word index."""
+
+    def setUp(self) -> None:
+        """Index a few articles before running each test."""
+        self.articles = [
+            make_article("The Emperor's new clothes. The emperor was vexed."),
+            make_article("The people were right, but the procession went on."),
+            make_article("An emperor and his people: the people laughed at the emperor's clothes."),
+        ]
+        self.index = solution.WordIndex(self.articles)
+
+    def assertMatchesRebuiltIndex(self) -> None:
+        """Assert that the postings of the index are the same as those of a new index."""
+        rebuilt = solution.WordIndex(self.articles)
+        self.assertEqual(
+            {word: list(postings.items()) for word, postings in rebuilt._postings.items()},
+            {word: list(postings.items()) for word, postings in self.index._postings.items()},
+        )
+
+        # Building the second index registered another listener on the articles.
+        for article in self.articles:
+            rebuilt.remove(article)
+
+    def test_2301_queries(self):
+        """AND, OR, and top-k queries should use the same words as most_common_words."""
+        first, second, third = self.articles
+        self.assertEqual([(first.id, 2), (third.id, 2)], self.index.postings("EMPEROR"))
+        self.assertEqual([third], self.index.search_all("emperor", "people"))
+        self.assertEqual(self.articles, self.index.search_any("clothes", "procession"))
+        self.assertEqual([], self.index.search_all("emperor", "unicorn"))
+        self.assertEqual([(third, 4), (second, 3)], self.index.top(2, "the", "people"))
+
+    def test_2302_edits_update_the_index(self):
+        """Editing the content should update the index without a rebuild."""
+        first, second, third = self.articles
+        first.content = "A completely different story about a unicorn."
+        self.assertEqual([first], self.index.search_any("unicorn"))
+        self.assertEqual([third], self.index.search_any("emperor"))
+        self.assertMatchesRebuiltIndex()
+
+        # Appends only count the words of the appended text.
+        with mock.patch.object(second.tokenizer, "count", side_effect=AssertionError):
+            second.append(" The emperor followed.")
+        self.assertEqual([second, third], self.index.search_any("emperor"))
+        self.assertMatchesRebuiltIndex()
+
+        self.index.remove(third)
+        third.content = "emperor"
+        self.assertEqual([second], self.index.search_all("emperor"))
+        self.assertNotIn(third, self.index)
+
+    def test_2303_compact_postings(self):
+        """Postings should store delta-encoded ids in the smallest array type that fits."""
+        ids = [3, 10, 250, 100000, 2 ** 40]
+        postings = solution.Postings([(article_id, 1) for article_id in ids[:3]])
+        self.assertEqual(("B", "B"), (postings.deltas.typecode, postings.frequencies.typecode))
+
+        for article_id in ids[3:]:
+            postings.set(article_id, 300)
+        postings.set(5, 2)
+        self.assertEqual([3, 5, 10, 250, 100000, 2 ** 40], postings.ids())
+        self.assertEqual([1, 2, 1, 1, 300, 300], list(postings.frequencies))
+        self.assertEqual(8, postings.deltas.itemsize)
+
+        postings.remove(10)
+        postings.remove(3)
+        self.assertEqual([(5, 2), (250, 1), (100000, 300), (2 ** 40, 300)], list(postings.items()))
+        with self.assertRaises(KeyError):
+            postings.remove(10)
+
+
+class T2400InternPoolTests(unittest.TestCase):
+    """Tests for deduplicating repeated strings through an interning pool."""
+
+    @staticmethod
+    def copy(value: str) -> str:
+        """Return an equal string that's a separate object, like a deserialized value."""
+        return "".join(list(value))
+
+    def test_2401_fields_are_deduplicated(self):
+        """Equal strings assigned through an ArticleField or Article.__init__ should be shared."""
+        pool = solution.InternPool()
+
+        class InternedArticle(solution.Article):
+            intern_pool = pool
+
+        class Holder:
+            author = solution.ArticleField(str, intern=pool)
+
+        author = "Hans Christian Andersen"
+        first = InternedArticle(title="a", author=self.copy(author), publication_date=datetime.datetime.now(), content="")
+        second = InternedArticle(title="b", author=self.copy(author), publication_date=datetime.datetime.now(), content="")
+        holder = Holder()
+        holder.author = self.copy(author)
+
+        self.assertIs(first.author, second.author)
+        self.assertIs(first.author, holder.author)
+        info = pool.info()
+        self.assertEqual((3, 2, 3), (info.entries, info.hits, info.misses))
+        self.assertEqual(2 * sys.getsizeof(author), info.bytes_saved)
+
+    def test_2402_unused_strings_are_released(self):
+        """Strings should be pruned from the pool once their articles are gone."""
+        pool = solution.InternPool(max_entries=8)
+        articles = [
+            solution.CompactArticle(
+                title=self.copy(f"title {index}"), author=self.copy("author"),
+                publication_date=datetime.datetime.now(), content="",
+            )
+            for index in range(4)
+        ]
+        for article in articles:
+            pool.intern(article.title)
+
+        del articles[:2]
+        self.assertEqual(2, pool.prune())
+        self.assertEqual(2, len(pool))
+
+    def test_2403_pool_is_bounded(self):
+        """A full pool should prune and evict strings to stay within its size."""
+        pool = solution.InternPool(max_entries=10)
+        kept = [pool.intern(self.copy(f"kept {index}")) for index in range(10)]
+        for index in range(100):
+            pool.intern(self.copy(f"temporary {index}"))
+            self.assertLessEqual(len(pool), 10)
+
+        # The temporary strings are pruned as soon as they're no longer used,
+        # but the first shrink has to evict the oldest strings that are kept.
+        for value in kept[-5:]:
+            with self.subTest(value=value):
+                self.assertIs(value, pool.intern(self.copy(value)))
+        self.assertIsNot(kept[0], pool.intern(self.copy(kept[0])))
+
+    @unittest.skipIf(solution.POOL_REFERENCES is None, "pruning relies on CPython reference counts")
+    def test_2404_prune_only_removes_unused_strings(self):
+        """Strings should stay in the pool until they're pruned, and only unused strings should be pruned."""
+        pool = solution.InternPool()
+        in_list = [pool.intern(self.copy("in a list"))]
+        in_dict = {"key": pool.intern(self.copy("in a dict"))}
+        for value in ("unused 1", "unused 2"):
+            pool.intern(self.copy(value))
+
+        # Nothing is pruned before the pool is full or `prune` is called.
+        self.assertEqual(4, len(pool))
+        self.assertEqual(2, pool.prune())
+        self.assertEqual(0, pool.prune())
+        self.assertIs(in_list[0], pool.intern(self.copy("in a list")))
+        self.assertIs(in_dict["key"], pool.intern(self.copy("in a dict")))
+
+        del in_list[0]
+        self.assertEqual(1, pool.prune())
+        self.assertEqual(1, len(pool))
+
+
+class T2500SharedMemoryTests(unittest.TestCase):
+    """Tests for sending articles to worker processes through shared memory."""
+
+    def setUp(self):
+        self.articles = [
+            make_article("Der Kaiser, der Kaiser hat ja gar nichts an!", title="Des Kaisers neue Kleider"),
+            make_article(""),
+            make_article("Emperor " * 1000),
+        ]
+
+    def test_2501_workers_read_articles_from_shared_memory(self):
+        """Articles opened from handles in a worker should behave like the originals."""
+        expected = [
+            (article.id, len(article), article.short_introduction(20), article.most_common_words(2))
+            for article in self.articles
+        ]
+        with shared_articles.SharedArticleBlock(self.articles) as block:
+            with concurrent.futures.ProcessPoolExecutor(1) as executor:
+                self.assertEqual(expected, executor.submit(shared_article_stats, block.handles).result())
+
+    def test_2502_articles_share_the_block(self):
+        """Opened articles should keep their fields and stream their content from the block."""
+        self.articles[0].last_edited = datetime.datetime(2020, 7, 1)
+        with shared_articles.SharedArticleBlock(self.articles) as block, shared_articles.SharedArticleReader() as reader:
+            article = reader.article(block.handles[0])
+            self.assertIsInstance(article._content, solution.ContentStream)
+            self.assertEqual(self.articles[0].content, article.content)
+            for field in ("id", "title", "author", "publication_date", "last_edited"):
+                self.assertEqual(getattr(self.articles[0], field), getattr(article, field))
+
+        self.assertEqual(len(self.articles[0]), len(article))
+        with self.assertRaises(ValueError):
+            article.content
+
+    def test_2503_blocks_are_unlinked(self):
+        """Exiting the block should unlink it, and a closed reader shouldn't open handles."""
+        with shared_articles.SharedArticleBlock(self.articles) as block:
+            reader = shared_articles.SharedArticleReader()
+            reader.article(block.handles[2]).most_common_words(1)
+            reader.close()
+            with self.assertRaises(ValueError):
+                reader.article(block.handles[2])
+
+        self.assertTrue(block.closed and block.unlinked)
+        with self.assertRaises(FileNotFoundError):
+            shared_articles.SharedArticleReader().article(block.handles[0])
+
+
+class T2600FieldPlanTests(unittest.TestCase):
+    """Tests for validating and assigning the fields of a FieldRecord together."""
+
+    class Record(solution.FieldRecord):
+        title = solution.ArticleField(str)
+        views = solution.ArticleField(int)
+        tags = solution.ArticleField(typing.List[str], items="shallow")
+
+    def test_2601_fields_are_collected(self):
+        """The plan should contain the inherited fields in order, minus redefined names."""
+        class Subclass(self.Record):
+            views = None
+            rating = solution.ArticleField(float)
+
+        self.assertEqual(["title", "views", "tags"], list(self.Record.field_plan.fields))
+        self.assertEqual(["title", "tags", "rating"], list(Subclass.field_plan.fields))
+
+        record = Subclass(title="The emperor's new clothes", tags=["fairy tale"], rating=4.5)
+        record.update(rating=5.0, title="Keiserens nye klæder")
+        self.assertEqual(("Keiserens nye klæder", ["fairy tale"], 5.0), (record.title, record.tags, record.rating))
+
+    def test_2602_invalid_values_raise_the_field_error(self):
+        """Invalid values should raise the TypeError of the field and leave the record unchanged."""
+        record = self.Record(title="The emperor's new clothes", views=0, tags=[])
+        for values in ({"views": "1"}, {"tags": [1]}, {"title": "Keiserens nye klæder", "views": 1.5}):
+            name, value = list(values.items())[-1]
+            with self.subTest(values=values):
+                with self.assertRaises(TypeError) as single:
+                    setattr(record, name, value)
+                with self.assertRaises(TypeError) as bulk:
+                    record.update(**values)
+                self.assertEqual(str(single.exception), str(bulk.exception))
+                self.assertEqual(("The emperor's new clothes", 0, []), (record.title, record.views, record.tags))
+
+    def test_2603_missing_and_unknown_fields(self):
+        """The constructor should require every field and neither path should accept unknown fields."""
+        with self.assertRaisesRegex(TypeError, "missing 1 required keyword-only argument: 'tags'"):
+            self.Record(title="The emperor's new clothes", views=0)
+        with self.assertRaisesRegex(TypeError, "unexpected keyword argument 'content'"):
+            self.Record(title="The emperor's new clothes", views=0, tags=[]).update(content="")
+
+    def test_2604_compact_articles_use_their_slots(self):
+        """CompactArticle should keep its constructor and update its slots and interned fields."""
+        pool = solution.InternPool()
+
+        class InternedArticle(solution.CompactArticle):
+            __slots__ = ()
+            author = solution.ArticleField(str, storage="slot", intern=pool)
+
+        article = InternedArticle(title="a", author="b", publication_date=datetime.datetime(2020, 7, 1), content="c")
+        author = "".join(["Hans Christian ", "Andersen"])
+        article.update(title="The emperor's new clothes", author=author)
+        self.assertEqual(("The emperor's new clothes", author, "c"), (article.title, article.author, article.content))
+        self.assertIs(article.author, pool.intern("Hans Christian Andersen"))
+        with self.assertRaises(TypeError):
+            article.update(publication_date="2020-07-01")
+
+
+class T2700WordSketchTests(unittest.TestCase):
+    """Tests for counting the most common words approximately in bounded memory."""
+
+    def setUp(self):
+        texts = make_zipf_texts(200, 100, vocabulary=5000, seed=1)
+        self.articles = [make_article(text) for text in texts]
+        self.exact = solution.ArticleCorpus(self.articles, max_workers=1).word_counts().total
+
+    def test_2701_counts_are_within_the_error_bound(self):
+        """Every estimate should bound the true count, and the error should respect its bound."""
+        sketch = sketches.WordSketch(capacity=50)
+        for article in self.articles:
+            sketch.add_article(article)
+            self.assertLessEqual(len(sketch), 100)
+
+        self.assertEqual(sum(self.exact.values()), sketch.total)
+        self.assertLessEqual(sketch.error, sketch.total / 51)
+        for word, count in self.exact.items():
+            lower, upper = sketch.estimate(word)
+            self.assertLessEqual(lower, count)
+            self.assertLessEqual(count, upper)
+
+        sketch.compact()
+        self.assertLessEqual(len(sketch), 50)
+        self.assertEqual([word for word, _ in self.exact.most_common(3)], list(sketch.most_common_words(3)))
+
+    def test_2702_large_sketches_are_exact(self):
+        """With room for every word, the sketch should match the exact counts and their tie order."""
+        sketch = sketches.WordSketch(capacity=len(self.exact))
+        for article in self.articles:
+            sketch.add(article.content)
+
+        self.assertEqual(0, sketch.error)
+        self.assertEqual(dict(self.exact.most_common(100)), sketch.most_common_words(100))
+
+        unicode_sketch = sketches.WordSketch(tokenizer=tokenizers.UnicodeTokenizer())
+        with self.assertRaises(ValueError):
+            unicode_sketch.add_article(self.articles[0])
+
+    def test_2703_sketches_of_shards_merge(self):
+        """Merged sketches of shards should keep the error bound of a single sketch."""
+        shards = [sketches.WordSketch(capacity=50) for _ in range(4)]
+        for index, article in enumerate(self.articles):
+            shards[index % 4].add_article(article)
+
+        merged = sketches.WordSketch.merged(shards)
+        self.assertEqual(sum(self.exact.values()), merged.total)
+        self.assertLessEqual(merged.error, merged.total / 51)
+        for word, count in self.exact.most_common(20):
+            lower, upper = merged.estimate(word)
+            self.assertTrue(lower <= count <= upper, word)
+
+        with self.assertRaises(ValueError):
+            merged.merge(sketches.WordSketch(capacity=50, tokenizer=tokenizers.UnicodeTokenizer()))
+        with self.assertRaises(ValueError):
+            merged.merge(sketches.WordSketch(capacity=10))
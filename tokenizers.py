@@ -0,0 +1,272 @@
+"""Tokenizers that split the content of an `Article` into words."""
+from __future__ import annotations
+
+import collections
+import re
+import string
+import typing
+import unicodedata
+
+
+class Tokenizer:
+    """
+    Base class for the tokenizers used to count the words in an `Article`.
+
+    A tokenizer normalizes the case of a text and splits it up into words,
+    treating every character that is not part of a word as a word boundary.
+    The words have to be returned in the order in which they occur in the
+    text, as the counting relies on that order to break ties between words
+    with the same count.
+
+    Subclasses implement `split`, which receives text that has already been
+    normalized by `normalize`.
+    """
+
+    # The characters that words consist of after normalization.
+    word_characters = string.ascii_lowercase
+
+    def normalize(self, text: str) -> str:
+        """Return `text` with its case normalized."""
+        return text.lower()
+
+    def split(self, normalized_text: str) -> typing.List[str]:
+        """Return a list of the words in `normalized_text` in order of occurrence."""
+        raise NotImplementedError
+
+    def words(self, text: str) -> typing.List[str]:
+        """Return a list of the normalized words in `text` in order of occurrence."""
+        return self.split(self.normalize(text))
+
+    def count(self, text: str) -> collections.Counter:
+        """Return a `collections.Counter` with the occurrences of the words in `text`."""
+        return collections.Counter(self.words(text))
+
+    def fragment_start(self, normalized_text: str) -> int:
+        """
+        Return the index at which the trailing run of word characters starts.
+
+        If `normalized_text` ends with a word boundary, the length of the text
+        is returned. This is used to hold back the last word of a chunk of text,
+        as it may continue in the next chunk.
+        """
+        return len(normalized_text.rstrip(self.word_characters))
+
+    def trailing_fragment(self, text: str) -> str:
+        """
+        Return the normalized trailing run of word characters of `text`.
+
+        Only the end of `text` is normalized, starting with a small window that
+        is doubled until it contains a word boundary, so the cost depends on
+        the length of the last word rather than on the length of `text`.
+        """
+        window = 64
+        while True:
+            normalized_end = self.normalize(text[-window:])
+            boundary = self.fragment_start(normalized_end)
+            if boundary > 0 or window >= len(text):
+                return normalized_end[boundary:]
+            window *= 2
+
+    def count_appended(self, word_counts: collections.Counter, text: str, tail: str) -> None:
+        """
+        Update the `word_counts` of `text` in place to include the words in `tail`.
+
+        As the last word of `text` may continue in `tail`, it's removed from the
+        counts and recounted together with the words of `tail`. If the count of
+        the last word drops to zero, its first occurrence was at the very end
+        of `text`, so removing the key and adding it again (if it still exists
+        after the append) keeps the first-occurrence order of the keys intact.
+        """
+        fragment = self.trailing_fragment(text)
+        if fragment:
+            word_counts[fragment] -= 1
+            if word_counts[fragment] <= 0:
+                del word_counts[fragment]
+
+        word_counts.update(self.split(fragment + self.normalize(tail)))
+
+    def count_chunks(self, chunks: typing.Iterable[str]) -> collections.Counter:
+        """
+        Return a `collections.Counter` with the occurrences of the words in `chunks`.
+
+        The chunks are treated as consecutive parts of a single text, which
+        means that a word may be split across two (or more) chunks. The words
+        are counted one chunk at a time, so the memory used does not depend on
+        the total length of the text, but only on the length of a chunk and
+        the number of distinct words.
+        """
+        word_counts = collections.Counter()
+        fragment = ""
+        for chunk in chunks:
+            text = fragment + self.normalize(chunk)
+
+            # Hold back the trailing part of a word that may continue in the
+            # next chunk. It's prepended to the next chunk instead.
+            boundary = self.fragment_start(text)
+            fragment = text[boundary:]
+            word_counts.update(self.split(text[:boundary]))
+
+        word_counts.update(self.split(fragment))
+        return word_counts
+
+    def __repr__(self) -> str:
+        """Return the 'official' string representation of the tokenizer."""
+        return f"<{self.__class__.__name__}>"
+
+
+class GeneratorTokenizer(Tokenizer):
+    """
+    Split words by checking each character of the text in a generator expression.
+
+    This is the original implementation of `Article.most_common_words`. It's
+    kept as a reference implementation for the tests and the benchmarks, as it
+    is easy to verify, but the Python-level loop over each character makes it
+    slow for long texts.
+    """
+
+    def split(self, normalized_text: str) -> typing.List[str]:
+        """Return a list of the words in `normalized_text` in order of occurrence."""
+        clean_text = "".join(
+            char if char in string.ascii_lowercase else " "
+            for char in normalized_text
+        )
+        return clean_text.split()
+
+
+class _BoundaryTable(dict):
+    """
+    Translation table that maps every non-alphabet character to a space.
+
+    As `str.translate` looks up each character in the table, we can't list all
+    the characters that should be replaced up front. Instead, the mapping for
+    a character that isn't in the table yet is computed in `__missing__` and
+    stored, so every character only goes through Python code once.
+    """
+
+    def __init__(self) -> None:
+        super().__init__((ord(char), char) for char in string.ascii_lowercase)
+
+    def __missing__(self, codepoint: int) -> str:
+        self[codepoint] = " "
+        return " "
+
+
+class TranslateTokenizer(Tokenizer):
+    """
+    Split words by translating all non-alphabet characters to spaces in bulk.
+
+    The translation and the subsequent `str.split` both run in C, which makes
+    this the fastest tokenizer for the ASCII-only word definition.
+    """
+
+    def __init__(self) -> None:
+        self.table = _BoundaryTable()
+
+    def split(self, normalized_text: str) -> typing.List[str]:
+        """Return a list of the words in `normalized_text` in order of occurrence."""
+        # The text has to be lowercased before it's translated, as lowercasing
+        # some non-ASCII characters produces ASCII letters (e.g. the Kelvin sign).
+        return normalized_text.translate(self.table).split()
+
+
+class RegexTokenizer(Tokenizer):
+    """Split words by finding all runs of lowercase ASCII letters with a compiled regex."""
+
+    pattern = re.compile(f"[{string.ascii_lowercase}]+")
+
+    def split(self, normalized_text: str) -> typing.List[str]:
+        """Return a list of the words in `normalized_text` in order of occurrence."""
+        return self.pattern.findall(normalized_text)
+
+
+class _UnicodeBoundaryTable(dict):
+    """
+    Translation table that maps every character that is not part of a Unicode word to a space.
+
+    Word characters are letters (categories L*) and combining marks (M*), so
+    that words written with decomposed accents, like "e\u0301", aren't split
+    in two. As with `_BoundaryTable`, each character is classified only once.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        mapping = char if char.isalpha() or unicodedata.category(char)[0] == "M" else " "
+        self[codepoint] = mapping
+        return mapping
+
+
+class UnicodeTokenizer(Tokenizer):
+    """
+    Split words on Unicode word boundaries after casefolding the text.
+
+    The ASCII tokenizers split words like "naïve" or "Straße" into fragments
+    and ignore words in other scripts altogether. This tokenizer treats all
+    Unicode letters and combining marks as word characters, and casefolds the
+    text so that, for instance, "STRASSE" and "straße" are counted as the
+    same word. It's opt-in, as it changes the words that are counted:
+
+        >>> Article.tokenizer = UnicodeTokenizer()
+
+    The translation table is shared by all instances, so the characters of
+    a script only have to be classified the first time they're seen.
+    """
+
+    table = _UnicodeBoundaryTable()
+
+    # Maps the ASCII bytes that aren't lowercase letters to spaces, leaving
+    # the bytes of multi-byte UTF-8 sequences (all >= 0x80) untouched.
+    byte_table = bytes(
+        byte if byte >= 0x80 or chr(byte) in string.ascii_lowercase else ord(" ")
+        for byte in range(256)
+    )
+
+    def normalize(self, text: str) -> str:
+        """Return `text` casefolded."""
+        return text.casefold()
+
+    def count(self, text: str) -> collections.Counter:
+        """
+        Return a `collections.Counter` with the occurrences of the words in `text`.
+
+        Translating non-ASCII text with a dict is several times slower than
+        translating ASCII text, as `str.translate` has to look up every
+        character in the table. Instead, the text is encoded as UTF-8 and
+        split on ASCII boundaries with a `bytes` translation table, which
+        runs at the speed of the ASCII path. Only the distinct tokens that
+        contain non-ASCII characters are then split on the remaining Unicode
+        boundaries, like "»" or a no-break space.
+
+        The tokens are visited in the order of their first occurrence, and a
+        word's first occurrence is in the earliest token containing it, so
+        the first-occurrence order of the words is preserved.
+        """
+        tokens = collections.Counter(self.normalize(text).encode("utf-8").translate(self.byte_table).split())
+
+        word_counts = collections.Counter()
+        for token, count in tokens.items():
+            if token.isascii():
+                word_counts[token.decode("ascii")] += count
+            else:
+                for word in self.split(token.decode("utf-8")):
+                    word_counts[word] += count
+
+        return word_counts
+
+    def split(self, normalized_text: str) -> typing.List[str]:
+        """Return a list of the words in `normalized_text` in order of occurrence."""
+        return normalized_text.translate(self.table).split()
+
+    def fragment_start(self, normalized_text: str) -> int:
+        """Return the index at which the trailing run of word characters starts."""
+        # There's no finite set of word characters to strip, so the run is
+        # found by walking back from the end. This only visits the
+        # characters of the last word.
+        table = self.table
+        index = len(normalized_text)
+        while index and table[ord(normalized_text[index - 1])] != " ":
+            index -= 1
+        return index
+
+
+# The tokenizer used by `Article` unless a subclass or instance overrides it.
+DEFAULT_TOKENIZER = TranslateTokenizer()